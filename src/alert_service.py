@@ -1,3 +1,5 @@
+from src.startup import StartupTimer, budget_from_config  # first: starts the clock
+
 import logging
 import os
 from typing import List
@@ -5,7 +7,7 @@ import requests
 from jinja2 import Template
 
 from src.config import load_config
-from src.search_service import find_listings, apply_tco
+from src.search_service import find_listings
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +48,15 @@ def _send_email_via_mailgun(subject: str, text_body: str, recipients: List[str],
 
 
 def run_daily_search_and_alert() -> None:
-    """Run eBay search, filter by perf-per-dollar, email alerts."""
+    """Run eBay search, filter by perf-per-dollar, email alerts.
+
+    With ``database.url`` configured only listings that are new or dropped
+    in price since the previous run are considered; without it every
+    listing is.  Incremental runs only see listings newer than the previous
+    run, so every ``alerts.full_pass_hours`` (default 24) a full search
+    (every result page) runs instead to catch price drops of listings
+    already tracked and to notice the ones that are gone.
+    """
     config = load_config()
 
     perf_threshold: float = config.get("alerts", {}).get("perf_per_dollar_min", 0)
@@ -54,29 +64,67 @@ def run_daily_search_and_alert() -> None:
     if not recipients:
         logger.warning("No alert recipients configured; skipping email send.")
 
-    # Retrieve and enrich listings (use lighter one-page search)
+    # Incremental mode only fetches listings newer than the previous run
+    incremental: bool = config.get("alerts", {}).get("incremental", False)
+    db_url = (config.get("database") or {}).get("url")
+    engine = None
+    if db_url:
+        # Database modules (and SQLAlchemy) load only when a database is configured.
+        from src.crawl_state import full_pass_due, record_full_pass
+        from src.database import get_engine
+        from src.price_history import detect_changes
+
+        engine = get_engine(db_url)
+    full_pass = False
+    if incremental and engine is not None:
+        full_pass = full_pass_due(engine, float(config.get("alerts", {}).get("full_pass_hours", 24)))
+        if full_pass:
+            logger.info("Full pass due: running a full search to re-check tracked listings")
+            incremental = False
+
+    # Retrieve, enrich and TCO-score listings.  Regular runs use the lighter
+    # one-page search; a full pass pages through everything, because
+    # incremental runs track listings beyond the first page and those are
+    # marked gone unless the pass finds them.
     try:
-        listings, _ = find_listings(config, full_search_override=False)
+        listings, _ = find_listings(config, full_search_override=full_pass, incremental=incremental)
     except RuntimeError as exc:
         logger.error("Cannot run daily alert – %s", exc)
         return
 
-    # Compute TCO/performance
-    apply_tco(listings, config.get("app", {}).get("tco_assumptions", {}))
+    if full_pass:
+        record_full_pass(engine)
+
+    # Reduce to what changed since the previous run
+    previous_prices = {}
+    if engine is not None:
+        changes = detect_changes(listings, engine, mark_gone=not incremental)
+        logger.info(
+            "Alert run: %d new, %d price drops, %d unchanged, %d gone",
+            len(changes.new), len(changes.price_dropped), len(changes.unchanged), len(changes.gone),
+        )
+        listings = changes.alertable
+        previous_prices = {it["itemId"]: prev for it, prev in changes.price_dropped}
+    else:
+        logger.warning("No database.url configured; alerting on all listings")
 
     # Filter by performance threshold
     good_items = [it for it in listings if (it.get("performance_per_dollar") or 0) >= perf_threshold]
 
     if not good_items:
-        logger.info("No items exceeded perf/$ threshold %.2f today", perf_threshold)
+        logger.info("No new or cheaper items exceeded perf/$ threshold %.2f today", perf_threshold)
         return
 
+    def _change(it):
+        prev = previous_prices.get(it["itemId"])
+        return f"was ${prev:.2f}" if prev is not None else "new"
+
     good_items.sort(key=lambda x: x["performance_per_dollar"], reverse=True)
 
     def _build_plain(items):
-        header = "Perf/$  | Price  | CPU Model | RAM | Storage | URL\n" + "-"*90
+        header = "Perf/$  | Price  | Change      | CPU Model | RAM | Storage | URL\n" + "-"*104
         rows = [
-            f"{it['performance_per_dollar']:.1f}   | ${it['price']:.2f} | {it['cpu_model']:<10} | {it['ram']:<6} | {it['storage']:<8} | {it['item_url']}"
+            f"{it['performance_per_dollar']:.1f}   | ${it['price']:.2f} | {_change(it):<11} | {it['cpu_model']:<10} | {it['ram']:<6} | {it['storage']:<8} | {it['item_url']}"
             for it in items
         ]
         return "\n".join([header, *rows])
@@ -91,7 +139,7 @@ def run_daily_search_and_alert() -> None:
         <table border="1" cellpadding="4" cellspacing="0" style="border-collapse:collapse;font-family:Arial,sans-serif;font-size:14px">
             <thead>
                 <tr style="background:#f2f2f2">
-                    <th>Perf/$</th><th>Price</th><th>CPU</th><th>RAM</th><th>Storage</th><th>Link</th>
+                    <th>Perf/$</th><th>Price</th><th>Change</th><th>CPU</th><th>RAM</th><th>Storage</th><th>Link</th>
                 </tr>
             </thead>
             <tbody>
@@ -99,6 +147,7 @@ def run_daily_search_and_alert() -> None:
                 <tr>
                     <td>{{ '%.1f' % it.performance_per_dollar }}</td>
                     <td>${{ '%.2f' % it.price }}</td>
+                    <td>{{ change(it) }}</td>
                     <td>{{ it.cpu_model }}</td>
                     <td>{{ it.ram }}</td>
                     <td>{{ it.storage }}</td>
@@ -109,13 +158,13 @@ def run_daily_search_and_alert() -> None:
         </table>
         </body></html>
         """
-        return Template(template_str).render(items=items)
+        return Template(template_str).render(items=items, change=_change)
 
     body_text = _build_plain(good_items)
     body_html = _build_html(good_items)
 
     _send_email_via_mailgun(
-        subject="Homelab Deal Alert – New high Perf/$ listings",
+        subject="Homelab Deal Alert – New and cheaper high Perf/$ listings",
         text_body=body_text,
         html_body=body_html,
         recipients=recipients,
@@ -126,4 +175,7 @@ if __name__ == "__main__":
     from src.logging_setup import configure as _configure_logging
 
     _configure_logging()
+    _startup = StartupTimer('alert run')
+    _startup.lap('imports')
+    _startup.report(budget_from_config())
     run_daily_search_and_alert() 
\ No newline at end of file
@@ -1,7 +1,6 @@
 # pylint: disable=invalid-name
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
+from src.startup import StartupTimer, budget_from_config  # first: starts the clock
+
 import logging
 
 from src.logging_setup import configure as _configure_logging
@@ -10,12 +9,21 @@ from src.alert_service import run_daily_search_and_alert
 # Configure logging once for CLI context.
 _configure_logging()
 logger = logging.getLogger(__name__)
+_startup = StartupTimer('alert worker')
+_startup.lap('imports')
 
 def main():
+    # APScheduler and pytz are only needed by the long-running scheduler.
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    import pytz
+
+    _startup.lap('scheduler imports')
     eastern = pytz.timezone("US/Eastern")
     scheduler = BlockingScheduler(timezone=eastern)
     trigger = CronTrigger(hour=8, minute=0, timezone=eastern)
     scheduler.add_job(run_daily_search_and_alert, trigger, name="daily_alert")
+    _startup.report(budget_from_config())
     logger.info("Alert scheduler started – will run daily at 08:00 US/Eastern")
     try:
         scheduler.start()
@@ -1,18 +1,32 @@
+from src.startup import StartupTimer, budget_from_config  # first: starts the clock
+
 import logging
 import os
 import secrets
 from flask import Flask, render_template, jsonify, request
 import requests
 from werkzeug.exceptions import HTTPException
+from werkzeug.security import safe_join
+
+from src.compression import (
+    COMPRESSIBLE_MIMETYPES,
+    MIN_COMPRESS_BYTES,
+    CompressedBodyCache,
+    negotiate,
+)
 
 from src.config import load_config
+from src.routes.listings import listings_bp
 from src.routes.search import search_bp
+from src.search_service import start_token_refresh
 from src.logging_setup import configure as _configure_logging
 
 # Ensure logging is configured before any module-level loggers are created.
 _configure_logging()
 
 logger = logging.getLogger(__name__)
+_startup = StartupTimer('web app')
+_startup.lap('imports')
 
 def create_app() -> Flask:
     """Flask application factory."""
@@ -20,6 +34,14 @@ def create_app() -> Flask:
 
     # Register blueprints
     app.register_blueprint(search_bp)
+    app.register_blueprint(listings_bp)
+
+    # Load config.yaml once for start-up; load_config logs a missing or
+    # broken file itself, and every setting below has a fallback.
+    try:
+        config = load_config()
+    except Exception:
+        config = {}
 
     # ---------------- Security: secret key & cookies -----------------
     # 1. Try explicit environment variable.
@@ -27,11 +49,7 @@ def create_app() -> Flask:
 
     # 2. Fallback to value in config.yaml (security.secret_key).
     if not secret_key:
-        try:
-            cfg_tmp = load_config()
-            secret_key = cfg_tmp.get('security', {}).get('secret_key')
-        except Exception:
-            secret_key = None  # on error we just generate a random key
+        secret_key = (config.get('security') or {}).get('secret_key')
 
     # 3. Generate a cryptographically-strong key as last resort.
     if not secret_key or secret_key.startswith('${'):
@@ -44,6 +62,14 @@ def create_app() -> Flask:
     app.config.setdefault('SESSION_COOKIE_HTTPONLY', True)
     app.config.setdefault('SESSION_COOKIE_SAMESITE', 'Lax')
 
+    # ---------------- eBay token ----------------
+    # Acquire the OAuth token in the background and renew it before it
+    # expires, so requests never wait for the identity endpoint.
+    try:
+        start_token_refresh(config)
+    except Exception as exc:  # no usable config yet – searches report it
+        logger.warning("eBay token refresh not started: %s", exc)
+
     # ---------------- Error handlers ----------------
     def _json_error_response(message: str, status_code: int = 500):
         """Return a consistent JSON error payload."""
@@ -75,6 +101,45 @@ def create_app() -> Flask:
     def _handle_405(exc):  # noqa: ANN001
         return _json_error_response('Method not allowed', 405)
 
+    # ---------------- Static asset compression ----------------
+    static_bodies = CompressedBodyCache()
+
+    @app.after_request
+    def _compress_static(response):  # noqa: ANN001
+        """Serve text static assets gzip/brotli-encoded, compressed once per file version."""
+        if request.endpoint != 'static' or response.status_code != 200:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+        path = safe_join(app.static_folder, (request.view_args or {}).get('filename', ''))
+        if encoding is None or path is None:
+            return response
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return response
+        if stat.st_size < MIN_COMPRESS_BYTES:
+            return response
+
+        def _read() -> bytes:
+            with open(path, 'rb') as fh:
+                return fh.read()
+
+        data = static_bodies.get((path, stat.st_mtime_ns, stat.st_size), encoding, _read, slot=path)
+        if hasattr(response.response, 'close'):
+            response.response.close()  # release the file opened by send_file
+        response.direct_passthrough = False
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        # Each content-coding needs its own validator; send_file's ETag is
+        # for the uncompressed file.
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response.make_conditional(request)
+
     # -------------------------------------------------
 
     # Jinja filter
@@ -82,6 +147,8 @@ def create_app() -> Flask:
     def _format_price(value):  # noqa: D401
         return 'N/A' if value is None else f"${value:,.2f}"
 
+    app.config['STARTUP_BUDGET_MS'] = budget_from_config(config)
+
     @app.route('/')
     def index():  # type: ignore
         cfg = load_config()
@@ -93,6 +160,8 @@ def create_app() -> Flask:
 
 # Export default app for WSGI servers (Gunicorn, etc.)
 app = create_app()
+_startup.lap('create_app')
+app.config['STARTUP_REPORT'] = _startup.report(app.config['STARTUP_BUDGET_MS'])
 
 if __name__ == '__main__':  # pragma: no cover
     app.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
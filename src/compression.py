@@ -0,0 +1,171 @@
+"""Content-Encoding negotiation with reusable compressed bodies.
+
+Full-search responses are large and very repetitive JSON, so they compress
+well, but compressing them per request costs more CPU than it saves on a
+LAN.  ``CompressedBodyCache`` compresses a body once per (identity,
+encoding) and hands the same bytes to every client, e.g. once per
+result-set version for ``/search`` and once per file mtime for static
+assets.  Only the newest identity of each *slot* (a search, a file) is
+kept, and the cache is bounded by total bytes as well as entry count, so
+superseded multi-megabyte bodies do not pile up in every worker.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it; gzip is always available.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from flask import Response
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent as-is; the headers would eat the gain.
+MIN_COMPRESS_BYTES = 1024
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+    'image/svg+xml',
+})
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the preferred supported encoding from an Accept-Encoding header.
+
+    Returns ``None`` when the body should be sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress *body* with *encoding* ('br', 'gzip' or 'identity')."""
+    if encoding == 'identity':
+        return body
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        # mtime=0 makes the output reproducible across workers.
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by ``(identity, encoding)``.
+
+    *identity* must change whenever the uncompressed body changes, e.g. a
+    result-set version or a file's ``(path, mtime, size)``.  Entries are
+    evicted beyond *max_entries* or *max_bytes* (the newest entry is always
+    kept).
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max(int(max_entries), 1)
+        self.max_bytes = max(int(max_bytes), 0)
+        self._entries: OrderedDict[Tuple[Hashable, str], bytes] = OrderedDict()
+        self._size = 0
+        self._slots: dict[Hashable, Hashable] = {}  # slot -> newest identity
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total bytes of the cached bodies."""
+        return self._size
+
+    def get(
+        self,
+        identity: Hashable,
+        encoding: str,
+        body: Callable[[], bytes],
+        slot: Hashable = None,
+    ) -> bytes:
+        """Return the *encoding*-compressed body for *identity*.
+
+        *body* produces the uncompressed bytes and is only called on a miss.
+        With *slot*, storing a new identity for the slot drops the bodies of
+        the identity it replaces.
+        """
+        key = (identity, encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        compressed = compress(body(), encoding)
+        with self._lock:
+            if slot is not None:
+                previous = self._slots.get(slot)
+                self._slots[slot] = identity
+                if previous is not None and previous != identity:
+                    for stale in [k for k in self._entries if k[0] == previous]:
+                        self._size -= len(self._entries.pop(stale))
+            if key not in self._entries:
+                self._size += len(compressed)
+            self._entries[key] = compressed
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+
+def encoded_response(
+    cache: CompressedBodyCache,
+    identity: Hashable,
+    body: Callable[[], bytes],
+    mimetype: str,
+    accept_encoding: Optional[str],
+    slot: Hashable = None,
+) -> Response:
+    """Build a response for *identity*, compressed if the client accepts it.
+
+    Both the serialised body and each compressed variant are produced once
+    per identity and reused; see ``CompressedBodyCache.get`` for *slot*.
+    """
+    raw = cache.get(identity, 'identity', body, slot=slot)
+    encoding = negotiate(accept_encoding) if len(raw) >= MIN_COMPRESS_BYTES else None
+    data = cache.get(identity, encoding, lambda: raw, slot=slot) if encoding else raw
+
+    response = Response(data, mimetype=mimetype, direct_passthrough=True)
+    response.headers['Content-Length'] = str(len(data))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
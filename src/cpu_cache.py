@@ -0,0 +1,117 @@
+"""Persistent memo of CPU model -> (PassMark score, idle watts).
+
+Resolving a CPU string can require scanning the reference tables, and the
+same few thousand strings appear in every search.  Results - including
+misses, stored as ``None`` - are kept in memory and written to SQLite so
+other workers and later processes start warm.  Every row carries the
+reference data version (see ``data_loader.reference_data_version``); rows
+from any other version are dropped when the cache is opened.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Resolution = Tuple[Optional[int], Optional[float]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cpu_resolution (
+    version TEXT NOT NULL,
+    cpu_model TEXT NOT NULL,
+    score INTEGER,
+    idle_watts REAL,
+    PRIMARY KEY (version, cpu_model)
+);
+"""
+
+
+class CpuResolutionCache:
+    """In-memory CPU resolution memo with an optional SQLite backing file."""
+
+    def __init__(self, version: str, path: str | Path | None = None):
+        self.version = version
+        self.path = Path(path) if path else None
+        self._memo: dict[str, Resolution] = {}
+        self._pending: dict[str, Resolution] = {}
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._load()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], version: str) -> "CpuResolutionCache":
+        """Build a cache from ``config['cache']['cpu_resolution']``.
+
+        Without a configured ``path`` the memo lives in process memory only.
+        """
+        cache_cfg = (config.get("cache") or {}).get("cpu_resolution") or {}
+        path = cache_cfg.get("path") if cache_cfg.get("enabled", True) else None
+        return cls(version, path)
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def get(self, cpu_model: str) -> Resolution | None:
+        """Return the cached resolution, or ``None`` if never resolved."""
+        return self._memo.get(cpu_model)
+
+    def put(self, cpu_model: str, score: Optional[int], idle_watts: Optional[float]) -> None:
+        """Record a resolution; falsy values are stored as known misses."""
+        resolution = (score or None, idle_watts or None)
+        with self._lock:
+            self._memo[cpu_model] = resolution
+            if self.path is not None:
+                self._pending[cpu_model] = resolution
+
+    def flush(self) -> None:
+        """Write resolutions recorded since the last flush to disk."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self.path is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cpu_resolution (version, cpu_model, score, idle_watts) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(self.version, cpu, score, idle) for cpu, (score, idle) in pending.items()],
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Could not persist CPU resolution cache: %s", exc)
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+                stale = conn.execute(
+                    "DELETE FROM cpu_resolution WHERE version != ?", (self.version,)
+                ).rowcount
+                rows = conn.execute(
+                    "SELECT cpu_model, score, idle_watts FROM cpu_resolution WHERE version = ?",
+                    (self.version,),
+                ).fetchall()
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("CPU resolution cache not persisted: %s", exc)
+            self.path = None
+            return
+        self._memo = {cpu: (score, idle) for cpu, score, idle in rows}
+        if stale:
+            logger.info("Dropped %d CPU resolutions from older reference data", stale)
+        logger.info("Loaded %d cached CPU resolutions (version %s)", len(self._memo), self.version)
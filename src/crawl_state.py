@@ -0,0 +1,144 @@
+"""Per-keyword high-water marks for incremental crawling.
+
+In incremental mode searches are requested newest-first
+(``sort=newlyListed``) and pagination stops at the first listing that was
+already seen by a previous crawl.  The mark is the newest
+``itemCreationDate`` seen for a search plus the ids listed at exactly that
+instant, so listings sharing the boundary timestamp are neither lost nor
+reported twice.
+
+Listings below the mark are never fetched again, so their price changes
+go unnoticed.  Incremental alert runs therefore fall back to a regular
+search once the last full pass (recorded here too) is older than the
+configured interval.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, FrozenSet, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from src.database import CrawlState
+
+
+# crawl_state row recording when the last full (non-incremental) pass ran;
+# not a valid crawl_key, so it cannot collide with a search.
+FULL_PASS_KEY = '*full-pass*'
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+@dataclass(frozen=True)
+class HighWaterMark:
+    """Newest listing seen so far for one search."""
+
+    created_at: Optional[str] = None  # itemCreationDate, as returned by eBay
+    item_ids: FrozenSet[str] = field(default_factory=frozenset)
+
+    @property
+    def is_set(self) -> bool:
+        return self.created_at is not None
+
+    def seen(self, item: dict) -> bool:
+        """True if *item* is at or below the mark, i.e. an earlier crawl saw it.
+
+        Items without a creation date are never considered seen.
+        """
+        created = item.get('itemCreationDate')
+        if self.created_at is None or not created:
+            return False
+        created_at, mark = _parse_time(created), _parse_time(self.created_at)
+        return created_at < mark or (created_at == mark and item.get('itemId') in self.item_ids)
+
+    def advance(self, items: Iterable[dict]) -> "HighWaterMark":
+        """Return the mark moved up to the newest of *items*."""
+        newest = _parse_time(self.created_at) if self.created_at else None
+        created_at, ids = self.created_at, set(self.item_ids)
+        for item in items:
+            created = item.get('itemCreationDate')
+            if not created:
+                continue
+            when = _parse_time(created)
+            if newest is None or when > newest:
+                newest, created_at, ids = when, created, {item.get('itemId')}
+            elif when == newest:
+                ids.add(item.get('itemId'))
+        return HighWaterMark(created_at, frozenset(ids))
+
+
+def crawl_key(keywords: str, category_id: Any, max_price: Any) -> str:
+    """Key of one search's crawl state; the mark is only valid for the same filters."""
+    return json.dumps([keywords, str(category_id or ''), str(max_price or '')], separators=(',', ':'))
+
+
+def load_high_water_mark(engine: Engine, key: str) -> HighWaterMark:
+    """Return the stored mark for *key*, or an empty mark."""
+    table = CrawlState.__table__
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(table.c.high_water, table.c.boundary_ids).where(table.c.search_key == key)
+        ).first()
+    if row is None:
+        return HighWaterMark()
+    return HighWaterMark(row.high_water, frozenset(json.loads(row.boundary_ids or '[]')))
+
+
+def save_high_water_mark(engine: Engine, key: str, mark: HighWaterMark) -> None:
+    """Store *mark* for *key*; empty marks are not stored."""
+    if not mark.is_set:
+        return
+    table = CrawlState.__table__
+    stmt = sqlite_insert(table).values(
+        search_key=key,
+        high_water=mark.created_at,
+        boundary_ids=json.dumps(sorted(mark.item_ids)),
+        updated_at=datetime.now(timezone.utc),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.search_key],
+        set_={name: stmt.excluded[name] for name in ('high_water', 'boundary_ids', 'updated_at')},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt)
+
+
+def full_pass_due(engine: Engine, interval_hours: float) -> bool:
+    """True if no full pass was recorded in the last *interval_hours*.
+
+    An interval of 0 (or less) disables full passes.
+    """
+    if interval_hours <= 0:
+        return False
+    table = CrawlState.__table__
+    with engine.connect() as conn:
+        last = conn.execute(
+            select(table.c.updated_at).where(table.c.search_key == FULL_PASS_KEY)
+        ).scalar()
+    if last is None:
+        return True
+    if last.tzinfo is None:  # SQLite drops the offset
+        last = last.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - last >= timedelta(hours=interval_hours)
+
+
+def record_full_pass(engine: Engine) -> None:
+    """Remember that a full pass finished now."""
+    now = datetime.now(timezone.utc)
+    table = CrawlState.__table__
+    stmt = sqlite_insert(table).values(
+        search_key=FULL_PASS_KEY, high_water=now.isoformat(), boundary_ids='[]', updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.search_key],
+        set_={name: stmt.excluded[name] for name in ('high_water', 'updated_at')},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt)
@@ -1,23 +1,29 @@
 import time
+import hashlib
 import logging
+import marshal
+import os
 import re
+import tempfile
 from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Mapping, TypeVar
+
+from src.ref_table import MappedTable, write_table
+from src.utils import is_precise_substring_match
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).resolve().parent.parent  # repository root
 
-@lru_cache(maxsize=1)
-def load_passmark_data(filepath: str = 'passmark.txt') -> dict[str, int]:
-    """Return a mapping of *upper-cased* CPU name -> PassMark score."""
-    scores: dict[str, int] = {}
-    start = time.time()
-    file_path = DATA_DIR / filepath
-    if not file_path.exists():
-        logger.error("PassMark file not found at '%s'", file_path)
-        return scores
+V = TypeVar('V')
+
+# Bump when the compiled layout or the parsers change.
+COMPILED_FORMAT = 1
+
 
+def _parse_passmark(file_path: Path) -> dict[str, int]:
+    scores: dict[str, int] = {}
     with file_path.open(encoding='utf-8') as fh:
         for line in fh:
             parts = line.strip().split('\t')
@@ -28,20 +34,11 @@ def load_passmark_data(filepath: str = 'passmark.txt') -> dict[str, int]:
                 scores[name.strip().upper()] = int(score_raw.replace(',', '').strip())
             except ValueError:
                 logger.warning("Could not parse score '%s' for CPU '%s'", score_raw, name)
-
-    logger.info("Loaded %d PassMark scores in %.2fs", len(scores), time.time() - start)
     return scores
 
-@lru_cache(maxsize=1)
-def load_idle_power_data(filepath: str = 'idlepower.txt') -> dict[str, float]:
-    """Return mapping of *upper-cased* CPU name -> idle power (Watts)."""
-    data: dict[str, float] = {}
-    start = time.time()
-    file_path = DATA_DIR / filepath
-    if not file_path.exists():
-        logger.error("Idle power file not found at '%s'", file_path)
-        return data
 
+def _parse_idle_power(file_path: Path) -> dict[str, float]:
+    data: dict[str, float] = {}
     with file_path.open(encoding='utf-8') as fh:
         next(fh, None)  # skip header if present
         for line in fh:
@@ -57,10 +54,233 @@ def load_idle_power_data(filepath: str = 'idlepower.txt') -> dict[str, float]:
                 data[name_part] = float(power_part)
             except ValueError:
                 logger.warning("Could not parse idle power '%s' for CPU '%s'", power_part, name_part)
-
-    logger.info("Loaded %d idle-power entries in %.2fs", len(data), time.time() - start)
     return data
 
-# Load once at import for backwards compatibility
-PASSMARK_SCORES = load_passmark_data()
-IDLE_POWER_DATA = load_idle_power_data() 
\ No newline at end of file
+
+def _compiled_path(file_path: Path) -> Path:
+    return file_path.with_name(file_path.name + '.marshal')
+
+
+@lru_cache(maxsize=4)
+def _load_compiled(filepath: str, parse: Callable[[Path], dict]) -> tuple[dict, dict] | None:
+    """Return ``(mapping, trigram postings)`` for a reference data file.
+
+    The parsed mapping and its ``SubstringIndex`` postings are kept in a
+    marshal file next to the source (``passmark.txt.marshal``) and loaded
+    with a single read.  The compiled file is trusted when it records the
+    source's size and mtime, or its size and SHA-256 after a touch or
+    checkout; otherwise it is rebuilt.  A read-only data directory only
+    costs the rebuild.  Returns None if the source file is missing.
+    """
+    file_path = DATA_DIR / filepath
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    compiled = _compiled_path(file_path)
+
+    digest = None
+    try:
+        header, payload = marshal.loads(compiled.read_bytes())
+        fmt, size, mtime_ns, stored_digest = header
+        if fmt == COMPILED_FORMAT and size == stat.st_size:
+            if mtime_ns == stat.st_mtime_ns:
+                return payload
+            digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+            if digest == stored_digest:
+                _write_compiled(compiled, (COMPILED_FORMAT, size, stat.st_mtime_ns, digest), payload)
+                return payload
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, EOFError, TypeError) as exc:
+        logger.warning("Ignoring unreadable compiled data %s: %s", compiled, exc)
+
+    start = time.time()
+    mapping = parse(file_path)
+    payload = (mapping, SubstringIndex.build_postings(mapping))
+    digest = digest or hashlib.sha256(file_path.read_bytes()).hexdigest()
+    _write_compiled(compiled, (COMPILED_FORMAT, stat.st_size, stat.st_mtime_ns, digest), payload)
+    logger.info("Compiled %d entries from %s in %.2fs", len(mapping), file_path.name, time.time() - start)
+    return payload
+
+
+def _write_compiled(path: Path, header: tuple, payload: tuple) -> None:
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(marshal.dumps((header, payload)))
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except OSError as exc:
+        logger.debug("Could not write compiled data %s: %s", path, exc)
+
+
+def load_passmark_data(filepath: str = 'passmark.txt') -> dict[str, int]:
+    """Return a mapping of *upper-cased* CPU name -> PassMark score."""
+    compiled = _load_compiled(filepath, _parse_passmark)
+    if compiled is None:
+        logger.error("PassMark file not found at '%s'", DATA_DIR / filepath)
+        return {}
+    return compiled[0]
+
+
+def load_idle_power_data(filepath: str = 'idlepower.txt') -> dict[str, float]:
+    """Return mapping of *upper-cased* CPU name -> idle power (Watts)."""
+    compiled = _load_compiled(filepath, _parse_idle_power)
+    if compiled is None:
+        logger.error("Idle power file not found at '%s'", DATA_DIR / filepath)
+        return {}
+    return compiled[0]
+
+@lru_cache(maxsize=4)
+def reference_data_version(
+    passmark_file: str = 'passmark.txt',
+    idle_power_file: str = 'idlepower.txt',
+) -> str:
+    """Return a short content hash of the reference data files.
+
+    Anything derived from the reference data and persisted across processes
+    should be keyed by this value so it is invalidated when a file changes.
+    """
+    digest = hashlib.sha256()
+    for name in (passmark_file, idle_power_file):
+        file_path = DATA_DIR / name
+        digest.update(name.encode())
+        digest.update(file_path.read_bytes() if file_path.exists() else b'')
+    return digest.hexdigest()[:16]
+
+class SubstringIndex:
+    """Trigram index over the keys of a reference mapping.
+
+    ``find(term)`` returns the value of the *first* key, in mapping order,
+    for which ``is_precise_substring_match(term, key)`` holds - exactly what
+    a linear scan over ``mapping.items()`` returns, but only the keys that
+    contain every trigram of *term* are checked.
+    """
+
+    GRAM = 3
+
+    def __init__(self, mapping: Mapping[str, V], postings: dict[str, list[int]] | None = None):
+        """*postings* may be passed in precomputed (see ``build_postings``)."""
+        self._keys = list(mapping.keys())
+        self._values = list(mapping.values())
+        self._postings = postings if postings is not None else self.build_postings(mapping)
+
+    @classmethod
+    def build_postings(cls, mapping: Mapping[str, V]) -> dict[str, list[int]]:
+        """Return trigram -> ascending key ranks for the keys of *mapping*."""
+        postings: dict[str, list[int]] = {}
+        n = cls.GRAM
+        for rank, key in enumerate(mapping):
+            for gram in {key[i:i + n] for i in range(len(key) - n + 1)}:
+                postings.setdefault(gram, []).append(rank)  # ranks stay ascending
+        return postings
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(self, term: str) -> V | None:
+        """Return the value of the first precise substring match, or None."""
+        n = self.GRAM
+        if len(term) < n:
+            candidates = range(len(self._keys))
+        else:
+            # Any key containing *term* contains all of its trigrams, so the
+            # shortest posting list is a complete candidate set.
+            candidates = min(
+                (self._postings.get(term[i:i + n], ()) for i in range(len(term) - n + 1)),
+                key=len,
+            )
+        keys = self._keys
+        for rank in candidates:
+            if is_precise_substring_match(term, keys[rank]):
+                return self._values[rank]
+        return None
+
+
+@lru_cache(maxsize=4)
+def _load_table(filepath: str, parse: Callable[[Path], dict]) -> MappedTable | None:
+    """Return the shared memory-mapped table for a reference data file.
+
+    ``<file>.table`` is (re)built from the compiled data when missing or
+    older than the source, then mapped read-only; every process maps the
+    same file, so the data exists once in memory.  Returns None when the
+    source is missing or the table cannot be written (callers fall back to
+    per-process dicts).
+    """
+    file_path = DATA_DIR / filepath
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    source = (stat.st_size, stat.st_mtime_ns)
+    table_path = file_path.with_name(file_path.name + '.table')
+
+    table = MappedTable.open(table_path, source)
+    if table is None:
+        compiled = _load_compiled(filepath, parse)
+        if compiled is None:
+            return None
+        try:
+            write_table(table_path, *compiled, source)
+        except OSError as exc:
+            logger.debug("Could not write shared table %s: %s", table_path, exc)
+            return None
+        table = MappedTable.open(table_path, source)
+    return table
+
+
+def _load_index(filepath: str, parse: Callable[[Path], dict]) -> MappedTable | SubstringIndex:
+    table = _load_table(filepath, parse)
+    if table is not None:
+        return table
+    compiled = _load_compiled(filepath, parse)
+    if compiled is None:
+        return SubstringIndex({})
+    return SubstringIndex(*compiled)
+
+@lru_cache(maxsize=1)
+def load_passmark_index() -> MappedTable | SubstringIndex:
+    """Return the substring index over the PassMark data.
+
+    This is the shared ``MappedTable`` (which is also the mapping itself)
+    when available, otherwise a per-process ``SubstringIndex``.
+    """
+    return _load_index('passmark.txt', _parse_passmark)
+
+@lru_cache(maxsize=1)
+def load_idle_power_index() -> MappedTable | SubstringIndex:
+    """Return the substring index over the idle-power data (see ``load_passmark_index``)."""
+    return _load_index('idlepower.txt', _parse_idle_power)
+
+def _shared_mapping(filepath: str, parse: Callable[[Path], dict], fallback: Callable[[], dict]) -> Mapping:
+    table = _load_table(filepath, parse)
+    return table if table is not None else fallback()
+
+@lru_cache(maxsize=1)
+def passmark_scores() -> Mapping[str, int]:
+    """Return the PassMark scores as a read-only mapping, loaded on first use.
+
+    This is the mmap-shared ``MappedTable`` (a plain dict as a fallback).
+    """
+    return _shared_mapping('passmark.txt', _parse_passmark, load_passmark_data)
+
+@lru_cache(maxsize=1)
+def idle_power_data() -> Mapping[str, float]:
+    """Return the idle-power data as a read-only mapping (see ``passmark_scores``)."""
+    return _shared_mapping('idlepower.txt', _parse_idle_power, load_idle_power_data)
+
+# ``PASSMARK_SCORES`` / ``IDLE_POWER_DATA`` are kept for backwards
+# compatibility but resolved lazily (PEP 562), so importing this module
+# does not open or build the reference tables.
+_LAZY_MAPPINGS = {
+    'PASSMARK_SCORES': passmark_scores,
+    'IDLE_POWER_DATA': idle_power_data,
+}
+
+
+def __getattr__(name: str):
+    loader = _LAZY_MAPPINGS.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return loader()
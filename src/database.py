@@ -3,7 +3,13 @@ Database module for the Homelab Deal Finder.
 Handles database models and operations.
 """
 from datetime import datetime, timezone
+from functools import lru_cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from src.utils import capacity_gb
 import os
 import logging
 
@@ -11,10 +17,8 @@ logger = logging.getLogger(__name__)
 
 db = SQLAlchemy()
 
-def init_app(app):
-    """Initialize the database with the Flask app."""
-    db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
-    
+def _ensure_sqlite_dir(db_uri):
+    """Create the parent directory of a file-backed SQLite URI if needed."""
     # Only attempt to create directories if not using in-memory SQLite
     if not db_uri == 'sqlite:///:memory:' and db_uri.startswith('sqlite:///'):
         db_path = db_uri.replace('sqlite:///', '') # Get the file path part
@@ -27,6 +31,12 @@ def init_app(app):
                     # This might happen if db_dir is, for example, '' for a relative path in current dir
                     # or if there's a genuine permission issue not caught by pre-checks.
                     logger.warning(f"Could not create database directory {db_dir}: {e}")
+
+
+def init_app(app):
+    """Initialize the database with the Flask app."""
+    db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    _ensure_sqlite_dir(db_uri)
     
     # app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}' # This line is problematic if db_path is not defined for in-memory
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -36,6 +46,7 @@ def init_app(app):
     with app.app_context():
         try:
             db.create_all()
+            migrate_listings_table(db.engine)
             print("Database tables created successfully")
         except Exception as e:
             print(f"Error creating database tables: {str(e)}")
@@ -59,12 +70,63 @@ class Listing(db.Model):
     cpu_model = db.Column(db.String)
     ram = db.Column(db.String)
     storage = db.Column(db.String)
+    ram_gb = db.Column(db.Integer)
+    storage_gb = db.Column(db.Integer)
+    performance = db.Column(db.Float)
+    idle_watts = db.Column(db.Float)
     
     # TCO data
     tco = db.Column(db.Float)
+    perf_per_dollar = db.Column(db.Float)
     
     # Status tracking
     last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    first_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # "Top N by perf/$ under price X": walk perf/$ descending and test
+        # price from the index entry, stopping after N matches.
+        db.Index('ix_listings_ppd_price', 'perf_per_dollar', 'price'),
+        # "All listings for CPU Y" (best perf/$ first): one index range.
+        db.Index('ix_listings_cpu_ppd', 'cpu_model', 'perf_per_dollar'),
+    )
+
+class PriceHistory(db.Model):
+    """Append-only price time series; a row is written only when the price
+    changes.  ``price`` NULL marks the listing as gone at ``observed_at``."""
+    __tablename__ = 'price_history'
+
+    item_id = db.Column(db.String, primary_key=True)
+    observed_at = db.Column(db.DateTime, primary_key=True)
+    price = db.Column(db.Float)
+
+
+class PriceState(db.Model):
+    """Latest known price per tracked item, so change detection reads one
+    row per listing instead of scanning ``price_history``."""
+    __tablename__ = 'price_state'
+
+    item_id = db.Column(db.String, primary_key=True)
+    price = db.Column(db.Float, nullable=False)  # last price seen, kept once gone
+    observed_at = db.Column(db.DateTime, nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        # Partial index: loading the active listings skips gone ones.
+        db.Index('ix_price_state_active', 'item_id', 'price', sqlite_where=db.text('active')),
+    )
+
+
+class CrawlState(db.Model):
+    """High-water mark of the incremental crawl, one row per search."""
+    __tablename__ = 'crawl_state'
+
+    search_key = db.Column(db.String, primary_key=True)
+    high_water = db.Column(db.String, nullable=False)  # newest itemCreationDate seen
+    boundary_ids = db.Column(db.Text)  # JSON list of item ids created at high_water
+    updated_at = db.Column(db.DateTime, nullable=False)
+
 
 def get_all_listings():
     """Get all listings from the database."""
@@ -117,4 +179,148 @@ def add_or_update_listing(item_id, title, price, url, cpu_model=None, ram=None,
         
     except Exception as e:
         db.session.rollback()
-        return False 
\ No newline at end of file
+        return False
+
+
+@lru_cache(maxsize=None)
+def get_engine(url):
+    """
+    Return a process-wide engine for *url* with the listing tables created.
+
+    Used by the search pipeline, which runs outside a Flask app context
+    (alert worker, background refreshes).
+    """
+    _ensure_sqlite_dir(url)
+    engine = create_engine(url)
+    migrate_listings_table(engine)
+    db.metadata.create_all(
+        engine, tables=[PriceHistory.__table__, PriceState.__table__, CrawlState.__table__]
+    )
+    return engine
+
+
+def migrate_listings_table(engine):
+    """
+    Create the listings table, add columns introduced since it was created
+    and build its indexes.  Safe to run repeatedly.
+    """
+    table = Listing.__table__
+    table.create(engine, checkfirst=True)
+    existing = {column['name'] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                logger.info("Added column listings.%s", column.name)
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
+
+
+# first_seen is written on insert only.
+_UPSERT_COLUMNS = (
+    'title', 'price', 'url', 'cpu_model', 'ram', 'storage', 'ram_gb', 'storage_gb',
+    'performance', 'idle_watts', 'tco', 'perf_per_dollar', 'last_updated', 'last_seen',
+)
+
+
+def _capacity_gb(value):
+    return capacity_gb(value) or None
+
+
+def _as_float(value):
+    return float(value) if value not in (None, '') else None
+
+
+def bulk_upsert_listings(listings, engine: Engine):
+    """
+    Insert or update a batch of enriched listings in one transaction.
+
+    Uses a single ``INSERT ... ON CONFLICT(item_id) DO UPDATE`` statement
+    executed for all rows at once instead of a get/commit per listing.
+
+    Args:
+        listings: Enriched listings (``ListingRecord`` or dicts in the
+            ``/search`` JSON shape)
+        engine: Engine from ``get_engine``
+
+    Returns:
+        Number of rows written.  Listings without an item id, title, price
+        or URL are skipped.
+    """
+    now = datetime.now(timezone.utc)
+    rows = {}
+    for listing in listings:
+        item_id = listing.get('itemId')
+        title = listing.get('title')
+        price = listing.get('price')
+        url = listing.get('item_url')
+        if not item_id or not title or price is None or not url:
+            continue
+        rows[item_id] = {
+            'item_id': item_id,
+            'title': title,
+            'price': price,
+            'url': url,
+            'cpu_model': listing.get('cpu_model'),
+            'ram': listing.get('ram'),
+            'storage': listing.get('storage'),
+            'ram_gb': _capacity_gb(listing.get('ram')),
+            'storage_gb': _capacity_gb(listing.get('storage')),
+            'performance': _as_float(listing.get('performance')),
+            'idle_watts': _as_float(listing.get('cpu_idle_power')),
+            'tco': listing.get('tco'),
+            'perf_per_dollar': listing.get('performance_per_dollar'),
+            'last_updated': now,
+            'first_seen': now,
+            'last_seen': now,
+        }
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(Listing.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Listing.__table__.c.item_id],
+        set_={name: stmt.excluded[name] for name in _UPSERT_COLUMNS},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt, list(rows.values()))
+    return len(rows)
+
+
+def _listing_rows(engine, stmt):
+    with engine.connect() as conn:
+        return [dict(row) for row in conn.execute(stmt).mappings()]
+
+
+def top_listings_by_perf_per_dollar(engine, max_price=None, limit=20):
+    """
+    Return the best perf/$ listings, optionally at or under *max_price*.
+
+    Served by ``ix_listings_ppd_price`` without a sort step.
+    """
+    stmt = (
+        select(Listing.__table__)
+        .where(Listing.perf_per_dollar.is_not(None))
+        .order_by(Listing.perf_per_dollar.desc())
+        .limit(limit)
+    )
+    if max_price is not None:
+        stmt = stmt.where(Listing.price <= max_price)
+    return _listing_rows(engine, stmt)
+
+
+def listings_for_cpu(engine, cpu_model, limit=None):
+    """
+    Return every stored listing for *cpu_model*, best perf/$ first.
+
+    Served as a range scan of ``ix_listings_cpu_ppd``.
+    """
+    stmt = (
+        select(Listing.__table__)
+        .where(Listing.cpu_model == cpu_model)
+        .order_by(Listing.perf_per_dollar.desc())
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return _listing_rows(engine, stmt)
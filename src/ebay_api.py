@@ -4,32 +4,165 @@ eBay API integration module for the Homelab Deal Finder.
 import logging
 import base64
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
+import math
 import os
+import random
+import threading
 from datetime import datetime, timedelta
-from tenacity import retry, stop_after_attempt, wait_exponential
+from functools import wraps
 from urllib.parse import urlencode, quote_plus, parse_qs, urlparse
 from pathlib import Path  # NEW: path handling
 import tempfile  # NEW: fallback directory for token storage
-# --- Optional encryption support --------------------------------------
-# Cryptography is listed in requirements, but to avoid import-time
-# failures (e.g. when the library or its type stubs are missing in an
-# editor environment) we wrap it in a try/except and degrade gracefully.
-try:
-    from cryptography.fernet import Fernet, InvalidToken  # type: ignore
-except ImportError:  # pragma: no cover – treat encryption as optional
-    Fernet = None  # type: ignore[assignment]
-    class _Dummy(Exception):
-        """Placeholder to keep type checkers happy when cryptography absent."""
-    InvalidToken = _Dummy  # type: ignore[valid-type]
+from concurrent.futures import ThreadPoolExecutor
+
+from src.rate_limiter import QuotaExceededError
+from src.token_store import TokenStore
+
+# cryptography (token encryption) and tenacity (retries) are imported on
+# first use: most processes never encrypt a token, and neither should
+# slow down importing the web app or the alert worker.
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Browse API paging limits
+PAGE_SIZE = 200  # max items the API returns per page
+MAX_PAGES_TO_FETCH = 50  # safety limit: 50 * 200 = 10,000 items
+
+# HTTP connection defaults
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5  # seconds
+DEFAULT_READ_TIMEOUT = 30  # seconds
+
+# OAuth token lifetime management
+TOKEN_MIN_VALIDITY = 60  # seconds a token must still be valid to be used
+TOKEN_REFRESH_MARGIN = 600  # background refresh this long before expiry
+TOKEN_RETRY_SECONDS = 60  # background retry interval after a failed refresh
+
+def _retry_policy() -> dict:
+    """tenacity arguments shared by the blocking and asyncio clients.
+
+    An exhausted call budget is final for the day, so it is not retried.
+    """
+    from tenacity import retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+    return {
+        "stop": stop_after_attempt(3),
+        "wait": wait_exponential(multiplier=1, min=4, max=10),
+        "retry": retry_if_not_exception_type(QuotaExceededError),
+    }
+
+
+def _retry_with_backoff(func):
+    """Retry *func* up to 3 times with exponential backoff (tenacity).
+
+    tenacity is imported and the retrying wrapper built on the first call.
+    """
+    retrying = None
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            from tenacity import retry
+            retrying = retry(**_retry_policy())(func)
+        return retrying(*args, **kwargs)
+
+    return wrapper
+
+
+def _fernet_for(enc_key: str):
+    """Return a Fernet for *enc_key*, or None if cryptography is unavailable.
+
+    Cryptography is listed in requirements, but to avoid failures (e.g. when
+    the library is missing in an editor environment) encryption degrades
+    gracefully.
+    """
+    try:
+        from cryptography.fernet import Fernet  # type: ignore
+    except ImportError:  # pragma: no cover – treat encryption as optional
+        logger.warning("EBAY_TOKEN_ENC_KEY is set but cryptography is not installed; token stored unencrypted")
+        return None
+    # Key must be URL-safe base64 32-byte key (44 chars)
+    return Fernet(enc_key.encode())
+
+
+def _token_store_for(token_file: str | None) -> TokenStore:
+    """Resolve the shared token file and its encryption for a client.
+
+    The path is *token_file*, else ``$EBAY_TOKEN_PATH``, else
+    ``<tmpdir>/ebay_token.json``; the file is encrypted when
+    ``EBAY_TOKEN_ENC_KEY`` is set.
+    """
+    # ---------------- Encryption key -------------------------------
+    enc_key = os.getenv("EBAY_TOKEN_ENC_KEY")
+    fernet: object | None = None
+    if enc_key:
+        try:
+            fernet = _fernet_for(enc_key)
+        except Exception as exc:  # pragma: no cover – invalid key
+            logger.error("Invalid EBAY_TOKEN_ENC_KEY: %s", exc)
+            fernet = None
+
+    # ---------------- Token file path resolution -------------------
+    if token_file is None:
+        token_file = os.getenv("EBAY_TOKEN_PATH")
+
+    if not token_file:
+        # Fall back to a safe location outside the repo tree
+        token_file = str(Path(tempfile.gettempdir()) / "ebay_token.json")
+
+    return TokenStore(Path(token_file), fernet)
+
+
+def _token_url(sandbox: bool) -> str:
+    return (
+        "https://api.sandbox.ebay.com/identity/v1/oauth2/token"
+        if sandbox
+        else "https://api.ebay.com/identity/v1/oauth2/token"
+    )
+
+
+def _client_credentials_request(app_id: str, cert_id: str) -> tuple[dict, dict]:
+    """Headers and form body of a client-credentials token request."""
+    # Create Base64 encoded credentials
+    credentials = f"{app_id}:{cert_id}"
+    encoded_credentials = base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
+
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded",
+        "Authorization": f"Basic {encoded_credentials}",
+    }
+
+    data = {
+        "grant_type": "client_credentials",
+        "scope": "https://api.ebay.com/oauth/api_scope",
+    }
+    return headers, data
+
+
+def estimate_page_calls(total: int, full_search: bool = True, max_pages: int | None = None) -> int:
+    """Number of search page requests needed for *total* results (at least 1).
+
+    *max_pages* defaults to ``MAX_PAGES_TO_FETCH``.
+    """
+    if not full_search:
+        return 1
+    if max_pages is None:
+        max_pages = MAX_PAGES_TO_FETCH
+    return max(min(math.ceil(total / PAGE_SIZE), max_pages), 1)
+
+
 class EBayAPI:
     """Class to handle eBay API interactions."""
     
-    def __init__(self, app_id, cert_id, sandbox=True, token_file: str | None = None):
+    def __init__(self, app_id, cert_id, sandbox=True, token_file: str | None = None,
+                 page_concurrency: int = 1, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 page_cache=None, rate_limiter=None):
         """Initialize the eBay API client with credentials.
 
         Args:
@@ -44,6 +177,17 @@ class EBayAPI:
                 2. ``<tmpdir>/ebay_token.json`` where *tmpdir* is the OS
                    temporary directory.  The location is outside the project
                    repo, preventing accidental check-in.
+            page_concurrency: Number of result pages fetched in parallel
+                during a full search.  ``1`` follows the API's ``next``
+                links one page at a time.
+            pool_size: Maximum number of kept-alive connections per host in
+                the client's HTTP session.
+            connect_timeout: Seconds to wait for a TCP/TLS connection.
+            read_timeout: Seconds to wait for a response once connected.
+            page_cache: Optional ``SearchPageCache`` consulted before every
+                search page request.
+            rate_limiter: Optional ``ApiRateLimiter``; every Browse API
+                request (cache misses only) is counted against it.
         """
         if not app_id or not cert_id:
             raise ValueError("eBay API credentials are required")
@@ -51,38 +195,24 @@ class EBayAPI:
         self.app_id = app_id
         self.cert_id = cert_id
         self.sandbox = sandbox
+        self.page_concurrency = max(int(page_concurrency), 1)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._build_session(max(int(pool_size), self.page_concurrency))
+        self.page_cache = page_cache
+        self.rate_limiter = rate_limiter
         self.base_url = (
             "https://api.sandbox.ebay.com/buy/browse/v1"
             if sandbox
             else "https://api.ebay.com/buy/browse/v1"
         )
 
-        # ---------------- Encryption key -------------------------------
-        enc_key = os.getenv("EBAY_TOKEN_ENC_KEY")
-        self._fernet: object | None = None
-        if enc_key:
-            try:
-                # Key must be URL-safe base64 32-byte key (44 chars)
-                self._fernet = Fernet(enc_key.encode())
-            except Exception as exc:  # pragma: no cover – invalid key
-                logger.error("Invalid EBAY_TOKEN_ENC_KEY: %s", exc)
-                self._fernet = None
-
-        # ---------------- Token file path resolution -------------------
-        if token_file is None:
-            token_file = os.getenv("EBAY_TOKEN_PATH")
-
-        if not token_file:
-            # Fall back to a safe location outside the repo tree
-            token_file = str(Path(tempfile.gettempdir()) / "ebay_token.json")
-
-        self.token_file: Path = Path(token_file)
+        self._token_store = _token_store_for(token_file)
+        self.token_file: Path = self._token_store.path
         self.token = None
         self.refresh_token = None
         self.token_expiry = None
-        
-        # Load existing token if available
-        self._load_token()
+        self._refresher: threading.Thread | None = None
+        self._refresher_stop = threading.Event()
         
         # Initialize headers
         self.headers = {
@@ -90,125 +220,143 @@ class EBayAPI:
             "X-EBAY-C-MARKETPLACE-ID": "EBAY_US"
         }
         
-        # Update headers with token if available
+        # Load existing token if available (also sets the Authorization header)
+        self._load_token()
+        
         if self.token:
-            self.headers["Authorization"] = f"Bearer {self.token}"
             logger.info(f"Initialized eBay API with {'sandbox' if sandbox else 'production'} URL: {self.base_url}")
         else:
             logger.info("No valid token found. Please authenticate first.")
     
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        """Return a keep-alive session with a connection pool of *pool_size*.
+
+        The session is shared by all threads using this client.  Per-request
+        headers are passed explicitly and cookies are never stored, so
+        concurrent calls do not mutate shared session state.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def close(self):
+        """Stop the token refresher and release pooled connections."""
+        self._refresher_stop.set()
+        self.session.close()
+
     def _load_token(self):
         """Load token from file if it exists and is not expired."""
-        if self.token_file.exists():
-            try:
-                # Read raw bytes; may be encrypted
-                raw_bytes = self.token_file.read_bytes()
+        token_data = self._token_store.read()
+        if token_data is None:
+            return
+        expiry = datetime.fromisoformat(token_data['expiry'])
+        if expiry > datetime.now():
+            self._set_token(token_data['access_token'], expiry, token_data.get('refresh_token'))
+            logger.info("Loaded valid token from file")
+        else:
+            logger.info("Token expired, will need to refresh")
 
-                if self._fernet is not None:
-                    try:
-                        raw_bytes = self._fernet.decrypt(raw_bytes)
-                    except InvalidToken:
-                        logger.error("Failed to decrypt token file. Wrong key?")
-                        return
+    def _set_token(self, token: str, expiry: datetime, refresh_token: str | None = None):
+        """Adopt *token* in memory; the header is swapped in one assignment."""
+        self.token = token
+        self.token_expiry = expiry
+        if refresh_token:
+            self.refresh_token = refresh_token
+        self.headers["Authorization"] = f"Bearer {token}"
 
-                try:
-                    token_data = json.loads(raw_bytes.decode())
-                except Exception as json_exc:
-                    logger.error("Token file is corrupt or not JSON: %s", json_exc)
-                    return
-                    
-                # Check if token is expired
-                expiry = datetime.fromisoformat(token_data['expiry'])
-                if expiry > datetime.now():
-                    self.token = token_data['access_token']
-                    self.refresh_token = token_data.get('refresh_token')
-                    self.token_expiry = expiry
-                    logger.info("Loaded valid token from file")
-                else:
-                    logger.info("Token expired, will need to refresh")
-            except Exception as e:
-                logger.error(f"Error loading token: {str(e)}")
-    
     def _save_token(self, token_data):
-        """Save token data to file."""
-        try:
-            # Ensure parent directory exists (e.g. /run/secrets)
-            self.token_file.parent.mkdir(parents=True, exist_ok=True)
-
-            data_bytes = json.dumps(token_data).encode()
-            if self._fernet is not None:
-                data_bytes = self._fernet.encrypt(data_bytes)
+        """Save token data to the shared token file."""
+        self._token_store.write(token_data)
 
-            with self.token_file.open('wb') as f:
-                f.write(data_bytes)
-
-            try:
-                self.token_file.chmod(0o600)
-            except Exception as perm_exc:  # pragma: no cover – best-effort
-                logger.debug("Could not set permissions on token file: %s", perm_exc)
+    def _token_valid_for(self, seconds: float) -> bool:
+        return bool(
+            self.token and self.token_expiry
+            and (self.token_expiry - datetime.now()).total_seconds() > seconds
+        )
 
-            logger.info("Token saved to %s", self.token_file)
-        except Exception as e:
-            logger.error(f"Error saving token: {str(e)}")
-    
-    def get_oauth_token(self):
+    def get_oauth_token(self, min_validity: float = TOKEN_MIN_VALIDITY):
         """Get OAuth token using client-credentials flow.
 
-        If a non-expired token is already loaded in ``self.token`` we simply
-        return ``True`` without hitting the eBay identity endpoint again.
+        The in-memory token is used while it is valid for at least another
+        *min_validity* seconds, so normally no file or network I/O happens.
+        Otherwise the shared token file is locked and re-read: if another
+        process (or thread) has just refreshed it, that token is adopted;
+        only if not is the eBay identity endpoint called.
         """
-        # Short-circuit when we already have a token that is valid for at
-        # least another minute. This avoids an extra network round-trip on
-        # every request/cron run.
-        if self.token and self.token_expiry and (self.token_expiry - datetime.now()).total_seconds() > 60:
+        if self._token_valid_for(min_validity):
             return True  # Token still good – nothing to do.
 
-        token_url = (
-            "https://api.sandbox.ebay.com/identity/v1/oauth2/token"
-            if self.sandbox
-            else "https://api.ebay.com/identity/v1/oauth2/token"
-        )
-
-        # Create Base64 encoded credentials
-        credentials = f"{self.app_id}:{self.cert_id}"
-        encoded_credentials = base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
-
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Authorization": f"Basic {encoded_credentials}",
-        }
-
-        data = {
-            "grant_type": "client_credentials",
-            "scope": "https://api.ebay.com/oauth/api_scope",
-        }
-
-        try:
-            response = requests.post(token_url, headers=headers, data=data)
-            response.raise_for_status()
-
-            token_data = response.json()
-            self.token = token_data["access_token"]
-            self.token_expiry = datetime.now() + timedelta(seconds=token_data.get("expires_in", 7200))
-
-            # Save token data
+        with self._token_store.locked():
+            self._load_token()
+            if self._token_valid_for(min_validity):
+                return True
+            token_data = self._request_token()
+            if token_data is None:
+                return False
+            expiry = datetime.now() + timedelta(seconds=token_data.get("expires_in", 7200))
             self._save_token({
-                "access_token": self.token,
-                "expiry": self.token_expiry.isoformat(),
+                "access_token": token_data["access_token"],
+                "expiry": expiry.isoformat(),
             })
+            self._set_token(token_data["access_token"], expiry)
 
-            # Update headers
-            self.headers["Authorization"] = f"Bearer {self.token}"
-
-            logger.info("Successfully obtained access token")
-            return True
+        logger.info("Successfully obtained access token")
+        return True
 
+    def _request_token(self) -> dict | None:
+        """Call the identity endpoint; return the JSON body or None on failure."""
+        headers, data = _client_credentials_request(self.app_id, self.cert_id)
+        try:
+            response = self.session.post(_token_url(self.sandbox), headers=headers, data=data, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
         except requests.exceptions.RequestException as e:  # pragma: no cover – network errors
             logger.error("Error getting OAuth token: %s", e)
             if hasattr(e, "response") and e.response is not None:
                 logger.error("Response text: %s", e.response.text)
-            return False
-    
+            return None
+
+    def start_token_refresher(self):
+        """Keep the token fresh from a daemon thread.
+
+        The token is acquired immediately and then renewed
+        ``TOKEN_REFRESH_MARGIN`` seconds before it expires, so searches
+        never wait for the identity endpoint.  Safe to call repeatedly.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._refresher_stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, name="ebay-token-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._refresher_stop.is_set():
+            try:
+                ok = self.get_oauth_token(min_validity=TOKEN_REFRESH_MARGIN)
+            except Exception:  # noqa: BLE001 – keep the refresher alive
+                logger.exception("Background token refresh failed")
+                ok = False
+            if ok:
+                remaining = (self.token_expiry - datetime.now()).total_seconds()
+                # Jitter spreads the wake-ups of the processes sharing the
+                # token; the first one refreshes, the others adopt its token.
+                # The floor bounds the refresh rate for tokens issued with
+                # less than TOKEN_REFRESH_MARGIN to live.
+                delay = max(remaining - TOKEN_REFRESH_MARGIN, TOKEN_RETRY_SECONDS) + random.uniform(0, 30)
+            else:
+                delay = TOKEN_RETRY_SECONDS
+            self._refresher_stop.wait(delay)
+
     def refresh_access_token(self):
         """Refresh the access token using refresh token."""
         if not self.refresh_token:
@@ -232,22 +380,19 @@ class EBayAPI:
         }
         
         try:
-            response = requests.post(token_url, headers=headers, data=data)
+            response = self.session.post(token_url, headers=headers, data=data, timeout=self.timeout)
             response.raise_for_status()
             
             token_data = response.json()
-            self.token = token_data['access_token']
-            self.token_expiry = datetime.now() + timedelta(seconds=token_data.get('expires_in', 7200))
+            expiry = datetime.now() + timedelta(seconds=token_data.get('expires_in', 7200))
             
             # Save token data
             self._save_token({
-                'access_token': self.token,
+                'access_token': token_data['access_token'],
                 'refresh_token': self.refresh_token,  # Keep the same refresh token
-                'expiry': self.token_expiry.isoformat()
+                'expiry': expiry.isoformat()
             })
-            
-            # Update headers
-            self.headers["Authorization"] = f"Bearer {self.token}"
+            self._set_token(token_data['access_token'], expiry)
             
             logger.info("Successfully refreshed access token")
             return True
@@ -258,8 +403,9 @@ class EBayAPI:
                 logger.error(f"Response text: {e.response.text}")
             return False
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def search_items(self, keywords: str, category_id: int = None, max_price: float = None, full_search: bool = False) -> tuple:
+    @_retry_with_backoff
+    def search_items(self, keywords: str, category_id: int = None, max_price: float = None, full_search: bool = False,
+                     newer_than=None, crawl_status: dict = None) -> tuple:
         """
         Search for items on eBay matching the given criteria, with optional pagination.
         
@@ -268,20 +414,61 @@ class EBayAPI:
             category_id: eBay category ID (optional).
             max_price: Maximum item price (optional) - Used for API filtering.
             full_search: If True, attempt to paginate through all result pages.
+            newer_than: ``HighWaterMark`` for an incremental crawl (optional).
+                Results are requested newest-first and only listings above
+                the mark are returned; see ``iter_search_pages``.
+            crawl_status: Optional dict; ``crawl_status['reached_mark']`` is
+                set to whether the crawl got down to *newer_than* (see
+                ``iter_search_pages``).
             
         Returns:
             A tuple containing: (list of all found item summaries, total items found by API).
-            Returns ([], 0) on failure.
+            Returns ([], 0) on failure.  When the daily call budget runs out
+            mid-search the pages fetched so far are returned.
         """
         if not self.token:
             logger.error("Authentication token is not available")
             return [], 0
-            
-        search_url = f"{self.base_url}/item_summary/search"
-        
+
+        all_items = []
+        total_from_api = 0
+        try:
+            for items_on_page, total_from_api in self.iter_search_pages(
+                keywords, category_id, max_price, full_search, newer_than=newer_than,
+                crawl_status=crawl_status,
+            ):
+                all_items.extend(items_on_page)
+                logger.info(f"Fetched {len(items_on_page)} items. Total accumulated: {len(all_items)}")
+
+        except QuotaExceededError as quota_err:
+            # Pages already fetched were paid for; keep them.
+            logger.warning(f"Search for '{keywords}' stopped after {len(all_items)} items: {quota_err}")
+            return all_items, total_from_api
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error during search for '{keywords}': {http_err}")
+            logger.error(f"Response Status: {http_err.response.status_code}, Response Text: {http_err.response.text}")
+            # Depending on the error, we might want to break or let tenacity handle retries
+            if http_err.response.status_code in [401, 403]: # Authentication errors - stop
+                 logger.error("Authentication error. Cannot continue search.")
+                 # Potentially try token refresh here if applicable and configured
+                 return [], 0 # Return failure
+            # For other errors (like 400, 500), let tenacity handle retries based on the decorator
+            # If retries fail, the exception will propagate up.
+            raise # Re-raise to trigger tenacity retry
+        except Exception as e:
+            logger.error(f"Error during search for '{keywords}': {str(e)}", exc_info=True)
+            return [], 0 # Return failure on unexpected errors
+
+        logger.info(f"Search complete for '{keywords}'. Total items retrieved: {len(all_items)}. API reported total: {total_from_api}.")
+        return all_items, total_from_api
+
+    @staticmethod
+    def _search_params(keywords: str, category_id: int = None, max_price: float = None,
+                       newer_than=None) -> dict:
+        """Query parameters for the first page of a Browse API search."""
         params = {
             "q": keywords,
-            "limit": 200, # Request max limit per page
+            "limit": PAGE_SIZE, # Request max limit per page
             "offset": 0
         }
         
@@ -297,79 +484,224 @@ class EBayAPI:
         
         if filters:
             params["filter"] = ",".join(filters)
-            
-        all_items = []
+        if newer_than is not None:
+            params["sort"] = "newlyListed"
+        return params
+
+    def iter_search_pages(self, keywords: str, category_id: int = None, max_price: float = None, full_search: bool = False,
+                          newer_than=None, crawl_status: dict = None):
+        """
+        Yield ``(item summaries on page, total items found by API)`` page by page.
+
+        Same paging rules as ``search_items`` but without its error handling
+        or retries: request errors propagate to the caller, and pages already
+        yielded stay with the caller.  Useful for streaming results as they
+        arrive.
+
+        With *newer_than* (a ``HighWaterMark``) results are sorted
+        ``newlyListed`` and fetched sequentially, bypassing the page cache.
+        Listings at or below the mark are dropped and pagination stops on the
+        first page that reaches them, so a crawl shortly after the previous
+        one costs a single request.  An empty mark pages like a normal search.
+
+        Pass a dict as *crawl_status* to learn whether the crawl reached the
+        mark: ``crawl_status['reached_mark']`` is True once a page reaches
+        seen listings or the results run out, and stays False when the
+        crawl stops early (daily budget, page limit, an error).  Only then
+        is it safe to move the mark up; otherwise the listings between the
+        last page fetched and the old mark would never be fetched.  It is
+        always True for an empty mark.
+        """
+        incremental = newer_than is not None and newer_than.is_set
+        if crawl_status is None:
+            crawl_status = {}
+        crawl_status['reached_mark'] = not incremental
+        search_url = f"{self.base_url}/item_summary/search"
+        params = self._search_params(keywords, category_id, max_price, newer_than)
+
         total_from_api = 0
         current_page = 1
-        max_pages_to_fetch = 50 # Safety limit: Fetch max 50 pages (e.g., 50 * 200 = 10,000 items)
+        max_pages_to_fetch = MAX_PAGES_TO_FETCH
 
         while True:
             logger.info(f"Fetching page {current_page} (offset {params['offset']}) for keywords: '{keywords}'")
-            try:
-                response = requests.get(search_url, headers=self.headers, params=params)
-                response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-                data = response.json()
-                
-                # Get total count from the first page
-                if params['offset'] == 0:
-                    total_from_api = data.get("total", 0)
-                    logger.info(f"API reported total of {total_from_api} items for '{keywords}'")
-                    if total_from_api == 0:
-                        break # No items found at all
-                        
-                items_on_page = data.get("itemSummaries", [])
-                if not items_on_page:
-                    logger.info("No more items found on this page.")
-                    break # No more items returned
+            data = self._fetch_page(search_url, params)
+            
+            # Get total count from the first page
+            if params['offset'] == 0:
+                total_from_api = data.get("total", 0)
+                logger.info(f"API reported total of {total_from_api} items for '{keywords}'")
+                if total_from_api == 0:
+                    crawl_status['reached_mark'] = True
+                    yield [], 0
+                    break # No items found at all
+                if incremental:
+                    # Stop inside today's budget rather than on a quota error.
+                    max_pages_to_fetch = min(MAX_PAGES_TO_FETCH,
+                                             self._affordable_pages(keywords, total_from_api))
+                elif full_search:
+                    max_pages_to_fetch = self._affordable_pages(keywords, total_from_api)
                     
-                all_items.extend(items_on_page)
-                logger.info(f"Fetched {len(items_on_page)} items. Total accumulated: {len(all_items)}")
+            items_on_page = data.get("itemSummaries", [])
+            if not items_on_page:
+                logger.info("No more items found on this page.")
+                crawl_status['reached_mark'] = True
+                if params['offset'] == 0:
+                    yield [], total_from_api # Report the total even when nothing matched
+                break # No more items returned
+
+            if incremental:
+                # Newest first: once a page reaches seen listings, every later
+                # page is older still.  Otherwise keep paging sequentially.
+                unseen = [item for item in items_on_page if not newer_than.seen(item)]
+                if len(unseen) < len(items_on_page):
+                    crawl_status['reached_mark'] = True
+                yield unseen, total_from_api
+                if len(unseen) < len(items_on_page) or current_page >= max_pages_to_fetch:
+                    logger.info(f"Incremental search for '{keywords}' stopped at page {current_page} ({len(unseen)} new on last page)")
+                    break
+            else:
+                yield items_on_page, total_from_api
 
                 # Check if we should continue pagination
                 if not full_search or current_page >= max_pages_to_fetch:
                     logger.info(f"Stopping search for '{keywords}'. full_search={full_search}, page={current_page}, max_pages={max_pages_to_fetch}")
                     break 
 
-                # --- Get next offset --- 
-                next_url_str = data.get("next")
-                if next_url_str:
-                    try:
-                        # Parse the next URL to reliably get the offset
-                        parsed_url = urlparse(next_url_str)
-                        query_params = parse_qs(parsed_url.query)
-                        next_offset = int(query_params.get('offset', [None])[0])
-                        if next_offset is not None and next_offset > params['offset']:
-                            params['offset'] = next_offset
-                            current_page += 1
-                        else:
-                            logger.warning("Could not parse valid next offset or offset did not increase. Stopping pagination.")
-                            break
-                    except Exception as parse_err:
-                        logger.warning(f"Error parsing next URL '{next_url_str}': {parse_err}. Stopping pagination.")
+            # --- Parallel prefetch ---
+            # The first page reports ``total``, so every remaining offset
+            # is known up front and can be requested concurrently.
+            if self.page_concurrency > 1 and params['offset'] == 0 and not incremental:
+                for page_items in self._iter_remaining_pages(search_url, params, total_from_api, keywords,
+                                                             max_pages_to_fetch):
+                    yield page_items, total_from_api
+                break
+
+            # --- Get next offset --- 
+            next_url_str = data.get("next")
+            if next_url_str:
+                try:
+                    # Parse the next URL to reliably get the offset
+                    parsed_url = urlparse(next_url_str)
+                    query_params = parse_qs(parsed_url.query)
+                    next_offset = int(query_params.get('offset', [None])[0])
+                    if next_offset is not None and next_offset > params['offset']:
+                        params['offset'] = next_offset
+                        current_page += 1
+                    else:
+                        logger.warning("Could not parse valid next offset or offset did not increase. Stopping pagination.")
                         break
-                else:
-                    logger.info("No 'next' URL provided by API. Reached end of results.")
-                    break # No more pages indicated by API
-
-            except requests.exceptions.HTTPError as http_err:
-                logger.error(f"HTTP error during search for '{keywords}' (page {current_page}): {http_err}")
-                logger.error(f"Response Status: {http_err.response.status_code}, Response Text: {http_err.response.text}")
-                # Depending on the error, we might want to break or let tenacity handle retries
-                if http_err.response.status_code in [401, 403]: # Authentication errors - stop
-                     logger.error("Authentication error. Cannot continue search.")
-                     # Potentially try token refresh here if applicable and configured
-                     return [], 0 # Return failure
-                # For other errors (like 400, 500), let tenacity handle retries based on the decorator
-                # If retries fail, the exception will propagate up.
-                raise # Re-raise to trigger tenacity retry
-            except Exception as e:
-                logger.error(f"Error during search for '{keywords}' (page {current_page}): {str(e)}", exc_info=True)
-                return [], 0 # Return failure on unexpected errors
+                except Exception as parse_err:
+                    logger.warning(f"Error parsing next URL '{next_url_str}': {parse_err}. Stopping pagination.")
+                    break
+            else:
+                logger.info("No 'next' URL provided by API. Reached end of results.")
+                crawl_status['reached_mark'] = True
+                break # No more pages indicated by API
 
-        logger.info(f"Search complete for '{keywords}'. Total items retrieved: {len(all_items)}. API reported total: {total_from_api}.")
-        return all_items, total_from_api
+    def _spend_call(self):
+        """Wait for the shared rate limit; raises QuotaExceededError when spent."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def _affordable_pages(self, keywords: str, total: int) -> int:
+        """Page limit for a search of *total* results within today's budget.
+
+        The first page is already paid for.  Page-cache hits are free, so
+        this is a conservative estimate.
+        """
+        needed = estimate_page_calls(total)
+        if self.rate_limiter is None:
+            return needed
+        try:
+            remaining = self.rate_limiter.daily_remaining()
+        except Exception as exc:  # noqa: BLE001 – never block a search on the report
+            logger.warning("Could not read the API budget: %s", exc)
+            return needed
+        if needed - 1 > remaining:
+            logger.warning(
+                "Search for '%s' may need %d more calls but only %d are left today; "
+                "fetching at most %d pages", keywords, needed - 1, remaining, remaining + 1,
+            )
+            return remaining + 1
+        return needed
+
+    def search_total(self, keywords: str, category_id: int = None, max_price: float = None) -> int:
+        """Return the ``total`` the API reports for a search (one page request, cacheable)."""
+        data = self._fetch_page(
+            f"{self.base_url}/item_summary/search",
+            self._search_params(keywords, category_id, max_price),
+        )
+        return int(data.get("total", 0))
+
+    def _fetch_page(self, search_url: str, params: dict) -> dict:
+        """GET one page of search results and return the decoded JSON.
+
+        Served from ``self.page_cache`` when a fresh copy is available;
+        successful responses are written back to it.
+        """
+        cache_key = None
+        # Newest-first pages change minute to minute; never serve them cached.
+        if self.page_cache is not None and "sort" not in params:
+            cache_key = self.page_cache.make_key(
+                params["q"],
+                params.get("category_ids"),
+                params.get("filter"),
+                params["offset"],
+                self.headers["X-EBAY-C-MARKETPLACE-ID"],
+                endpoint=search_url,
+            )
+            cached = self.page_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Search page cache hit for '%s' offset %s", params["q"], params["offset"])
+                return cached
+
+        self._spend_call()
+        response = self.session.get(search_url, headers=self.headers, params=params, timeout=self.timeout)
+        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        data = response.json()
+
+        if cache_key is not None:
+            self.page_cache.set(cache_key, data)
+        return data
+
+    def _iter_remaining_pages(self, search_url: str, params: dict, total: int, keywords: str,
+                              max_pages: int | None = None):
+        """Fetch every page after the first concurrently, yielding each page's items.
+
+        Offsets are derived from the ``total`` reported on the first page and
+        capped at *max_pages*.  Pages are yielded in offset order so
+        the result does not depend on which request finishes first.  HTTP
+        errors propagate to the caller exactly as in sequential mode.
+        Closing the generator early stops requesting further pages.
+        """
+        page_size = params['limit']
+        end = min(total, (max_pages or MAX_PAGES_TO_FETCH) * page_size)
+        offsets = list(range(params['offset'] + page_size, end, page_size))
+        if not offsets:
+            return
+
+        logger.info(f"Prefetching {len(offsets)} more pages for '{keywords}' with {self.page_concurrency} workers")
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.page_concurrency, len(offsets)),
+            thread_name_prefix="ebay-page",
+        )
+        try:
+            futures = [executor.submit(self._fetch_page, search_url, dict(params, offset=offset))
+                       for offset in offsets]
+            for offset, future in zip(offsets, futures):
+                items_on_page = future.result().get("itemSummaries", [])
+                if not items_on_page:
+                    logger.info(f"No items returned at offset {offset}. Reached end of results.")
+                    break
+                yield items_on_page
+        finally:
+            # Stopping early (end of results, an error, or the caller closing
+            # the generator) cancels the pages not requested yet; requests
+            # already in flight are completed and discarded.
+            executor.shutdown(wait=True, cancel_futures=True)
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @_retry_with_backoff
     def get_item_details(self, item_id: str) -> dict:
         """
         Get detailed information about a specific item.
@@ -380,10 +712,12 @@ class EBayAPI:
         Returns:
             Dictionary containing detailed item information
         """
+        self._spend_call()
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/item/{item_id}",
-                headers=self.headers
+                headers=self.headers,
+                timeout=self.timeout,
             )
             response.raise_for_status()
             return response.json()
@@ -402,10 +736,12 @@ class EBayAPI:
         Returns:
             Dictionary containing item specifications
         """
+        self._spend_call()
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/item/{item_id}/get_item_aspects",
-                headers=self.headers
+                headers=self.headers,
+                timeout=self.timeout,
             )
             response.raise_for_status()
             return response.json()
@@ -0,0 +1,401 @@
+"""
+asyncio eBay client for the Homelab Deal Finder.
+
+``AsyncEBayAPI`` has the same surface as the blocking ``EBayAPI``
+(``get_oauth_token``, ``search_items``, ``get_item_details``,
+``get_item_specifications``) but its methods are coroutines, so one
+process can keep hundreds of page and item-detail requests in flight
+without a thread per request.  All requests share one aiohttp connection
+pool; a semaphore caps how many are outstanding at once.
+
+It uses the same token file, search page cache, API call budget and retry
+policy as ``EBayAPI``, so both clients can run side by side.  The blocking
+parts of those (file locks, SQLite) run in the default thread pool.
+
+Use it as an async context manager, or call ``close()`` when done::
+
+    async with AsyncEBayAPI(app_id, cert_id, sandbox=False) as api:
+        await api.get_oauth_token()
+        details = await asyncio.gather(*(api.get_item_details(i) for i in ids))
+"""
+import asyncio
+import logging
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from functools import wraps
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+
+from src.rate_limiter import QuotaExceededError
+from src.ebay_api import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    MAX_PAGES_TO_FETCH,
+    TOKEN_MIN_VALIDITY,
+    EBayAPI,
+    _client_credentials_request,
+    _retry_policy,
+    _token_store_for,
+    _token_url,
+    estimate_page_calls,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 32  # requests in flight per client
+DEFAULT_POOL_SIZE = 100  # open connections per client
+
+
+def _async_retry_with_backoff(func):
+    """Retry coroutine *func* with the same tenacity policy as ``EBayAPI``."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        from tenacity import AsyncRetrying
+
+        return await AsyncRetrying(**_retry_policy())(func, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncEBayAPI:
+    """asyncio counterpart of ``EBayAPI``."""
+
+    def __init__(self, app_id, cert_id, sandbox=True, token_file: str | None = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 page_cache=None, rate_limiter=None):
+        """Initialize the client; see ``EBayAPI`` for the shared arguments.
+
+        Args:
+            concurrency: Maximum number of requests in flight at once,
+                across all coroutines using this client.
+            pool_size: Maximum number of open connections in the client's
+                connection pool.
+        """
+        if not app_id or not cert_id:
+            raise ValueError("eBay API credentials are required")
+
+        self.app_id = app_id
+        self.cert_id = cert_id
+        self.sandbox = sandbox
+        self.concurrency = max(int(concurrency), 1)
+        self.pool_size = max(int(pool_size), self.concurrency)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.page_cache = page_cache
+        self.rate_limiter = rate_limiter
+        self.base_url = (
+            "https://api.sandbox.ebay.com/buy/browse/v1"
+            if sandbox
+            else "https://api.ebay.com/buy/browse/v1"
+        )
+        self.token_url = _token_url(sandbox)
+
+        self._token_store = _token_store_for(token_file)
+        self.token_file: Path = self._token_store.path
+        self.token = None
+        self.token_expiry = None
+        self.headers = {
+            "Content-Type": "application/json",
+            "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
+        }
+        self._load_token()
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._token_lock = asyncio.Lock()
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it inside the running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+                headers={"Accept-Encoding": "gzip, deflate"},
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+        return self._session
+
+    async def close(self):
+        """Release pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ------------------------------------------------------------------
+    # OAuth token
+    # ------------------------------------------------------------------
+    def _load_token(self):
+        """Adopt the token from the shared file if it has not expired."""
+        token_data = self._token_store.read()
+        if token_data is None:
+            return
+        expiry = datetime.fromisoformat(token_data['expiry'])
+        if expiry > datetime.now():
+            self._set_token(token_data['access_token'], expiry)
+
+    def _set_token(self, token: str, expiry: datetime):
+        self.token = token
+        self.token_expiry = expiry
+        self.headers["Authorization"] = f"Bearer {token}"
+
+    def _token_valid_for(self, seconds: float) -> bool:
+        return bool(
+            self.token and self.token_expiry
+            and (self.token_expiry - datetime.now()).total_seconds() > seconds
+        )
+
+    async def get_oauth_token(self, min_validity: float = TOKEN_MIN_VALIDITY):
+        """Get OAuth token using client-credentials flow.
+
+        Same protocol as ``EBayAPI.get_oauth_token``: one coroutine per
+        client and one process at a time refreshes, the others adopt the
+        token it stored.
+        """
+        if self._token_valid_for(min_validity):
+            return True
+
+        async with self._token_lock:
+            # The file lock blocks, so it is taken and released in a worker thread.
+            file_lock = ExitStack()
+            await asyncio.to_thread(file_lock.enter_context, self._token_store.locked())
+            try:
+                await asyncio.to_thread(self._load_token)
+                if self._token_valid_for(min_validity):
+                    return True
+                token_data = await self._request_token()
+                if token_data is None:
+                    return False
+                expiry = datetime.now() + timedelta(seconds=token_data.get("expires_in", 7200))
+                await asyncio.to_thread(self._token_store.write, {
+                    "access_token": token_data["access_token"],
+                    "expiry": expiry.isoformat(),
+                })
+                self._set_token(token_data["access_token"], expiry)
+            finally:
+                await asyncio.to_thread(file_lock.close)
+
+        logger.info("Successfully obtained access token")
+        return True
+
+    async def _request_token(self) -> dict | None:
+        """Call the identity endpoint; return the JSON body or None on failure."""
+        headers, data = _client_credentials_request(self.app_id, self.cert_id)
+        try:
+            async with self._get_session().post(self.token_url, headers=headers, data=data) as response:
+                if response.status >= 400:
+                    logger.error("Error getting OAuth token: HTTP %s", response.status)
+                    logger.error("Response text: %s", await response.text())
+                    return None
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:  # pragma: no cover – network errors
+            logger.error("Error getting OAuth token: %s", e)
+            return None
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+    async def _spend_call(self):
+        """Wait for the shared rate limit; raises QuotaExceededError when spent."""
+        if self.rate_limiter is None:
+            return
+        while True:
+            wait = await asyncio.to_thread(self.rate_limiter.try_acquire)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _get_json(self, url: str, params: dict | None = None) -> dict:
+        """GET *url* within the concurrency limit and return the decoded JSON.
+
+        Raises ``aiohttp.ClientResponseError`` for 4xx/5xx responses.
+        """
+        async with self._semaphore:
+            await self._spend_call()
+            async with self._get_session().get(url, headers=self.headers, params=params) as response:
+                if response.status >= 400:
+                    logger.error("HTTP %s from %s: %s", response.status, url, await response.text())
+                response.raise_for_status()
+                return await response.json()
+
+    async def _fetch_page(self, search_url: str, params: dict) -> dict:
+        """Fetch one search page, through the page cache like ``EBayAPI``."""
+        cache_key = None
+        if self.page_cache is not None and "sort" not in params:
+            cache_key = self.page_cache.make_key(
+                params["q"],
+                params.get("category_ids"),
+                params.get("filter"),
+                params["offset"],
+                self.headers["X-EBAY-C-MARKETPLACE-ID"],
+                endpoint=search_url,
+            )
+            cached = await asyncio.to_thread(self.page_cache.get, cache_key)
+            if cached is not None:
+                logger.debug("Search page cache hit for '%s' offset %s", params["q"], params["offset"])
+                return cached
+
+        data = await self._get_json(search_url, params)
+        if cache_key is not None:
+            await asyncio.to_thread(self.page_cache.set, cache_key, data)
+        return data
+
+    async def _affordable_pages(self, keywords: str, total: int) -> int:
+        """Page limit for a search within today's budget (see ``EBayAPI``)."""
+        needed = estimate_page_calls(total)
+        if self.rate_limiter is None:
+            return needed
+        try:
+            remaining = await asyncio.to_thread(self.rate_limiter.daily_remaining)
+        except Exception as exc:  # noqa: BLE001 – never block a search on the report
+            logger.warning("Could not read the API budget: %s", exc)
+            return needed
+        if needed - 1 > remaining:
+            logger.warning(
+                "Search for '%s' may need %d more calls but only %d are left today; "
+                "fetching at most %d pages", keywords, needed - 1, remaining, remaining + 1,
+            )
+            return remaining + 1
+        return needed
+
+    @_async_retry_with_backoff
+    async def search_items(self, keywords: str, category_id: int = None, max_price: float = None,
+                           full_search: bool = False, newer_than=None, crawl_status: dict = None) -> tuple:
+        """Search for items on eBay; same arguments and result as ``EBayAPI.search_items``.
+
+        With *full_search* every page after the first is requested at once
+        (within the concurrency limit) and the items are returned in offset
+        order.  Returns ``([], 0)`` on failure; when the daily call budget
+        runs out mid-search the pages fetched so far are returned.
+        *crawl_status* reports whether an incremental crawl reached its mark.
+        """
+        if crawl_status is None:
+            crawl_status = {}
+        crawl_status['reached_mark'] = False
+        if not self.token:
+            logger.error("Authentication token is not available")
+            return [], 0
+
+        try:
+            all_items, total_from_api = await self._search(
+                keywords, category_id, max_price, full_search, newer_than, crawl_status
+            )
+        except aiohttp.ClientResponseError as http_err:
+            logger.error(f"HTTP error during search for '{keywords}': {http_err}")
+            if http_err.status in [401, 403]:  # Authentication errors - stop
+                logger.error("Authentication error. Cannot continue search.")
+                return [], 0
+            raise  # Re-raise to trigger tenacity retry
+        except QuotaExceededError as quota_err:
+            logger.warning(f"Search for '{keywords}' stopped before the first page: {quota_err}")
+            return [], 0
+        except Exception as e:
+            logger.error(f"Error during search for '{keywords}': {str(e)}", exc_info=True)
+            return [], 0
+
+        logger.info(f"Search complete for '{keywords}'. Total items retrieved: {len(all_items)}. API reported total: {total_from_api}.")
+        return all_items, total_from_api
+
+    async def _search(self, keywords, category_id, max_price, full_search, newer_than,
+                      crawl_status) -> tuple:
+        incremental = newer_than is not None and newer_than.is_set
+        crawl_status['reached_mark'] = not incremental
+        search_url = f"{self.base_url}/item_summary/search"
+        params = EBayAPI._search_params(keywords, category_id, max_price, newer_than)
+
+        data = await self._fetch_page(search_url, params)
+        total_from_api = data.get("total", 0)
+        items = data.get("itemSummaries", [])
+        if not total_from_api or not items:
+            crawl_status['reached_mark'] = True
+            return [], total_from_api
+        if incremental:
+            max_pages = min(MAX_PAGES_TO_FETCH, await self._affordable_pages(keywords, total_from_api))
+            all_items, crawl_status['reached_mark'] = await self._search_newer(
+                search_url, params, data, newer_than, max_pages
+            )
+            return all_items, total_from_api
+        if not full_search:
+            return items, total_from_api
+
+        max_pages = await self._affordable_pages(keywords, total_from_api)
+        end = min(total_from_api, max_pages * params["limit"])
+        offsets = range(params["limit"], end, params["limit"])
+        logger.info(f"Fetching {len(offsets)} more pages for '{keywords}' concurrently")
+        pages = await asyncio.gather(
+            *(self._fetch_page(search_url, dict(params, offset=offset)) for offset in offsets),
+            return_exceptions=True,
+        )
+        all_items = list(items)
+        for page in pages:
+            if isinstance(page, QuotaExceededError):
+                # Pages already fetched were paid for; keep them.
+                logger.warning(f"Search for '{keywords}' stopped after {len(all_items)} items: {page}")
+                break
+            if isinstance(page, BaseException):
+                raise page
+            page_items = page.get("itemSummaries", [])
+            if not page_items:
+                break  # end of results; later pages are empty too
+            all_items.extend(page_items)
+        return all_items, total_from_api
+
+    async def _search_newer(self, search_url: str, params: dict, data: dict, newer_than,
+                            max_pages: int) -> tuple:
+        """Follow newest-first pages until one reaches *newer_than*.
+
+        Returns ``(unseen items, reached)``; *reached* is False when the
+        crawl stopped before the mark (see ``EBayAPI.iter_search_pages``).
+        """
+        all_items = []
+        for page_number in range(1, max_pages + 1):
+            items = data.get("itemSummaries", [])
+            unseen = [item for item in items if not newer_than.seen(item)]
+            all_items.extend(unseen)
+            if not items or len(unseen) < len(items):
+                return all_items, True
+            next_url = data.get("next")
+            if not next_url:
+                return all_items, True
+            if page_number >= max_pages:
+                break
+            try:
+                next_offset = int(parse_qs(urlparse(next_url).query)["offset"][0])
+            except (KeyError, IndexError, ValueError):
+                logger.warning(f"Could not parse next URL '{next_url}'. Stopping pagination.")
+                break
+            if next_offset <= params["offset"]:
+                break
+            params = dict(params, offset=next_offset)
+            try:
+                data = await self._fetch_page(search_url, params)
+            except QuotaExceededError as quota_err:
+                logger.warning(f"Incremental search stopped after {len(all_items)} items: {quota_err}")
+                break
+        return all_items, False
+
+    @_async_retry_with_backoff
+    async def get_item_details(self, item_id: str) -> dict:
+        """Get detailed information about a specific item."""
+        try:
+            return await self._get_json(f"{self.base_url}/item/{item_id}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error getting item details: {str(e)}")
+            raise
+
+    async def get_item_specifications(self, item_id: str) -> dict:
+        """Get technical specifications for an item."""
+        try:
+            return await self._get_json(f"{self.base_url}/item/{item_id}/get_item_aspects")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error getting item specifications: {str(e)}")
+            raise
@@ -1,25 +1,82 @@
 import logging
 import re
-from typing import Dict, Set
+from typing import Dict, Optional, Set, Tuple
 
-from src.title_parser import parse_title
+from src.cpu_cache import CpuResolutionCache
+from src.data_loader import SubstringIndex
+from src.listing import ListingRecord
+from src.title_parser import ParsedTitle, parse_title
 from src.utils import is_precise_substring_match
 
 logger = logging.getLogger(__name__)
 
 generic_terms = {'CELERON', 'PENTIUM', 'ATOM', 'XEON', 'RYZEN', 'ATHLON'}
 
+
+def _substring_lookup(cpu_model_str: str, data: Dict, index: Optional[SubstringIndex]):
+    """Return the first entry of *data* whose key precisely contains the CPU."""
+    if index is None and hasattr(data, 'find'):
+        index = data  # a MappedTable is its own index; iterating it decodes every key
+    if index is not None:
+        return index.find(cpu_model_str)
+    for key, val in data.items():
+        if is_precise_substring_match(cpu_model_str, key):
+            return val
+    return None
+
+
+def resolve_cpu(
+    cpu_model_str: str,
+    passmark_scores: Dict[str, int],
+    idle_power_data: Dict[str, float],
+    passmark_index: Optional[SubstringIndex] = None,
+    idle_power_index: Optional[SubstringIndex] = None,
+) -> Tuple[Optional[int], Optional[float]]:
+    """Return (PassMark score, idle watts) for a parsed CPU model string."""
+    performance_score = passmark_scores.get(cpu_model_str)
+
+    # Special handling for N-series
+    if not performance_score and cpu_model_str.startswith('N'):
+        performance_score = passmark_scores.get(f'INTEL {cpu_model_str}')
+
+    # Fallback substring search
+    if not performance_score:
+        performance_score = _substring_lookup(cpu_model_str, passmark_scores, passmark_index)
+
+    # Idle power look-up
+    idle_watts = idle_power_data.get(cpu_model_str) or idle_power_data.get(
+        f'INTEL {cpu_model_str}'
+    )
+    if not idle_watts:
+        idle_watts = _substring_lookup(cpu_model_str, idle_power_data, idle_power_index)
+
+    return performance_score, idle_watts
+
+
 def enrich_item(
     item: Dict,
     passmark_scores: Dict[str, int],
     idle_power_data: Dict[str, float],
     cpus_not_found_in_passmark: Set[str],
     cpus_not_found_in_idle: Set[str],
-) -> Dict:
-    """Return an enriched listing dict ready for JSON serialisation."""
-
-    title = item.get('title', '')
-    parsed = parse_title(title)
+    *,
+    passmark_index: Optional[SubstringIndex] = None,
+    idle_power_index: Optional[SubstringIndex] = None,
+    resolution_cache: Optional[CpuResolutionCache] = None,
+    parsed: Optional[ParsedTitle] = None,
+) -> ListingRecord:
+    """Return an enriched listing record (``to_dict()`` gives the JSON shape).
+
+    ``passmark_index``/``idle_power_index`` speed up the substring fallback
+    when given; they must be built from the matching mapping.
+    ``resolution_cache`` memoises CPU look-ups, including misses; it must be
+    versioned against the same reference data.
+    ``parsed`` is the pre-computed ``parse_title`` result for the item's
+    title, e.g. from ``parse_titles`` over a whole page.
+    """
+
+    if parsed is None:
+        parsed = parse_title(item.get('title', ''))
     cpu_model_str = parsed['cpu_model']
     is_generic_intel_core_type = parsed['is_generic_intel_core_type']
     generic_intel_core_type = parsed['generic_intel_core_type']
@@ -37,31 +94,21 @@ def enrich_item(
     )
 
     if can_score:
-        performance_score = passmark_scores.get(cpu_model_str)
-
-        # Special handling for N-series
-        if not performance_score and cpu_model_str.startswith('N'):
-            performance_score = passmark_scores.get(f'INTEL {cpu_model_str}')
-
-        # Fallback substring search
-        if not performance_score:
-            for key, val in passmark_scores.items():
-                if is_precise_substring_match(cpu_model_str, key):
-                    performance_score = val
-                    break
+        resolved = resolution_cache.get(cpu_model_str) if resolution_cache is not None else None
+        if resolved is None:
+            resolved = resolve_cpu(
+                cpu_model_str,
+                passmark_scores,
+                idle_power_data,
+                passmark_index,
+                idle_power_index,
+            )
+            if resolution_cache is not None:
+                resolution_cache.put(cpu_model_str, *resolved)
+        performance_score, idle_watts = resolved
 
         if not performance_score:
             cpus_not_found_in_passmark.add(cpu_model_str)
-
-        # Idle power look-up
-        idle_watts = idle_power_data.get(cpu_model_str) or idle_power_data.get(
-            f'INTEL {cpu_model_str}'
-        )
-        if not idle_watts:
-            for key, val in idle_power_data.items():
-                if is_precise_substring_match(cpu_model_str, key):
-                    idle_watts = val
-                    break
         if not idle_watts:
             cpus_not_found_in_idle.add(cpu_model_str)
 
@@ -94,19 +141,19 @@ def enrich_item(
         )
     )
 
-    return {
-        'title': item.get('title'),
-        'price': price_val,
-        'cpu_type': cpu_type_display,
-        'cpu_model': cpu_model_str,
-        'ram': ram,
-        'storage': storage,
-        'performance': performance_score,
-        'free_shipping': free_shipping,
-        'tco': None,
-        'performance_per_dollar': None,
-        'item_url': item.get('itemWebUrl'),
-        'image_url': item.get('image', {}).get('imageUrl'),
-        'cpu_idle_power': idle_watts,
-        'itemId': item.get('itemId'),
-    } 
\ No newline at end of file
+    return ListingRecord(
+        title=item.get('title'),
+        price=price_val,
+        cpu_type=cpu_type_display,
+        cpu_model=cpu_model_str,
+        ram=ram,
+        storage=storage,
+        performance=performance_score,
+        free_shipping=free_shipping,
+        tco=None,
+        performance_per_dollar=None,
+        item_url=item.get('itemWebUrl'),
+        image_url=item.get('image', {}).get('imageUrl'),
+        cpu_idle_power=idle_watts,
+        itemId=item.get('itemId'),
+    ) 
\ No newline at end of file
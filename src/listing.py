@@ -0,0 +1,103 @@
+"""Compact in-memory representation of an enriched listing.
+
+A full search over several keywords can hold tens of thousands of listings
+per worker.  ``ListingRecord`` stores the fields in ``__slots__`` instead of
+a per-item dict and interns the highly repetitive spec strings, so repeated
+values such as ``'I5-8500T'`` or ``'8GB'`` exist once per process.
+
+Records support the read/write mapping access used throughout the code base
+(``rec['price']``, ``rec.get('tco')``, ``rec['tco'] = ...``) and are
+converted to plain dicts only when serialised (``to_dict``/``json_default``).
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Iterator, Mapping
+
+# Field order matches the JSON shape returned by /search.
+FIELDS = (
+    'title',
+    'price',
+    'cpu_type',
+    'cpu_model',
+    'ram',
+    'storage',
+    'performance',
+    'free_shipping',
+    'tco',
+    'performance_per_dollar',
+    'item_url',
+    'image_url',
+    'cpu_idle_power',
+    'itemId',
+)
+_FIELD_SET = frozenset(FIELDS)
+_INTERNED = ('cpu_type', 'cpu_model', 'ram', 'storage')
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ListingRecord:
+    """Slot-based enriched listing with dict-style access."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields: Any):
+        unknown = fields.keys() - _FIELD_SET
+        if unknown:
+            raise TypeError(f"Unknown listing fields: {', '.join(sorted(unknown))}")
+        for name in FIELDS:
+            value = fields.get(name)
+            setattr(self, name, _intern(value) if name in _INTERNED else value)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ListingRecord":
+        """Build a record from a listing dict, ignoring unknown keys."""
+        return cls(**{name: data.get(name) for name in FIELDS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the listing in its JSON shape."""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    # --- Mapping-style access ------------------------------------------
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, _intern(value) if key in _INTERNED else value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in _FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return FIELDS
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ListingRecord):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ListingRecord(itemId={self.itemId!r}, cpu_model={self.cpu_model!r}, price={self.price!r})"
+
+
+def json_default(obj: Any) -> Any:
+    """``json.dumps(default=...)`` hook that serialises listing records."""
+    if isinstance(obj, ListingRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
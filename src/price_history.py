@@ -0,0 +1,126 @@
+"""Price-history tracking and change detection for the daily alert.
+
+Each alert run hands its listings to ``detect_changes``, which compares them
+with the last known price per item (``price_state``) and classifies them as
+new, price-dropped, unchanged or gone.  Only changes are appended to the
+``price_history`` time series, so an unchanged listing costs no write and
+the work per run is bounded by the number of listings currently on sale,
+not by the length of the history.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from src.database import PriceHistory, PriceState
+
+
+@dataclass
+class ChangeSet:
+    """Outcome of comparing one run's listings with the stored prices.
+
+    Price increases are recorded in the history but reported as
+    ``unchanged`` since they never warrant an alert.
+    """
+
+    new: List[Any] = field(default_factory=list)
+    price_dropped: List[Tuple[Any, float]] = field(default_factory=list)  # (listing, previous price)
+    unchanged: List[Any] = field(default_factory=list)
+    gone: List[str] = field(default_factory=list)  # item ids
+
+    @property
+    def alertable(self) -> List[Any]:
+        """Listings worth alerting on: new ones and price drops."""
+        return self.new + [listing for listing, _ in self.price_dropped]
+
+
+_CHUNK = 500  # bound on SQL variables per IN (...) lookup
+
+
+def detect_changes(
+    listings: Iterable[Any],
+    engine: Engine,
+    observed_at: Optional[datetime] = None,
+    mark_gone: bool = True,
+) -> ChangeSet:
+    """Classify *listings* against the stored state and record the changes.
+
+    Listings without an ``itemId`` or price are ignored.  Tracked listings
+    missing from *listings* are marked gone.  A gone listing that shows up
+    again is compared with its last known price, so dropping out of the
+    search results for a day does not make it "new".  Pass
+    ``mark_gone=False`` when *listings* is only a delta (incremental crawl),
+    since absence then says nothing.  Everything is written in one
+    transaction.
+    """
+    now = observed_at or datetime.now(timezone.utc)
+    current = {}
+    for listing in listings:
+        item_id = listing.get('itemId')
+        if item_id and listing.get('price') is not None and item_id not in current:
+            current[item_id] = listing
+
+    state = PriceState.__table__
+    changes = ChangeSet()
+    history_rows, state_rows = [], []
+
+    with engine.begin() as conn:
+        active = dict(conn.execute(select(state.c.item_id, state.c.price).where(state.c.active)).all())
+        known = dict(active)
+        returning = [item_id for item_id in current if item_id not in active]
+        for i in range(0, len(returning), _CHUNK):
+            known.update(conn.execute(
+                select(state.c.item_id, state.c.price).where(state.c.item_id.in_(returning[i:i + _CHUNK]))
+            ).all())
+
+        for item_id, listing in current.items():
+            price = float(listing['price'])
+            previous = known.get(item_id)
+            if previous is None:
+                changes.new.append(listing)
+            elif price < previous:
+                changes.price_dropped.append((listing, previous))
+            else:
+                changes.unchanged.append(listing)
+            if previous != price or item_id not in active:
+                history_rows.append({'item_id': item_id, 'observed_at': now, 'price': price})
+                state_rows.append({'item_id': item_id, 'observed_at': now, 'price': price, 'active': True})
+
+        if mark_gone:
+            changes.gone = [item_id for item_id in active if item_id not in current]
+        for item_id in changes.gone:
+            history_rows.append({'item_id': item_id, 'observed_at': now, 'price': None})
+            state_rows.append({'item_id': item_id, 'observed_at': now, 'price': active[item_id], 'active': False})
+
+        if history_rows:
+            conn.execute(PriceHistory.__table__.insert(), history_rows)
+            stmt = sqlite_insert(state)
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[state.c.item_id],
+                    set_={name: stmt.excluded[name] for name in ('price', 'observed_at', 'active')},
+                ),
+                state_rows,
+            )
+
+    return changes
+
+
+def price_history(engine: Engine, item_id: str) -> List[Tuple[datetime, Optional[float]]]:
+    """Return ``(observed_at, price)`` for *item_id*, oldest first (None = gone)."""
+    table = PriceHistory.__table__
+    with engine.connect() as conn:
+        return [
+            (row.observed_at, row.price)
+            for row in conn.execute(
+                select(table.c.observed_at, table.c.price)
+                .where(table.c.item_id == item_id)
+                .order_by(table.c.observed_at)
+            )
+        ]
@@ -0,0 +1,189 @@
+"""eBay API call budget shared by every worker and the alert worker.
+
+The Browse API enforces a daily call quota per application, and a couple
+of ``full_search`` runs can use a large share of it.  ``ApiRateLimiter``
+keeps a token bucket (per-second rate) and a per-day call counter in a
+small SQLite file.  Every process opens the same file and updates both in
+one ``BEGIN IMMEDIATE`` transaction, so the budgets hold across processes
+without any coordination beyond SQLite's own locking.
+
+Days are counted in UTC.  Calls answered from the search page cache are
+free and never reach the limiter.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PER_SECOND = 5.0
+DEFAULT_PER_DAY = 5000  # default Browse API application quota
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_usage (
+    day TEXT PRIMARY KEY,
+    calls INTEGER NOT NULL
+);
+"""
+
+
+class QuotaExceededError(RuntimeError):
+    """The daily API call budget is used up."""
+
+
+def _utc_day(now: float) -> str:
+    return datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+
+
+class ApiRateLimiter:
+    """Cross-process token bucket plus daily call budget backed by SQLite."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        per_second: float = DEFAULT_PER_SECOND,
+        per_day: int = DEFAULT_PER_DAY,
+        burst: float | None = None,
+    ):
+        self.path = Path(path)
+        self.per_second = float(per_second)
+        self.per_day = int(per_day)
+        self.burst = float(burst) if burst is not None else max(self.per_second, 1.0)
+        if self.per_second <= 0 or self.per_day <= 0 or self.burst < 1:
+            raise ValueError("per_second, per_day and burst must be positive (burst >= 1)")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.executescript(_SCHEMA)  # manages its own transaction
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "ApiRateLimiter | None":
+        """Build a limiter from ``config['ebay']['rate_limit']``.
+
+        Returns ``None`` when the section is missing or ``enabled`` is false.
+        """
+        limit_cfg = (config.get("ebay") or {}).get("rate_limit")
+        if not limit_cfg or not limit_cfg.get("enabled", True):
+            return None
+        try:
+            return cls(
+                limit_cfg.get("path", "data/rate_limit.db"),
+                per_second=limit_cfg.get("per_second", DEFAULT_PER_SECOND),
+                per_day=limit_cfg.get("per_day", DEFAULT_PER_DAY),
+                burst=limit_cfg.get("burst"),
+            )
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("API rate limiter disabled: %s", exc)
+            return None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so the
+        # read-modify-write below is atomic across processes.
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _state(self, conn: sqlite3.Connection, now: float) -> tuple[float, int]:
+        """Return (tokens available now, calls made today)."""
+        row = conn.execute("SELECT tokens, updated_at FROM rate_bucket WHERE name = 'ebay'").fetchone()
+        if row is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, row[0] + max(now - row[1], 0.0) * self.per_second)
+        used = conn.execute("SELECT calls FROM daily_usage WHERE day = ?", (_utc_day(now),)).fetchone()
+        return tokens, used[0] if used else 0
+
+    def _try_acquire(self, cost: int) -> float:
+        """Spend *cost* calls if possible; return 0, or seconds to wait first."""
+        now = time.time()
+        with self._connect() as conn:
+            tokens, used = self._state(conn, now)
+            if used + cost > self.per_day:
+                raise QuotaExceededError(
+                    f"Daily eBay API budget exhausted ({used}/{self.per_day} calls used today)"
+                )
+            if tokens < cost:
+                return (cost - tokens) / self.per_second
+            day = _utc_day(now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_bucket (name, tokens, updated_at) VALUES ('ebay', ?, ?)",
+                (tokens - cost, now),
+            )
+            conn.execute(
+                "INSERT INTO daily_usage (day, calls) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET calls = calls + excluded.calls",
+                (day, cost),
+            )
+            conn.execute("DELETE FROM daily_usage WHERE day < ?", (day,))
+        return 0.0
+
+    def acquire(self, cost: int = 1) -> None:
+        """Block until *cost* calls fit the per-second rate, then record them.
+
+        Raises QuotaExceededError when they would exceed today's budget.  If
+        the database cannot be used the call is let through (and logged).
+        """
+        while True:
+            wait = self.try_acquire(cost)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self, cost: int = 1) -> float:
+        """Record *cost* calls if the rate allows; else return seconds to wait.
+
+        The non-blocking half of ``acquire``, for callers that must not
+        sleep in the current thread (the asyncio client).
+        """
+        if cost > self.burst:
+            raise ValueError(f"cost {cost} exceeds the bucket size {self.burst}")
+        try:
+            return self._try_acquire(cost)
+        except sqlite3.Error as exc:
+            logger.warning("Rate limiter unavailable, not throttling: %s", exc)
+            return 0.0
+
+    def remaining(self) -> dict[str, Any]:
+        """Report today's usage and what is left of both budgets."""
+        now = time.time()
+        with self._connect() as conn:
+            tokens, used = self._state(conn, now)
+        midnight = datetime.fromtimestamp(now, timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=1)
+        return {
+            "day": _utc_day(now),
+            "calls_today": used,
+            "daily_limit": self.per_day,
+            "daily_remaining": max(self.per_day - used, 0),
+            "per_second": self.per_second,
+            "burst_available": round(tokens, 2),
+            "resets_at": midnight.isoformat(),
+        }
+
+    def daily_remaining(self) -> int:
+        return self.remaining()["daily_remaining"]
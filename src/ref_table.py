@@ -0,0 +1,264 @@
+"""Read-only reference tables shared between processes via ``mmap``.
+
+Every gunicorn worker and the alert worker used to build its own dict and
+trigram index over ``passmark.txt``/``idlepower.txt``.  ``MappedTable``
+serves both from one binary file instead: each process maps the file
+read-only, so the pages live once in the OS page cache however many
+workers there are, and opening a table costs no parsing or rebuilding.
+
+File layout (native byte order, sections 8-byte aligned)::
+
+    header      magic, counts, value kind, source size/mtime, blob sizes
+    values      n_keys x int64 | float64, in source order
+    key_offs    (n_keys + 1) x uint32 into the key blob
+    sorted      n_keys x uint32 ranks, ordered by key bytes (exact lookup)
+    gram_offs   (n_grams + 1) x uint32 into the gram blob, grams sorted
+    post_offs   (n_grams + 1) x uint32 into postings
+    postings    n_postings x uint32 key ranks, ascending per gram
+    key blob    UTF-8 keys
+    gram blob   UTF-8 trigrams
+
+``find`` has the same first-match-in-source-order semantics as
+``data_loader.SubstringIndex``.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from src.utils import is_precise_substring_match
+
+MAGIC = b'HLREFTB1'
+_HEADER = struct.Struct('=8sIIIIqqII')
+_INT, _FLOAT = 0, 1
+GRAM = 3
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _sections(n_keys: int, n_grams: int, n_postings: int, key_blob: int) -> dict[str, int]:
+    """Byte offset of every section for the given counts."""
+    layout = {}
+    pos = _align(_HEADER.size)
+    for name, size in (
+        ('values', 8 * n_keys),
+        ('key_offs', 4 * (n_keys + 1)),
+        ('sorted', 4 * n_keys),
+        ('gram_offs', 4 * (n_grams + 1)),
+        ('post_offs', 4 * (n_grams + 1)),
+        ('postings', 4 * n_postings),
+        ('key_blob', key_blob),
+        ('gram_blob', 0),
+    ):
+        layout[name] = pos
+        pos = _align(pos + size)
+    return layout
+
+
+def write_table(
+    path: Path,
+    mapping: Mapping[str, float],
+    postings: Mapping[str, list[int]],
+    source_stat: Tuple[int, int],
+) -> None:
+    """Write *mapping* and its trigram *postings* to *path* atomically.
+
+    *source_stat* is ``(size, mtime_ns)`` of the file the data came from;
+    ``MappedTable.open`` rejects the table once the source changes.
+    """
+    keys = [key.encode('utf-8') for key in mapping]
+    values = list(mapping.values())
+    kind = _INT if all(isinstance(v, int) for v in values) else _FLOAT
+    grams = sorted(postings, key=lambda g: g.encode('utf-8'))
+
+    key_offs, pos = [0], 0
+    for key in keys:
+        pos += len(key)
+        key_offs.append(pos)
+    gram_bytes = [g.encode('utf-8') for g in grams]
+    gram_offs, pos = [0], 0
+    for gram in gram_bytes:
+        pos += len(gram)
+        gram_offs.append(pos)
+    post_offs, flat = [0], []
+    for gram in grams:
+        flat.extend(postings[gram])
+        post_offs.append(len(flat))
+
+    key_blob, gram_blob = b''.join(keys), b''.join(gram_bytes)
+    layout = _sections(len(keys), len(grams), len(flat), len(key_blob))
+    sections = {
+        'values': struct.pack(f'={len(values)}{"q" if kind == _INT else "d"}', *values),
+        'key_offs': struct.pack(f'={len(key_offs)}I', *key_offs),
+        'sorted': struct.pack(f'={len(keys)}I', *sorted(range(len(keys)), key=keys.__getitem__)),
+        'gram_offs': struct.pack(f'={len(gram_offs)}I', *gram_offs),
+        'post_offs': struct.pack(f'={len(post_offs)}I', *post_offs),
+        'postings': struct.pack(f'={len(flat)}I', *flat),
+        'key_blob': key_blob,
+        'gram_blob': gram_blob,
+    }
+    header = _HEADER.pack(MAGIC, len(keys), len(grams), len(flat), kind,
+                          source_stat[0], source_stat[1], len(key_blob), len(gram_blob))
+
+    buf = bytearray(layout['gram_blob'] + len(gram_blob))
+    buf[:len(header)] = header
+    for name, data in sections.items():
+        buf[layout[name]:layout[name] + len(data)] = data
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(buf)
+        os.chmod(tmp_name, 0o644)  # readable by the web and alert workers alike
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class MappedTable(Mapping):
+    """Read-only ``str -> number`` mapping backed by a shared mmap.
+
+    Iteration follows the source order; ``find`` is the trigram-indexed
+    precise-substring lookup.
+    """
+
+    def __init__(self, path: Path, mm: mmap.mmap):
+        self.path = path
+        self._mm = mm
+        (_, n_keys, n_grams, n_postings, kind, self.source_size, self.source_mtime_ns,
+         key_blob, gram_blob) = _HEADER.unpack_from(mm, 0)
+        layout = _sections(n_keys, n_grams, n_postings, key_blob)
+        view = self._view = memoryview(mm)
+
+        def _array(name: str, fmt: str, count: int) -> memoryview:
+            start = layout[name]
+            return view[start:start + struct.calcsize(fmt) * count].cast(fmt)
+
+        self._n = n_keys
+        self._n_grams = n_grams
+        self._values = _array('values', 'q' if kind == _INT else 'd', n_keys)
+        self._key_offs = _array('key_offs', 'I', n_keys + 1)
+        self._sorted = _array('sorted', 'I', n_keys)
+        self._gram_offs = _array('gram_offs', 'I', n_grams + 1)
+        self._post_offs = _array('post_offs', 'I', n_grams + 1)
+        self._postings = _array('postings', 'I', n_postings)
+        self._key_blob = layout['key_blob']
+        self._gram_blob = layout['gram_blob']
+
+    @classmethod
+    def open(cls, path: Path, source_stat: Tuple[int, int]) -> Optional["MappedTable"]:
+        """Map *path* if it exists, is intact and was built from a source with *source_stat*.
+
+        Returns None for a missing, stale, truncated or otherwise
+        inconsistent file; the caller then rebuilds it.
+        """
+        try:
+            with open(path, 'rb') as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return None
+        if len(mm) < _HEADER.size:
+            mm.close()
+            return None
+        (magic, n_keys, n_grams, n_postings, kind, size, mtime_ns,
+         key_blob, gram_blob) = _HEADER.unpack_from(mm, 0)
+        if (
+            magic != MAGIC
+            or (size, mtime_ns) != tuple(source_stat)
+            or kind not in (_INT, _FLOAT)
+            or len(mm) != _sections(n_keys, n_grams, n_postings, key_blob)['gram_blob'] + gram_blob
+        ):
+            mm.close()
+            return None
+        table = cls(path, mm)
+        if not table._consistent(key_blob, gram_blob):
+            table.close()
+            return None
+        return table
+
+    def _consistent(self, key_blob: int, gram_blob: int) -> bool:
+        """Check the offset tables end where the header says (cheap, O(1))."""
+        return (
+            self._key_offs[self._n] == key_blob
+            and self._gram_offs[self._n_grams] == gram_blob
+            and self._post_offs[self._n_grams] == len(self._postings)
+        )
+
+    def close(self) -> None:
+        """Release the mapping (only needed when discarding a table early)."""
+        for name in ('_values', '_key_offs', '_sorted', '_gram_offs', '_post_offs', '_postings'):
+            getattr(self, name).release()
+        self._view.release()
+        self._mm.close()
+
+    # --- raw access ---------------------------------------------------
+    def _key_bytes(self, rank: int) -> bytes:
+        start = self._key_blob
+        return self._mm[start + self._key_offs[rank]:start + self._key_offs[rank + 1]]
+
+    def _gram_bytes(self, i: int) -> bytes:
+        start = self._gram_blob
+        return self._mm[start + self._gram_offs[i]:start + self._gram_offs[i + 1]]
+
+    def _rank(self, key: bytes) -> int:
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_bytes(self._sorted[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._key_bytes(self._sorted[lo]) == key:
+            return self._sorted[lo]
+        return -1
+
+    def _posting(self, gram: str) -> memoryview:
+        target = gram.encode('utf-8')
+        lo, hi = 0, self._n_grams
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._gram_bytes(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_grams and self._gram_bytes(lo) == target:
+            return self._postings[self._post_offs[lo]:self._post_offs[lo + 1]]
+        return self._postings[0:0]
+
+    # --- Mapping ------------------------------------------------------
+    def __getitem__(self, key: str):
+        rank = self._rank(key.encode('utf-8')) if isinstance(key, str) else -1
+        if rank < 0:
+            raise KeyError(key)
+        return self._values[rank]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[str]:
+        for rank in range(self._n):
+            yield self._key_bytes(rank).decode('utf-8')
+
+    # --- SubstringIndex interface --------------------------------------
+    def find(self, term: str):
+        """Return the value of the first key (source order) that precisely contains *term*."""
+        if len(term) < GRAM:
+            candidates = range(self._n)
+        else:
+            candidates = min(
+                (self._posting(term[i:i + GRAM]) for i in range(len(term) - GRAM + 1)),
+                key=len,
+            )
+        for rank in candidates:
+            if is_precise_substring_match(term, self._key_bytes(rank).decode('utf-8')):
+                return self._values[rank]
+        return None
@@ -0,0 +1,225 @@
+"""Stale-while-revalidate cache for enriched search result sets.
+
+The ``/search`` route serves the most recent result set immediately.  Once
+it is older than ``soft_ttl`` a background refresh is started and the stale
+copy is still returned; only results older than ``hard_ttl`` (or no result
+at all) make the caller wait for a fresh search.
+
+Result sets can optionally be snapshotted to a directory as JSON so every
+gunicorn worker serves the newest set, whichever worker fetched it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.listing import ListingRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOFT_TTL_SECONDS = 300
+DEFAULT_HARD_TTL_SECONDS = 3600
+
+Loader = Callable[[], Tuple[List[dict], int]]
+
+
+@dataclass
+class ResultSet:
+    """One enriched, TCO-scored search result."""
+
+    key: str
+    listings: List[dict]
+    total_found: int
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the result set was fetched."""
+        return max(time.time() - self.fetched_at, 0.0)
+
+    @property
+    def version(self) -> str:
+        """Identifier that changes whenever the result set is replaced."""
+        return f"{int(self.fetched_at * 1000):x}"
+
+
+class ResultCache:
+    """Keep the latest result set per search key with soft/hard TTLs."""
+
+    def __init__(
+        self,
+        soft_ttl: float = DEFAULT_SOFT_TTL_SECONDS,
+        hard_ttl: float = DEFAULT_HARD_TTL_SECONDS,
+        snapshot_dir: str | Path | None = None,
+        listing_factory: Optional[Callable[[dict], Any]] = None,
+    ):
+        """*listing_factory* converts listings read back from a snapshot,
+        e.g. ``ListingRecord.from_dict``; by default they stay dicts.
+        """
+        self.listing_factory = listing_factory
+        self.soft_ttl = float(soft_ttl)
+        self.hard_ttl = max(float(hard_ttl), self.soft_ttl)
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self._entries: dict[str, ResultSet] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._snapshot_mtimes: dict[str, int] = {}  # last snapshot version seen per key
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "ResultCache":
+        """Build a cache from ``config['cache']['results']`` (all keys optional)."""
+        cache_cfg = (config.get("cache") or {}).get("results") or {}
+        return cls(
+            soft_ttl=cache_cfg.get("soft_ttl_seconds", DEFAULT_SOFT_TTL_SECONDS),
+            hard_ttl=cache_cfg.get("hard_ttl_seconds", DEFAULT_HARD_TTL_SECONDS),
+            snapshot_dir=cache_cfg.get("path"),
+            listing_factory=ListingRecord.from_dict,
+        )
+
+    @staticmethod
+    def make_key(params: dict[str, Any]) -> str:
+        """Return a stable key for the effective search parameters."""
+        return json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+
+    # ------------------------------------------------------------------
+    def get(self, key: str, loader: Loader) -> Tuple[ResultSet, bool]:
+        """Return ``(result_set, refreshing)`` for *key*.
+
+        *loader* runs the real search and returns ``(listings, total)``.  It
+        is called synchronously when nothing usable is cached and in a
+        daemon thread when the cached copy is merely stale.  Exceptions from
+        a blocking load propagate to the caller.
+        """
+        entry = self.peek(key)
+
+        if entry is None or entry.age > self.hard_ttl:
+            return self._refresh_blocking(key, loader, entry), False
+
+        if entry.age > self.soft_ttl:
+            return entry, self._refresh_in_background(key, loader)
+
+        return entry, key in self._refreshing
+
+    def peek(self, key: str) -> ResultSet | None:
+        """Return the newest cached result set for *key* without refreshing."""
+        with self._lock:
+            entry = self._entries.get(key)
+        snapshot = self._read_snapshot(key, newer_than=entry.fetched_at if entry else None)
+        if snapshot is not None:
+            with self._lock:
+                self._entries[key] = snapshot
+            return snapshot
+        return entry
+
+    def put(self, key: str, listings: List[dict], total_found: int) -> ResultSet:
+        """Store a freshly fetched result set and return it."""
+        entry = ResultSet(key=key, listings=listings, total_found=total_found, fetched_at=time.time())
+        with self._lock:
+            self._entries[key] = entry
+        self._write_snapshot(entry)
+        return entry
+
+    # ------------------------------------------------------------------
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh_blocking(self, key: str, loader: Loader, seen: ResultSet | None) -> ResultSet:
+        with self._key_lock(key):
+            # Another thread may have refreshed while we waited for the lock.
+            current = self.peek(key)
+            if current is not None and current is not seen and current.age <= self.hard_ttl:
+                return current
+            listings, total = loader()
+            return self.put(key, listings, total)
+
+    def _refresh_in_background(self, key: str, loader: Loader) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return True
+            self._refreshing.add(key)
+
+        def _run() -> None:
+            try:
+                with self._key_lock(key):
+                    listings, total = loader()
+                    self.put(key, listings, total)
+                logger.info("Background refresh finished for search %s", key)
+            except Exception:  # noqa: BLE001 – keep serving the stale copy
+                logger.exception("Background refresh failed for search %s", key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name="result-refresh", daemon=True).start()
+        logger.info("Started background refresh for search %s", key)
+        return True
+
+    # ------------------------------------------------------------------
+    def _snapshot_path(self, key: str) -> Path | None:
+        if self.snapshot_dir is None:
+            return None
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return self.snapshot_dir / f"results-{digest}.json"
+
+    def _read_snapshot(self, key: str, newer_than: float | None) -> ResultSet | None:
+        path = self._snapshot_path(key)
+        if path is None:
+            return None
+        try:
+            mtime = path.stat().st_mtime_ns
+            if mtime == self._snapshot_mtimes.get(key):
+                return None  # already loaded (or written) by this process
+            with path.open(encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._snapshot_mtimes[key] = mtime
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read result snapshot %s: %s", path, exc)
+            return None
+        if data.get("key") != key or (newer_than is not None and data["fetched_at"] <= newer_than):
+            return None
+        listings = data["listings"]
+        if self.listing_factory is not None:
+            listings = [self.listing_factory(listing) for listing in listings]
+        return ResultSet(
+            key=key,
+            listings=listings,
+            total_found=data["total_found"],
+            fetched_at=data["fetched_at"],
+        )
+
+    def _write_snapshot(self, entry: ResultSet) -> None:
+        path = self._snapshot_path(entry.key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(
+                    {
+                        "key": entry.key,
+                        "fetched_at": entry.fetched_at,
+                        "total_found": entry.total_found,
+                        "listings": entry.listings,
+                    },
+                    fh,
+                    separators=(",", ":"),
+                    default=json_default,
+                )
+            os.replace(tmp_name, path)
+            self._snapshot_mtimes[entry.key] = path.stat().st_mtime_ns
+        except OSError as exc:
+            logger.warning("Could not write result snapshot %s: %s", path, exc)
@@ -0,0 +1,169 @@
+"""Sort, filter and cursor pagination over a cached result set.
+
+The browser used to receive every listing and sort/filter client-side.
+``ResultIndex`` precomputes the order of the result set for every sort key
+once per result-set version, so serving a page is a walk of the
+precomputed order starting at the cursor position: O(page size) without
+filters, proportionally longer when filters reject rows.
+
+Cursors are ``"<version>:<position>"`` and are only valid for the result
+set version they were issued for; a refresh in between makes them stale.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.result_cache import ResultSet
+from src.utils import capacity_gb
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Sort key -> default direction ("desc" puts the best value first).
+SORT_KEYS = {
+    'performance_per_dollar': 'desc',
+    'tco': 'asc',
+    'price': 'asc',
+    'performance': 'desc',
+}
+
+
+class StaleCursorError(ValueError):
+    """The cursor belongs to a result set that has since been replaced."""
+
+
+@dataclass
+class ResultQuery:
+    """Validated query parameters for ``ResultIndex.page``."""
+
+    sort: str = 'performance_per_dollar'
+    order: str = 'desc'
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+    cpu_types: frozenset = field(default_factory=frozenset)
+    free_shipping: Optional[bool] = None
+    min_ram_gb: Optional[float] = None
+    min_storage_gb: Optional[float] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "ResultQuery":
+        """Parse request query-string arguments.  Raises ValueError."""
+        sort = args.get('sort', 'performance_per_dollar')
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        order = args.get('order', SORT_KEYS[sort])
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+        free_shipping = args.get('free_shipping')
+        if free_shipping is not None:
+            if free_shipping.lower() not in ('true', 'false', '1', '0'):
+                raise ValueError("free_shipping must be true or false")
+            free_shipping = free_shipping.lower() in ('true', '1')
+
+        def _number(name: str) -> Optional[float]:
+            value = args.get(name)
+            return float(value) if value not in (None, '') else None
+
+        cpu_types = frozenset(
+            t.strip().upper() for t in args.get('cpu_type', '').split(',') if t.strip()
+        )
+        return cls(
+            sort=sort,
+            order=order,
+            limit=limit,
+            cursor=args.get('cursor') or None,
+            cpu_types=cpu_types,
+            free_shipping=free_shipping,
+            min_ram_gb=_number('min_ram_gb'),
+            min_storage_gb=_number('min_storage_gb'),
+            min_price=_number('min_price'),
+            max_price=_number('max_price'),
+        )
+
+
+class ResultIndex:
+    """Precomputed sort orders and filter columns for one result set."""
+
+    def __init__(self, result: ResultSet):
+        self.key = result.key
+        self.version = result.version
+        self.listings = result.listings
+        self.ram_gb = [capacity_gb(l.get('ram')) for l in self.listings]
+        self.storage_gb = [capacity_gb(l.get('storage')) for l in self.listings]
+        self.cpu_types = [str(l.get('cpu_type') or '').upper() for l in self.listings]
+        # Full traversal order per (sort key, direction).  Rows without a
+        # value for the key are listed last in both directions.
+        self.orders: Dict[Tuple[str, str], List[int]] = {}
+        for key in SORT_KEYS:
+            present = [i for i, l in enumerate(self.listings) if l.get(key) is not None]
+            missing = [i for i, l in enumerate(self.listings) if l.get(key) is None]
+            # sort() is stable, so equal values keep result-set order.
+            present.sort(key=lambda i: self.listings[i][key])
+            self.orders[(key, 'asc')] = present + missing
+            self.orders[(key, 'desc')] = present[::-1] + missing
+
+    def _matches(self, i: int, query: ResultQuery) -> bool:
+        listing = self.listings[i]
+        if query.cpu_types and self.cpu_types[i] not in query.cpu_types:
+            return False
+        if query.free_shipping is not None and bool(listing.get('free_shipping')) != query.free_shipping:
+            return False
+        if query.min_ram_gb is not None and self.ram_gb[i] < query.min_ram_gb:
+            return False
+        if query.min_storage_gb is not None and self.storage_gb[i] < query.min_storage_gb:
+            return False
+        price = listing.get('price')
+        if query.min_price is not None and (price is None or price < query.min_price):
+            return False
+        if query.max_price is not None and (price is None or price > query.max_price):
+            return False
+        return True
+
+    def _start(self, cursor: Optional[str]) -> int:
+        if not cursor:
+            return 0
+        version, _, position = cursor.partition(':')
+        if version != self.version:
+            raise StaleCursorError("Result set has been refreshed; restart from the first page")
+        try:
+            return max(int(position), 0)
+        except ValueError:
+            raise ValueError("Malformed cursor") from None
+
+    def page(self, query: ResultQuery) -> Tuple[List[Any], Optional[str]]:
+        """Return ``(listings, next_cursor)``; ``next_cursor`` is None at the end."""
+        positions = self.orders[(query.sort, query.order)]
+        pos = self._start(query.cursor)
+        rows: List[Any] = []
+        while pos < len(positions) and len(rows) < query.limit:
+            i = positions[pos]
+            pos += 1
+            if self._matches(i, query):
+                rows.append(self.listings[i])
+        next_cursor = f"{self.version}:{pos}" if pos < len(positions) else None
+        return rows, next_cursor
+
+
+_indexes: Dict[str, ResultIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(result: ResultSet) -> ResultIndex:
+    """Return the index for *result*, building it once per result-set version."""
+    with _indexes_lock:
+        index = _indexes.get(result.key)
+        if index is not None and index.version == result.version:
+            return index
+    index = ResultIndex(result)
+    with _indexes_lock:
+        _indexes[result.key] = index
+    return index
@@ -0,0 +1,66 @@
+import logging
+from flask import Blueprint, jsonify, request
+
+from src.config import load_config
+
+logger = logging.getLogger(__name__)
+
+listings_bp = Blueprint('listings', __name__)
+
+MAX_LIMIT = 500
+
+
+def _engine(config):
+    url = (config.get('database') or {}).get('url')
+    if not url:
+        return None
+    from src.database import get_engine  # SQLAlchemy stays out of start-up
+
+    return get_engine(url)
+
+
+def _limit(default):
+    limit = int(request.args.get('limit', default))
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def _no_database():
+    return jsonify({'status': 'error', 'message': 'No listings database configured (database.url)'}), 503
+
+
+@listings_bp.route('/listings/top', methods=['GET'])
+def top_listings():
+    """Best stored listings by performance per dollar.  Never calls eBay.
+
+    Query string: ``max_price`` (optional), ``limit`` (default 20).
+    """
+    engine = _engine(load_config())
+    if engine is None:
+        return _no_database()
+    try:
+        max_price = request.args.get('max_price')
+        max_price = float(max_price) if max_price not in (None, '') else None
+        from src.database import top_listings_by_perf_per_dollar
+
+        rows = top_listings_by_perf_per_dollar(engine, max_price=max_price, limit=_limit(20))
+    except ValueError as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 400
+    return jsonify({'status': 'success', 'listings': rows})
+
+
+@listings_bp.route('/listings/cpu/<cpu_model>', methods=['GET'])
+def cpu_listings(cpu_model):
+    """All stored listings for one CPU model, best perf/$ first.  Never calls eBay."""
+    engine = _engine(load_config())
+    if engine is None:
+        return _no_database()
+    try:
+        limit = _limit(MAX_LIMIT)
+    except ValueError as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 400
+    from src.database import listings_for_cpu
+
+    rows = listings_for_cpu(engine, cpu_model.upper(), limit=limit)
+    return jsonify({'status': 'success', 'cpu_model': cpu_model.upper(), 'listings': rows})
@@ -1,33 +1,42 @@
+import itertools
 import json
 import logging
-from flask import Blueprint, jsonify, Response
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 
+from src.compression import CompressedBodyCache, encoded_response
 from src.config import load_config
-from src.search_service import find_listings, apply_tco
+from src.listing import json_default
+from src.rate_limiter import QuotaExceededError
+from src.result_cache import ResultCache
+from src.result_query import ResultQuery, StaleCursorError, index_for
+from src.search_service import api_budget, estimate_search_cost, find_listings, iter_listing_batches
+from src.tco import sensitivity_sweep
 
 logger = logging.getLogger(__name__)
 
 search_bp = Blueprint('search', __name__)
 
-@search_bp.route('/search', methods=['POST'])
-def search():  # noqa: C901 – function is complex; TODO split later
-    """Perform searches for each keyword and combine results."""
-    config = load_config()
-    logger.info("Loaded configuration")
+# Process-wide stale-while-revalidate cache, built from config on first use.
+_result_cache: ResultCache | None = None
+# Serialised (and compressed) /search bodies, reused per result-set version.
+_search_bodies = CompressedBodyCache()
 
-    # ---- Perform search & enrichment via shared service -------------------
-    try:
-        listings, total_items_found_api = find_listings(config)
-    except RuntimeError as exc:
-        logger.error("Search failed: %s", exc)
-        return jsonify({'status': 'error', 'message': str(exc)}), 500
 
-    # Apply TCO/performance calculations
+def _get_result_cache(config) -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache.from_config(config)
+    return _result_cache
+
+
+def _result_cache_key(config) -> str:
     tco_cfg = config.get('app', {}).get('tco_assumptions', {})
-    apply_tco(listings, tco_cfg)
+    return ResultCache.make_key({'search': config['search'], 'tco': tco_cfg})
+
 
-    # Prepare defaults for frontend form fields
-    tco_defaults_for_frontend = {
+def _tco_defaults(tco_cfg) -> dict:
+    """Defaults for the frontend TCO form fields."""
+    return {
         'kwh_cost': tco_cfg.get('kwh_cost', 0.1),
         'lifespan_years': tco_cfg.get('lifespan_years', 5),
         'shipping_cost_t_cpu': tco_cfg.get('shipping_cost_t_cpu', 10),
@@ -38,15 +47,207 @@ def search():  # noqa: C901 – function is complex; TODO split later
         'storage_upgrade_flat_cost': tco_cfg.get('storage_upgrade_flat_cost', 15),
     }
 
+
+@search_bp.route('/search', methods=['POST'])
+def search():  # noqa: C901 – function is complex; TODO split later
+    """Perform searches for each keyword and combine results."""
+    config = load_config()
+    logger.info("Loaded configuration")
+
+    tco_cfg = config.get('app', {}).get('tco_assumptions', {})
+
+    def _load():
+        # find_listings applies the TCO/performance calculations
+        return find_listings(config)
+
+    # ---- Serve cached result set, refreshing it when stale ------------------
+    cache = _get_result_cache(config)
+    cache_key = _result_cache_key(config)
+    try:
+        result, refreshing = cache.get(cache_key, _load)
+    except RuntimeError as exc:
+        logger.error("Search failed: %s", exc)
+        return jsonify({'status': 'error', 'message': str(exc)}), 500
+
+    def _serialise() -> bytes:
+        return json.dumps({
+            'status': 'success',
+            'listings': result.listings,
+            'total_found': result.total_found,
+            'actually_processed': len(result.listings),
+            'full_search_enabled': config['search'].get('full_search', False),
+            'tco_defaults': _tco_defaults(tco_cfg),
+            'fetched_at': result.fetched_at,
+            'refreshing': refreshing,
+        }, default=json_default).encode('utf-8')
+
+    # The body only depends on the result-set version (the key covers the
+    # search and TCO config), so it is serialised and compressed once and
+    # the per-request age travels in the standard Age header.  A new
+    # version replaces the previous one's bodies.
+    response = encoded_response(
+        _search_bodies,
+        (cache_key, result.version, refreshing),
+        _serialise,
+        'application/json',
+        request.headers.get('Accept-Encoding'),
+        slot=(cache_key, refreshing),
+    )
+    response.headers['Age'] = str(int(result.age))
+    return response
+
+    # No explicit broad exception handling; errors propagate to app-level handlers
+
+
+@search_bp.route('/search/stream', methods=['GET', 'POST'])
+def search_stream():
+    """Stream listings page by page as NDJSON (default) or SSE.
+
+    Each event is ``{"type": "listings", "listings": [...]}``; the last is
+    ``{"type": "summary", ...}`` with the same totals as ``/search``.  Select
+    Server-Sent Events with ``?format=sse``.  A stream in which every
+    keyword succeeded also refreshes the cached result set served by
+    ``/search``; otherwise the summary has ``status: partial`` and lists
+    the ``failed_keywords``, and the cache is left alone.
+    """
+    config = load_config()
+    tco_cfg = config.get('app', {}).get('tco_assumptions', {})
+    sse = request.args.get('format', 'ndjson') == 'sse'
+
+    failures: dict[str, str] = {}
+    batches = iter_listing_batches(config, failures=failures)
+    try:
+        first = next(batches, None)  # authenticates before headers are sent
+    except RuntimeError as exc:
+        logger.error("Search failed: %s", exc)
+        return jsonify({'status': 'error', 'message': str(exc)}), 500
+
+    def _event(payload) -> str:
+        body = json.dumps(payload, default=json_default)
+        if sse:
+            return f"event: {payload['type']}\ndata: {body}\n\n"
+        return body + "\n"
+
+    def _generate():
+        listings, total = [], 0
+        try:
+            pending = [first] if first is not None else []
+            for batch, total in itertools.chain(pending, batches):
+                if batch:
+                    listings.extend(batch)
+                    yield _event({'type': 'listings', 'listings': batch})
+        finally:
+            batches.close()
+        summary = {
+            'type': 'summary',
+            'status': 'success',
+            'total_found': total,
+            'actually_processed': len(listings),
+            'full_search_enabled': config['search'].get('full_search', False),
+            'tco_defaults': _tco_defaults(tco_cfg),
+        }
+        if failures:
+            # A partial result set must not replace a complete cached one.
+            logger.warning("Streamed search incomplete; failed keywords: %s", ", ".join(sorted(failures)))
+            summary.update(status='partial', failed_keywords=dict(failures))
+        else:
+            _get_result_cache(config).put(_result_cache_key(config), listings, total)
+        yield _event(summary)
+
+    mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+    response = Response(stream_with_context(_generate()), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@search_bp.route('/search/results', methods=['GET'])
+def search_results():
+    """Page through the cached result set, sorted and filtered server-side.
+
+    Query string: ``sort`` (performance_per_dollar|tco|price|performance),
+    ``order`` (asc|desc), ``limit``, ``cursor``, and the filters
+    ``cpu_type`` (comma-separated), ``free_shipping``, ``min_ram_gb``,
+    ``min_storage_gb``, ``min_price``, ``max_price``.  Never calls eBay.
+    """
+    config = load_config()
+    result = _get_result_cache(config).peek(_result_cache_key(config))
+    if result is None:
+        return jsonify({'status': 'error', 'message': 'No cached results yet; run a search first'}), 409
+
+    try:
+        query = ResultQuery.from_args(request.args)
+        listings, next_cursor = index_for(result).page(query)
+    except StaleCursorError as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 409
+    except ValueError as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 400
+
     response_body = json.dumps({
         'status': 'success',
         'listings': listings,
-        'total_found': total_items_found_api,
-        'actually_processed': len(listings),
-        'full_search_enabled': config['search'].get('full_search', False),
-        'tco_defaults': tco_defaults_for_frontend,
-    })
-
+        'next_cursor': next_cursor,
+        'result_count': len(result.listings),
+        'cache_age_seconds': round(result.age, 1),
+    }, default=json_default)
     return Response(response_body, mimetype="application/json", direct_passthrough=True)
 
-    # No explicit broad exception handling; errors propagate to app-level handlers 
\ No newline at end of file
+
+@search_bp.route('/search/budget', methods=['GET'])
+def search_budget():
+    """Report today's eBay API usage and remaining budget.  Never calls eBay."""
+    config = load_config()
+    return jsonify({'status': 'success', 'budget': api_budget(config)})
+
+
+@search_bp.route('/search/budget/estimate', methods=['POST'])
+def search_budget_estimate():
+    """Estimate the calls the configured search would make.
+
+    JSON body (optional): ``{"full_search": true}`` overrides the configured
+    mode.  This spends one (cacheable) API call per keyword, hence POST.
+    """
+    config = load_config()
+    payload = request.get_json(silent=True) or {}
+    full_search = payload.get('full_search')
+    override = None if full_search is None else bool(full_search)
+    try:
+        estimate = estimate_search_cost(config, full_search_override=override)
+    except QuotaExceededError as exc:
+        return jsonify({'status': 'error', 'message': str(exc), 'budget': api_budget(config)}), 429
+    except RuntimeError as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 500
+    # The estimate itself may have spent calls.
+    return jsonify({'status': 'success', 'estimate': estimate, 'budget': api_budget(config)})
+
+
+@search_bp.route('/search/sensitivity', methods=['POST'])
+def sensitivity():
+    """Sweep TCO assumptions over the cached result set.
+
+    JSON body: ``{"ranges": {"kwh_cost": {"min": 0.1, "max": 0.4, "steps": 7},
+    "lifespan_years": [3, 5, 7]}, "top_n": 5}``.  Never calls eBay.
+    """
+    config = load_config()
+    payload = request.get_json(silent=True) or {}
+
+    result = _get_result_cache(config).peek(_result_cache_key(config))
+    if result is None:
+        return jsonify({'status': 'error', 'message': 'No cached results yet; run a search first'}), 409
+
+    tco_cfg = config.get('app', {}).get('tco_assumptions', {})
+    try:
+        sweep = sensitivity_sweep(
+            result.listings,
+            tco_cfg,
+            payload.get('ranges') or {},
+            top_n=payload.get('top_n', 5),
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({'status': 'error', 'message': str(exc)}), 400
+
+    return jsonify({
+        'status': 'success',
+        'cache_age_seconds': round(result.age, 1),
+        **sweep,
+    })
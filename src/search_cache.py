@@ -0,0 +1,145 @@
+"""Disk-backed TTL cache for eBay search result pages.
+
+Pages are stored in a small SQLite database so cached results survive
+gunicorn worker recycling and are shared by the web workers and the alert
+worker.  Entries expire after ``ttl_seconds``; once more than
+``max_entries`` pages are stored the least recently used ones are evicted.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 900
+DEFAULT_MAX_ENTRIES = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_pages (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_search_pages_accessed_at ON search_pages (accessed_at);
+"""
+
+
+class SearchPageCache:
+    """Persistent page cache keyed by the effective search parameters."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(int(max_entries), 1)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "SearchPageCache | None":
+        """Build a cache from ``config['cache']['search_pages']``.
+
+        Returns ``None`` when the section is missing or ``enabled`` is false.
+        """
+        cache_cfg = (config.get("cache") or {}).get("search_pages")
+        if not cache_cfg or not cache_cfg.get("enabled", True):
+            return None
+        try:
+            return cls(
+                cache_cfg.get("path", "data/search_cache.db"),
+                ttl_seconds=cache_cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+                max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES),
+            )
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Search page cache disabled: %s", exc)
+            return None
+
+    @staticmethod
+    def make_key(
+        keywords: str,
+        category_id: Any,
+        filters: Any,
+        offset: int,
+        marketplace: str,
+        endpoint: str = "",
+    ) -> str:
+        """Return a stable cache key for one result page.
+
+        *filters* is the Browse API ``filter`` parameter, which carries the
+        max-price constraint.
+        """
+        return json.dumps(
+            [endpoint, keywords, str(category_id or ""), filters or "", int(offset), marketplace],
+            separators=(",", ":"),
+        )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation keeps the cache safe to
+        # use from worker threads and forked processes alike.
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached page for *key*, or ``None`` if absent/expired."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload FROM search_pages WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE search_pages SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as exc:
+            logger.warning("Search page cache read failed: %s", exc)
+            return None
+
+    def set(self, key: str, page: dict) -> None:
+        """Store *page* under *key*, evicting expired and LRU entries."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_pages (key, payload, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(page, separators=(",", ":")), now, now),
+                )
+                conn.execute(
+                    "DELETE FROM search_pages WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+                conn.execute(
+                    "DELETE FROM search_pages WHERE key IN ("
+                    " SELECT key FROM search_pages ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Search page cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        """Remove every cached page."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_pages")
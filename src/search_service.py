@@ -1,88 +1,483 @@
 """Domain-level helpers shared by both the Flask route and the daily alert.
 
-These functions are *pure* – they take ordinary Python data, perform the
-search/enrichment/TCO math and return data.  No HTTP or e-mail concerns are
-handled here, keeping the code testable and reusable.
+These functions take ordinary Python data, perform the search/enrichment/TCO
+math and return data; the only side effect is persisting results to the
+listings database when ``database.url`` is configured.  No HTTP or e-mail
+concerns are handled here, keeping the code testable and reusable.
 """
 
 from __future__ import annotations
 
-from typing import Any, List, Tuple
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Iterator, List, Tuple
 
-from src.ebay_api import EBayAPI
-from src.data_loader import PASSMARK_SCORES, IDLE_POWER_DATA
+from src.ebay_api import (
+    EBayAPI,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    estimate_page_calls,
+)
+from src.cpu_cache import CpuResolutionCache
+from src.rate_limiter import ApiRateLimiter
+from src.search_cache import SearchPageCache
+from src.single_flight import SingleFlight
+from src.data_loader import (
+    idle_power_data,
+    load_idle_power_index,
+    load_passmark_index,
+    passmark_scores,
+    reference_data_version,
+)
 from src.enrich_item import enrich_item
-from src.tco import calculate_tco_and_perf
+from src.listing import ListingRecord, json_default
+from src.title_parser import parse_titles
+from src.tco import calculate_tco_and_perf_batch
 
+logger = logging.getLogger(__name__)
 
-def find_listings(
-    config: dict[str, Any],
-    *,
-    full_search_override: bool | None = None,
-) -> Tuple[List[dict], int]:
-    """Run eBay searches as configured and return enriched listings.
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_PAGE_CONCURRENCY = 4
 
-    Returns (listings, total_reported_by_api).
-    Raises RuntimeError on authentication failure.
-    """
+# One CPU resolution memo per process (and cache file), reused across searches.
+_cpu_caches: dict[tuple, CpuResolutionCache] = {}
+_cpu_caches_lock = threading.Lock()
 
+
+def _get_cpu_cache(config: dict[str, Any]) -> CpuResolutionCache:
+    version = reference_data_version()
+    path = ((config.get("cache") or {}).get("cpu_resolution") or {}).get("path")
+    with _cpu_caches_lock:
+        cache = _cpu_caches.get((path, version))
+        if cache is None:
+            cache = CpuResolutionCache.from_config(config, version)
+            _cpu_caches[(path, version)] = cache
+        return cache
+
+
+def _search_settings(config: dict[str, Any], full_search_override: bool | None) -> dict[str, Any]:
     search_cfg = config["search"]
-    keywords: str = search_cfg["keywords"]
-    category_id = search_cfg["category_id"]
-    max_price = search_cfg["max_price"]
-    full_search = (
-        full_search_override
-        if full_search_override is not None
-        else search_cfg.get("full_search", False)
-    )
+    return {
+        "terms": [t.strip() for t in search_cfg["keywords"].split(",") if t.strip()],
+        "category_id": search_cfg["category_id"],
+        "max_price": search_cfg["max_price"],
+        "full_search": (
+            full_search_override
+            if full_search_override is not None
+            else search_cfg.get("full_search", False)
+        ),
+        "max_workers": max(int(search_cfg.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)), 1),
+    }
+
+
+# One long-lived eBay client per process: its pooled connections and
+# in-memory token are reused by every search.  pid -> (settings, client).
+_api_clients: dict[int, tuple[str, EBayAPI]] = {}
+_api_clients_lock = threading.Lock()
+# Set by ``start_token_refresh`` (web app only): clients created from then
+# on, including replacements after a settings change, refresh their token.
+_refresh_tokens = False
+
+
+def _api_client(config: dict[str, Any]) -> EBayAPI:
+    """Return this process's eBay client for *config*, creating it on first use.
+
+    When the client settings in *config* change, the previous client is
+    closed (stopping its token refresher and releasing idle connections;
+    requests still running on it complete) and replaced; the replacement
+    refreshes its token in the background if ``start_token_refresh`` ran.
+
+    The connection pool holds at least one connection per concurrent page
+    request: ``max_concurrency`` keywords × ``page_concurrency`` pages each.
+    """
+    search_cfg = config["search"]
+    http_cfg = config["ebay"].get("http", {})
+    page_cache_cfg = (config.get("cache") or {}).get("search_pages")
+    page_concurrency = max(int(search_cfg.get("page_concurrency", DEFAULT_PAGE_CONCURRENCY)), 1)
+    keyword_concurrency = max(int(search_cfg.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)), 1)
+    pool_size = max(int(http_cfg.get("pool_size", DEFAULT_POOL_SIZE)),
+                    keyword_concurrency * page_concurrency)
+    settings = json.dumps([config["ebay"], page_concurrency, pool_size, page_cache_cfg],
+                          sort_keys=True, default=str)
+    # Keyed by pid so a forked worker never uses its parent's threads/sockets.
+    pid = os.getpid()
+    with _api_clients_lock:
+        current = _api_clients.get(pid)
+        if current is not None and current[0] == settings:
+            return current[1]
+        if current is not None:
+            logger.info("eBay client settings changed; replacing the client")
+            current[1].close()
+        api = EBayAPI(
+            app_id=config["ebay"]["app_id"],
+            cert_id=config["ebay"]["cert_id"],
+            sandbox=config["ebay"].get("sandbox", False),
+            page_concurrency=page_concurrency,
+            pool_size=pool_size,
+            connect_timeout=http_cfg.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+            read_timeout=http_cfg.get("read_timeout", DEFAULT_READ_TIMEOUT),
+            page_cache=SearchPageCache.from_config(config),
+            rate_limiter=ApiRateLimiter.from_config(config),
+        )
+        _api_clients[pid] = (settings, api)
+        if _refresh_tokens:
+            api.start_token_refresher()
+        return api
+
+
+def start_token_refresh(config: dict[str, Any]) -> None:
+    """Create this process's eBay client and keep its token fresh in the background.
+
+    Called at web-app start-up so that no search request waits for the
+    identity endpoint.  Short-lived processes such as the alert worker do
+    not call it and fetch a token only when they search.
+    """
+    global _refresh_tokens
+    _refresh_tokens = True
+    _api_client(config).start_token_refresher()
 
-    # --- Authenticate --------------------------------------------------
-    api = EBayAPI(
-        app_id=config["ebay"]["app_id"],
-        cert_id=config["ebay"]["cert_id"],
-        sandbox=config["ebay"].get("sandbox", False),
-    )
 
+def _authenticated_api(config: dict[str, Any]) -> EBayAPI:
+    """Return the process-wide eBay client with a valid token.
+
+    Raises RuntimeError on authentication failure.
+    """
+    api = _api_client(config)
     if not api.get_oauth_token():
         raise RuntimeError("Failed to authenticate with eBay API")
+    return api
 
-    # --- Perform search -------------------------------------------------
-    search_terms = [t.strip() for t in keywords.split(",") if t.strip()]
-    all_results: list[dict] = []
-    seen_ids: set[str] = set()
-    total_items_found_api = 0
 
-    cpus_not_found_passmark: set[str] = set()
-    cpus_not_found_idle: set[str] = set()
+def api_budget(config: dict[str, Any]) -> dict[str, Any] | None:
+    """Today's eBay API usage and remaining budget, or None without ``ebay.rate_limit``."""
+    limiter = _api_client(config).rate_limiter
+    return limiter.remaining() if limiter is not None else None
+
+
+def estimate_search_cost(
+    config: dict[str, Any],
+    *,
+    full_search_override: bool | None = None,
+) -> dict[str, Any]:
+    """Estimate how many API calls the configured search will make.
+
+    Fetches the first page of every keyword (one call each, or none when
+    cached; the search itself then reuses the cached page) and derives the
+    page count from the reported ``total``.  Raises RuntimeError on
+    authentication failure.
+    """
+    settings = _search_settings(config, full_search_override)
+    api = _authenticated_api(config)
+    keywords = {}
+    for term in settings["terms"]:
+        total = api.search_total(term, settings["category_id"], settings["max_price"])
+        keywords[term] = {
+            "total": total,
+            "calls": estimate_page_calls(total, settings["full_search"]),
+        }
+    return {
+        "full_search": settings["full_search"],
+        "keywords": keywords,
+        "calls": sum(k["calls"] for k in keywords.values()),
+    }
+
+
+class _Enricher:
+    """De-duplicate raw item summaries by itemId and enrich the new ones."""
+
+    def __init__(self, config: dict[str, Any]):
+        self.seen_ids: set[str] = set()
+        self.cpus_not_found_passmark: set[str] = set()
+        self.cpus_not_found_idle: set[str] = set()
+        self.passmark_scores = passmark_scores()
+        self.idle_power_data = idle_power_data()
+        self.passmark_index = load_passmark_index()
+        self.idle_power_index = load_idle_power_index()
+        self.cpu_cache = _get_cpu_cache(config)
 
-    for term in search_terms:
-        items, term_total = api.search_items(term, category_id, max_price, full_search)
-        total_items_found_api += term_total
+    def enrich(self, items: List[dict]) -> List[ListingRecord]:
+        new_items = []
         for item in items:
             item_id = item.get("itemId")
-            if item_id in seen_ids:
+            if item_id in self.seen_ids:
                 continue
-            seen_ids.add(item_id)
+            self.seen_ids.add(item_id)
+            new_items.append(item)
 
-            processed = enrich_item(
+        parsed_titles = parse_titles(item.get("title", "") for item in new_items)
+        return [
+            enrich_item(
                 item,
-                PASSMARK_SCORES,
-                IDLE_POWER_DATA,
-                cpus_not_found_passmark,
-                cpus_not_found_idle,
+                self.passmark_scores,
+                self.idle_power_data,
+                self.cpus_not_found_passmark,
+                self.cpus_not_found_idle,
+                passmark_index=self.passmark_index,
+                idle_power_index=self.idle_power_index,
+                resolution_cache=self.cpu_cache,
+                parsed=parsed,
             )
-            all_results.append(processed)
+            for item, parsed in zip(new_items, parsed_titles)
+        ]
+
+    def finish(self) -> None:
+        self.cpu_cache.flush()
+        if self.cpus_not_found_passmark:
+            logger.info("CPUs without PassMark score: %s", ", ".join(sorted(self.cpus_not_found_passmark)))
+        if self.cpus_not_found_idle:
+            logger.info("CPUs without idle-power data: %s", ", ".join(sorted(self.cpus_not_found_idle)))
+
+
+def _database_engine(config: dict[str, Any]):
+    """Engine for ``database.url``, or None when no database is configured.
+
+    The database modules (and SQLAlchemy) are only imported when a URL is
+    configured, keeping them out of start-up.
+    """
+    url = (config.get("database") or {}).get("url")
+    if not url:
+        return None
+    from src.database import get_engine
+
+    return get_engine(url)
+
+
+def _persist_listings(config: dict[str, Any], listings: List[ListingRecord]) -> None:
+    """Upsert *listings* into ``database.url``; failures are logged, not raised."""
+    if not listings:
+        return
+    engine = _database_engine(config)
+    if engine is None:
+        return
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from src.database import bulk_upsert_listings
 
+    start = time.perf_counter()
+    try:
+        written = bulk_upsert_listings(listings, engine)
+    except SQLAlchemyError as exc:
+        logger.warning("Could not persist listings: %s", exc)
+        return
+    logger.info("Persisted %d listings in %.3fs", written, time.perf_counter() - start)
+
+
+# Coalesces identical concurrent searches, one instance per process and directory.
+_single_flights: dict[Any, SingleFlight] = {}
+_single_flights_lock = threading.Lock()
+
+
+def _encode_result(result: Tuple[List[ListingRecord], int]) -> bytes:
+    listings, total = result
+    return json.dumps({"listings": listings, "total": total}, default=json_default).encode()
+
+
+def _decode_result(data: bytes) -> Tuple[List[ListingRecord], int]:
+    payload = json.loads(data)
+    return [ListingRecord.from_dict(l) for l in payload["listings"]], payload["total"]
+
+
+def _get_single_flight(config: dict[str, Any]) -> SingleFlight:
+    path = ((config.get("cache") or {}).get("single_flight") or {}).get("path")
+    with _single_flights_lock:
+        flight = _single_flights.get(path)
+        if flight is None:
+            flight = SingleFlight(path, encode=_encode_result, decode=_decode_result) if path else SingleFlight()
+            _single_flights[path] = flight
+        return flight
+
+
+def _flight_key(config: dict[str, Any], settings: dict[str, Any], incremental: bool) -> str:
+    """Everything that changes the result of ``find_listings``."""
+    return json.dumps(
+        {
+            "terms": settings["terms"],
+            "category_id": settings["category_id"],
+            "max_price": settings["max_price"],
+            "full_search": bool(settings["full_search"]),
+            "incremental": incremental,
+            "sandbox": config["ebay"].get("sandbox", False),
+            "database": (config.get("database") or {}).get("url"),
+            "tco": config.get("app", {}).get("tco_assumptions", {}),
+        },
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+
+
+def find_listings(
+    config: dict[str, Any],
+    *,
+    full_search_override: bool | None = None,
+    incremental: bool = False,
+) -> Tuple[List[ListingRecord], int]:
+    """Run eBay searches as configured and return enriched, TCO-scored listings.
+
+    The listings are also upserted into the listings database.  With
+    *incremental* (requires ``database.url``) each keyword is searched
+    newest-first and only listings newer than that keyword's high-water
+    mark from the previous incremental run are returned.
+
+    Identical searches running at the same time - in this process or, with
+    ``cache.single_flight.path``, in other workers - share one execution;
+    the returned listings may then be shared with other callers and must
+    not be mutated.
+
+    Returns (listings, total_reported_by_api).
+    Raises RuntimeError on authentication failure.
+    """
+    settings = _search_settings(config, full_search_override)
+    key = _flight_key(config, settings, incremental)
+    result, shared = _get_single_flight(config).run(
+        key, lambda: _run_search(config, settings, incremental)
+    )
+    if shared:
+        logger.info("Shared the result of an identical in-flight search (%d listings)", len(result[0]))
+    return result
+
+
+def _run_search(
+    config: dict[str, Any], settings: dict[str, Any], incremental: bool
+) -> Tuple[List[ListingRecord], int]:
+    """The search behind ``find_listings``."""
+    search_terms = settings["terms"]
+
+    engine = _database_engine(config) if incremental else None
+    if incremental and engine is None:
+        logger.warning("Incremental search needs database.url; running a regular search")
+    if engine is not None:
+        from src.crawl_state import crawl_key, load_high_water_mark, save_high_water_mark
+
+    # --- Authenticate --------------------------------------------------
+    api = _authenticated_api(config)
+
+    # --- Perform search -------------------------------------------------
+    # Keyword searches are independent round-trips, so they are fanned out
+    # over a bounded thread pool.  ``executor.map`` yields results in input
+    # order, which keeps de-duplication (first keyword wins) deterministic.
+    all_results: list[ListingRecord] = []
+    total_items_found_api = 0
+    enricher = _Enricher(config)
+
+    def _search(term: str) -> tuple[list[dict], int]:
+        args = (term, settings["category_id"], settings["max_price"], settings["full_search"])
+        if engine is None:
+            return api.search_items(*args)
+        key = crawl_key(term, settings["category_id"], settings["max_price"])
+        mark = load_high_water_mark(engine, key)
+        status: dict[str, bool] = {}
+        items, total = api.search_items(*args, newer_than=mark, crawl_status=status)
+        # A crawl cut short (budget, page limit, error) left a gap above the
+        # old mark; moving the mark past it would skip those listings for good.
+        if status.get("reached_mark"):
+            save_high_water_mark(engine, key, mark.advance(items))
+        else:
+            logger.warning("Incremental search for '%s' stopped before its high-water mark; "
+                           "keeping the mark", term)
+        return items, total
+
+    with ThreadPoolExecutor(
+        max_workers=min(settings["max_workers"], len(search_terms) or 1),
+        thread_name_prefix="ebay-search",
+    ) as executor:
+        for items, term_total in executor.map(_search, search_terms):
+            total_items_found_api += term_total
+            all_results.extend(enricher.enrich(items))
+
+    enricher.finish()
+    apply_tco(all_results, config.get("app", {}).get("tco_assumptions", {}))
+    _persist_listings(config, all_results)
     return all_results, total_items_found_api
 
 
-def apply_tco(listings: List[dict], tco_cfg: dict[str, Any] | None) -> None:
+def iter_listing_batches(
+    config: dict[str, Any],
+    *,
+    full_search_override: bool | None = None,
+    failures: dict[str, str] | None = None,
+) -> Iterator[Tuple[List[ListingRecord], int]]:
+    """Yield enriched, TCO-scored listings page by page as they arrive.
+
+    Each item is ``(new_listings, total_reported_so_far)``; the last total
+    is the overall API total.  Keywords are searched concurrently and
+    batches are yielded in completion order, so unlike ``find_listings``
+    the order depends on timing.  A keyword whose search fails (HTTP
+    error, exhausted call budget, ...) is logged and skipped; pass a dict
+    as *failures* to receive ``{keyword: error message}`` for them, which
+    tells a complete result apart from a partial one.
+
+    Authentication happens before the first ``next()`` returns and raises
+    RuntimeError on failure.  Closing the generator early stops further
+    page requests; requests already in flight are completed and discarded.
+    """
+    settings = _search_settings(config, full_search_override)
+    search_terms = settings["terms"]
+    tco_cfg = config.get("app", {}).get("tco_assumptions", {})
+
+    api = _authenticated_api(config)
+    enricher = _Enricher(config)
+    pages: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def _produce(term: str) -> None:
+        try:
+            with closing(api.iter_search_pages(
+                term, settings["category_id"], settings["max_price"], settings["full_search"]
+            )) as term_pages:
+                for items, term_total in term_pages:
+                    pages.put((term, items, term_total))
+                    if stop.is_set():
+                        break
+        except Exception as exc:  # noqa: BLE001 – one failing keyword must not end the stream
+            logger.error("Streaming search for '%s' failed: %s", term, exc)
+            if failures is not None:
+                failures[term] = str(exc) or type(exc).__name__
+        finally:
+            pages.put(done)
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(settings["max_workers"], len(search_terms) or 1),
+        thread_name_prefix="ebay-stream",
+    )
+    try:
+        for term in search_terms:
+            executor.submit(_produce, term)
+
+        term_totals: dict[str, int] = {}
+        remaining = len(search_terms)
+        while remaining:
+            message = pages.get()
+            if message is done:
+                remaining -= 1
+                continue
+            term, items, term_total = message
+            term_totals[term] = term_total
+            batch = enricher.enrich(items)
+            apply_tco(batch, tco_cfg)
+            _persist_listings(config, batch)
+            yield batch, sum(term_totals.values())
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        enricher.finish()
+
+
+def apply_tco(listings: List[ListingRecord], tco_cfg: dict[str, Any] | None) -> None:
     """Compute TCO/performance-per-dollar for each listing *in-place*."""
 
     if tco_cfg is None:
         tco_cfg = {}
 
-    for listing in listings:
-        tco, perf_per_dollar = calculate_tco_and_perf(listing, tco_cfg)
+    results = calculate_tco_and_perf_batch(listings, tco_cfg)
+    for listing, (tco, perf_per_dollar) in zip(listings, results):
         listing["tco"] = tco
         listing["performance_per_dollar"] = perf_per_dollar
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""Coalesce identical concurrent searches into one upstream execution.
+
+Two people pressing Search at once, or the alert job firing while the UI
+is in use, would otherwise each run the same eBay search.  ``SingleFlight``
+runs one call per key at a time and hands its result to everyone who asked
+for that key while it was running:
+
+* within a process, callers that arrive while a call is in flight wait on
+  its ``Future``;
+* across processes (when a directory is configured), the in-process leader
+  takes an exclusive ``flock`` on ``<dir>/<key digest>.lock``.  The process
+  that wins runs the call; processes that find the lock taken leave a
+  ``<key digest>.waiting`` marker and queue on it.  Only if such a marker
+  exists does the winner publish the result to ``<key digest>.result``, so
+  an uncontended call costs one lock and no serialisation.  A queued
+  process that finds a result finished after it asked uses it instead of
+  calling again.
+
+This is not a cache: a caller that arrives after a flight has finished
+runs a new one.  If the leader fails, in-process waiters get its exception
+and other processes simply run the call themselves.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Generic, Iterator, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover – non-POSIX: coalesce within a process only
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Published results older than this are removed when a new one is written.
+RESULT_RETENTION_SECONDS = 600
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time and share its result.
+
+    *directory* enables cross-process coalescing; *encode*/*decode* then
+    convert results to and from bytes for the published result file.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        encode: Optional[Callable[[T], bytes]] = None,
+        decode: Optional[Callable[[bytes], T]] = None,
+    ):
+        if directory is not None and (encode is None or decode is None):
+            raise ValueError("encode and decode are required for cross-process coalescing")
+        if directory is not None and fcntl is None:  # pragma: no cover
+            logger.warning("flock unavailable; searches are coalesced within each process only")
+            directory = None
+        self.directory = Path(directory) if directory is not None else None
+        self._encode = encode
+        self._decode = decode
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(result, shared)`` for *key*, calling *fn* only if needed.
+
+        ``shared`` is True when the result came from another caller's
+        execution.  Shared results are the same objects for every caller;
+        treat them as read-only.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result(), True
+
+        try:
+            result, shared = self._run_across_processes(key, fn)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, shared
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ------------------------------------------------------------------
+    def _run_across_processes(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        if self.directory is None:
+            return fn(), False
+        requested_at = time.time()
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        result_path = self.directory / f"{digest}.result"
+        waiting = self.directory / f"{digest}.waiting"
+        with self._flock(self.directory / f"{digest}.lock", waiting) as (locked, queued):
+            if queued:
+                published = self._read_result(result_path, key, finished_after=requested_at)
+                if published is not None:
+                    return published, True
+            result = fn()
+            if locked and self._take_waiting(waiting):
+                self._publish(result_path, key, result)
+            return result, False
+
+    @contextmanager
+    def _flock(self, path: Path, waiting: Path) -> Iterator[Tuple[bool, bool]]:
+        """Hold an exclusive lock on *path*; yields ``(locked, queued)``.
+
+        ``queued`` is True when another process held the lock first; the
+        *waiting* marker is then created so that process publishes its
+        result.  ``locked`` is False if the lock cannot be taken at all.
+        """
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(path, 'a+b')
+        except OSError as exc:
+            logger.warning("Could not open search lock %s: %s", path, exc)
+            yield False, False
+            return
+        try:
+            queued = False
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                queued = True
+                try:
+                    waiting.touch()
+                except OSError as exc:
+                    logger.warning("Could not mark %s: %s", waiting, exc)
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield True, queued
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+    @staticmethod
+    def _take_waiting(waiting: Path) -> bool:
+        """Consume the *waiting* marker; True if another process is queued."""
+        try:
+            waiting.unlink()
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return True  # cannot tell: publish to be safe
+        return True
+
+    def _read_result(self, path: Path, key: str, finished_after: float) -> Optional[T]:
+        try:
+            with path.open('rb') as fh:
+                header = json.loads(fh.readline())
+                if header.get('key') != key or header.get('finished_at', 0) <= finished_after:
+                    return None
+                return self._decode(fh.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not read shared search result %s: %s", path, exc)
+            return None
+
+    def _publish(self, path: Path, key: str, result: T) -> None:
+        try:
+            header = json.dumps({'key': key, 'finished_at': time.time()}).encode() + b'\n'
+            body = self._encode(result)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    fh.write(header)
+                    fh.write(body)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning("Could not publish shared search result %s: %s", path, exc)
+            return
+        self._remove_old_results(keep=path)
+
+    def _remove_old_results(self, keep: Path) -> None:
+        cutoff = time.time() - RESULT_RETENTION_SECONDS
+        for old in self.directory.glob('*.result'):
+            try:
+                if old != keep and old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except OSError:
+                continue
@@ -0,0 +1,158 @@
+"""Cold-start timing for the web app and the alert worker.
+
+Every gunicorn worker (including ones recycled by ``max_requests``) and
+every one-shot ``python -m src.alert_service`` pays its start-up cost before
+doing any work, so heavy modules (NumPy, cryptography, tenacity,
+APScheduler) and the reference tables are loaded on first use instead of
+at import time.  ``StartupTimer`` records how long each start-up phase took
+and logs one report line, with a warning when the total exceeds the
+configured budget (``app.startup_budget_ms``).
+
+Keep this module cheap to import: it is imported first by every entry
+point.  ``python -m src.startup`` measures the import time of each entry point in
+fresh interpreters and lists the slowest imports, which is how a
+regression in cold-start time is tracked down.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Measured from the first import of this module; entry points import it first.
+IMPORTED_AT = time.perf_counter()
+
+DEFAULT_BUDGET_MS = 1500
+ENTRY_POINTS = ('src.app', 'src.alert_service', 'src.alert_worker')
+
+
+class StartupTimer:
+    """Wall-clock timings of one process's start-up phases."""
+
+    def __init__(self, name: str, started: float = IMPORTED_AT):
+        self.name = name
+        self.started = started
+        self.phases: List[Tuple[str, float]] = []  # (label, milliseconds)
+        self._mark = started
+
+    def lap(self, label: str) -> None:
+        """Record the time since the previous lap (or the start) as *label*."""
+        now = time.perf_counter()
+        self.phases.append((label, (now - self._mark) * 1000))
+        self._mark = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._mark - self.started) * 1000
+
+    def report(self, budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> Dict:
+        """Log the timings and return them; warn when over *budget_ms*."""
+        summary = {
+            'name': self.name,
+            'total_ms': round(self.total_ms, 1),
+            'budget_ms': budget_ms,
+            'phases': {label: round(ms, 1) for label, ms in self.phases},
+        }
+        detail = ', '.join(f"{label} {ms:.0f} ms" for label, ms in self.phases)
+        if budget_ms is not None and self.total_ms > budget_ms:
+            logger.warning("%s started in %.0f ms, over the %.0f ms budget (%s)",
+                           self.name, self.total_ms, budget_ms, detail)
+        else:
+            logger.info("%s started in %.0f ms (%s)", self.name, self.total_ms, detail)
+        return summary
+
+
+def budget_from_config(config: Optional[Dict] = None) -> Optional[float]:
+    """Return ``app.startup_budget_ms`` (0 disables the warning).
+
+    *config* defaults to ``load_config()``; the default budget applies when
+    the configuration cannot be loaded.
+    """
+    if config is None:
+        from src.config import load_config
+
+        try:
+            config = load_config()
+        except Exception:  # a broken config is reported by whoever needs it
+            config = {}
+    value = (config.get('app') or {}).get('startup_budget_ms', DEFAULT_BUDGET_MS)
+    try:
+        return float(value) or None
+    except (TypeError, ValueError):
+        return DEFAULT_BUDGET_MS
+
+
+# ---------------------------------------------------------------------------
+# Cold-start report (python -m src.startup)
+# ---------------------------------------------------------------------------
+
+def _import_time_ms(module: str) -> float:
+    """Import *module* in a fresh interpreter and return the time taken."""
+    import subprocess
+
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+        env=dict(os.environ, LOG_LEVEL='ERROR'),
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int = 10) -> List[Tuple[str, float]]:
+    """Return the *top* top-level dependencies of *module* by cumulative import ms."""
+    import subprocess
+
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, check=True, env=dict(os.environ, LOG_LEVEL='ERROR'),
+    )
+    timings, children = [], []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # Children are listed before their parent: collect the direct
+        # imports until the measured module's own line closes the group.
+        if depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+        elif depth == 0:
+            if name.strip() == module:
+                timings = children
+            children = []
+    timings.sort(key=lambda t: t[1], reverse=True)
+    return timings[:top]
+
+
+def cold_start_report(modules=ENTRY_POINTS, runs: int = 3) -> Dict[str, Dict]:
+    """Median and best import time of each entry point over *runs* cold starts."""
+    import statistics
+
+    report = {}
+    for module in modules:
+        samples = [_import_time_ms(module) for _ in range(max(int(runs), 1))]
+        report[module] = {
+            'median_ms': round(statistics.median(samples), 1),
+            'best_ms': round(min(samples), 1),
+            'slowest_imports': [(name, round(ms, 1)) for name, ms in slowest_imports(module)],
+        }
+    return report
+
+
+def main() -> None:  # pragma: no cover - CLI
+    for module, stats in cold_start_report().items():
+        print(f"{module}: median {stats['median_ms']:.0f} ms, best {stats['best_ms']:.0f} ms")
+        for name, ms in stats['slowest_imports']:
+            print(f"    {ms:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -1,22 +1,26 @@
 import logging
-import re
-from typing import Dict, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils import capacity_gb, parse_capacity_gb
 
 logger = logging.getLogger(__name__)
 
 
-def _parse_capacity_to_gb(capacity_str: str) -> int:
-    """Convert strings like '8GB', '1TB' to integer GB. Returns 0 when unknown."""
-    if not capacity_str or capacity_str.upper() == 'N/A':
-        return 0
-    capacity_str = capacity_str.upper()
-    match = re.search(r"(\d+\.\d+|\d+)", capacity_str)
-    if not match:
-        return 0
-    val = float(match.group(1))
-    if 'TB' in capacity_str:
-        val *= 1024
-    return int(val)
+@lru_cache(maxsize=1)
+def _numpy():
+    """Return the NumPy module, importing it on first use; None if missing.
+
+    NumPy powers the columnar engine; without it the scalar path is used.
+    It is the slowest import in the app, so it is deferred until a batch
+    is actually scored.
+    """
+    try:
+        import numpy  # type: ignore
+    except ImportError:  # pragma: no cover – fall back to per-item loop
+        return None
+    return numpy
 
 
 def calculate_tco_and_perf(item: Dict, assumptions: Dict) -> Tuple[float, float]:
@@ -45,12 +49,12 @@ def calculate_tco_and_perf(item: Dict, assumptions: Dict) -> Tuple[float, float]
             shipping_cost = float(assumptions.get('shipping_cost_non_t_cpu', 35))
 
     # RAM shortfall
-    item_ram_gb = _parse_capacity_to_gb(item.get('ram'))
+    item_ram_gb = parse_capacity_gb(item.get('ram'))
     required_ram = float(assumptions.get('required_ram_gb', 16))
     ram_shortfall_cost = float(assumptions.get('ram_upgrade_flat_cost', 30)) if item_ram_gb < required_ram else 0.0
 
     # Storage shortfall
-    item_storage_gb = _parse_capacity_to_gb(item.get('storage'))
+    item_storage_gb = parse_capacity_gb(item.get('storage'))
     required_storage = float(assumptions.get('required_storage_gb', 128))
     storage_shortfall_cost = float(assumptions.get('storage_upgrade_flat_cost', 15)) if item_storage_gb < required_storage else 0.0
 
@@ -62,4 +66,280 @@ def calculate_tco_and_perf(item: Dict, assumptions: Dict) -> Tuple[float, float]
     perf = item.get('performance')
     perf_per_dollar = (float(perf) / tco) if perf and tco > 0 else None
 
-    return tco, perf_per_dollar 
\ No newline at end of file
+    return tco, perf_per_dollar 
+
+
+# ---------------------------------------------------------------------------
+# Columnar engine
+# ---------------------------------------------------------------------------
+
+@dataclass
+class TcoColumns:
+    """Per-listing TCO inputs as NumPy arrays.
+
+    ``valid`` marks rows with both a price and an idle-power figure; other
+    rows hold placeholder zeros and come out as ``None``.
+    """
+
+    valid: "np.ndarray"
+    price: "np.ndarray"
+    idle_watts: "np.ndarray"
+    ram_gb: "np.ndarray"
+    storage_gb: "np.ndarray"
+    free_shipping: "np.ndarray"
+    t_cpu: "np.ndarray"
+    performance: "np.ndarray"
+    has_performance: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    @classmethod
+    def from_items(cls, items: Sequence[Dict]) -> "TcoColumns":
+        """Extract the TCO inputs of enriched listing dicts in one pass."""
+        np = _numpy()
+        n = len(items)
+        valid = np.zeros(n, dtype=bool)
+        price = np.zeros(n)
+        idle_watts = np.zeros(n)
+        ram_gb = np.zeros(n)
+        storage_gb = np.zeros(n)
+        free_shipping = np.zeros(n, dtype=bool)
+        t_cpu = np.zeros(n, dtype=bool)
+        performance = np.zeros(n)
+        has_performance = np.zeros(n, dtype=bool)
+
+        for i, item in enumerate(items):
+            idle_raw = item.get('cpu_idle_power')
+            price_raw = item.get('price')
+            if idle_raw in (None, '') or price_raw in (None, ''):
+                continue
+            valid[i] = True
+            price[i] = float(price_raw)
+            idle_watts[i] = float(idle_raw)
+            ram_gb[i] = capacity_gb(item.get('ram'))
+            storage_gb[i] = capacity_gb(item.get('storage'))
+            free_shipping[i] = bool(item.get('free_shipping'))
+            t_cpu[i] = str(item.get('cpu_model', '')).upper().endswith('T')
+            perf = item.get('performance')
+            if perf:
+                has_performance[i] = True
+                performance[i] = float(perf)
+
+        return cls(valid, price, idle_watts, ram_gb, storage_gb,
+                   free_shipping, t_cpu, performance, has_performance)
+
+
+def _assumption_values(assumptions: Dict) -> Dict[str, float]:
+    """Read and convert the TCO assumptions once, with the scalar defaults."""
+    return {
+        'kwh_cost': float(assumptions.get('kwh_cost', 0.14)),
+        'lifespan_years': max(int(assumptions.get('lifespan_years', 5)), 1),
+        'shipping_cost_t_cpu': float(assumptions.get('shipping_cost_t_cpu', 10)),
+        'shipping_cost_non_t_cpu': float(assumptions.get('shipping_cost_non_t_cpu', 35)),
+        'required_ram_gb': float(assumptions.get('required_ram_gb', 16)),
+        'ram_upgrade_flat_cost': float(assumptions.get('ram_upgrade_flat_cost', 30)),
+        'required_storage_gb': float(assumptions.get('required_storage_gb', 128)),
+        'storage_upgrade_flat_cost': float(assumptions.get('storage_upgrade_flat_cost', 15)),
+    }
+
+
+def compute_tco_columns(cols: TcoColumns, values: Dict) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Return (tco, perf_per_dollar) arrays, NaN where the scalar path gives None.
+
+    *values* are converted assumptions (see ``_assumption_values``).  Each
+    may also be an array that broadcasts against the listing axis, e.g.
+    shape ``(scenarios, 1)``, to evaluate many scenarios at once.  The
+    operations mirror ``calculate_tco_and_perf`` term for term so results
+    are bit-identical.
+    """
+    np = _numpy()
+    energy_cost = (cols.idle_watts / 1000) * 24 * 365 * values['lifespan_years'] * values['kwh_cost']
+
+    shipping_cost = np.where(
+        cols.free_shipping,
+        0.0,
+        np.where(cols.t_cpu, values['shipping_cost_t_cpu'], values['shipping_cost_non_t_cpu']),
+    )
+    ram_shortfall_cost = np.where(cols.ram_gb < values['required_ram_gb'], values['ram_upgrade_flat_cost'], 0.0)
+    storage_shortfall_cost = np.where(
+        cols.storage_gb < values['required_storage_gb'], values['storage_upgrade_flat_cost'], 0.0
+    )
+    ac_adapter_cost = 0.0
+
+    tco = cols.price + energy_cost + shipping_cost + ram_shortfall_cost + storage_shortfall_cost + ac_adapter_cost
+    tco = np.where(cols.valid, tco, np.nan)
+
+    scored = cols.valid & cols.has_performance & (tco > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perf_per_dollar = np.where(scored, cols.performance / tco, np.nan)
+    return tco, perf_per_dollar
+
+
+def calculate_tco_and_perf_batch(
+    items: Sequence[Dict], assumptions: Dict
+) -> List[Tuple[Optional[float], Optional[float]]]:
+    """Vectorised ``calculate_tco_and_perf`` over a whole result set.
+
+    Returns one ``(tco, performance_per_dollar)`` tuple per item, identical
+    to calling the scalar function on each item.
+    """
+    if _numpy() is None or not items:
+        return [calculate_tco_and_perf(item, assumptions) for item in items]
+
+    cols = TcoColumns.from_items(items)
+    tco, perf_per_dollar = compute_tco_columns(cols, _assumption_values(assumptions))
+
+    tco_list = tco.tolist()
+    ppd_list = perf_per_dollar.tolist()
+    valid = cols.valid.tolist()
+    return [
+        (t, None if p != p else p) if ok else (None, None)  # NaN -> None
+        for ok, t, p in zip(valid, tco_list, ppd_list)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Sensitivity sweep
+# ---------------------------------------------------------------------------
+
+SWEEP_KEYS = ('kwh_cost', 'lifespan_years', 'ram_upgrade_flat_cost', 'storage_upgrade_flat_cost')
+MAX_SWEEP_SCENARIOS = 2000
+MAX_SWEEP_STEPS = 200
+
+
+def _expand_range(name: str, spec) -> List[float]:
+    """Turn ``[v1, v2, ...]`` or ``{'min', 'max', 'steps'}`` into a value list."""
+    if isinstance(spec, dict):
+        try:
+            lo, hi = float(spec['min']), float(spec['max'])
+            steps = int(spec.get('steps', 5))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid range for {name}: {spec!r}") from exc
+        if steps < 1 or steps > MAX_SWEEP_STEPS:
+            raise ValueError(f"steps for {name} must be between 1 and {MAX_SWEEP_STEPS}")
+        values = _numpy().linspace(lo, hi, steps).tolist()
+    elif isinstance(spec, (list, tuple)) and spec:
+        try:
+            values = [float(v) for v in spec]
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid values for {name}: {spec!r}") from exc
+    else:
+        raise ValueError(f"Range for {name} must be a non-empty list or a min/max/steps object")
+    if name == 'lifespan_years':
+        values = [max(int(v), 1) for v in values]
+    return values
+
+
+def _break_even_kwh(perf_a, fixed_a, energy_a, perf_b, fixed_b, energy_b) -> Optional[float]:
+    """kWh price at which two listings have equal perf/$ (None if never, or negative).
+
+    With ``tco = fixed + energy * kwh`` the listings tie when
+    ``perf_a * (fixed_b + energy_b * k) == perf_b * (fixed_a + energy_a * k)``.
+    """
+    denominator = perf_a * energy_b - perf_b * energy_a
+    if denominator == 0:
+        return None
+    k = float((perf_b * fixed_a - perf_a * fixed_b) / denominator)
+    return k if k >= 0 else None
+
+
+def sensitivity_sweep(
+    items: Sequence[Dict],
+    assumptions: Dict,
+    ranges: Dict,
+    top_n: int = 5,
+) -> Dict:
+    """Evaluate perf/$ for every listing over a grid of TCO assumptions.
+
+    *ranges* maps any of ``SWEEP_KEYS`` to a list of values or a
+    ``{'min', 'max', 'steps'}`` object; other assumptions keep their
+    configured value.  The whole grid is computed as one
+    ``(scenarios, listings)`` array.
+
+    Returns the baseline top-N (under *assumptions*), how stable each of
+    those listings' rank is across the grid, and the break-even kWh price
+    between every pair of baseline top candidates.
+    """
+    np = _numpy()
+    if np is None:
+        raise RuntimeError("NumPy is required for sensitivity sweeps")
+    unknown = set(ranges) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {', '.join(sorted(unknown))}; allowed: {', '.join(SWEEP_KEYS)}")
+    top_n = max(int(top_n), 1)
+
+    base = _assumption_values(assumptions)
+    axes = {name: _expand_range(name, spec) for name, spec in ranges.items()}
+    n_scenarios = int(np.prod([len(v) for v in axes.values()])) if axes else 1
+    if n_scenarios > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Grid has {n_scenarios} scenarios; the limit is {MAX_SWEEP_SCENARIOS}")
+
+    cols = TcoColumns.from_items(items)
+    if len(cols) == 0:
+        return {'scenarios': n_scenarios, 'axes': axes, 'baseline_top': [],
+                'rank_stability': [], 'break_even_kwh': []}
+
+    # Scenario grid: each swept parameter becomes a (scenarios, 1) column.
+    values = dict(base)
+    if axes:
+        mesh = np.meshgrid(*axes.values(), indexing='ij')
+        for name, grid in zip(axes, mesh):
+            values[name] = grid.reshape(-1, 1)
+    _, ppd = compute_tco_columns(cols, values)
+    ppd = np.broadcast_to(ppd, (n_scenarios, len(cols)))
+
+    # Rank listings per scenario, unscored listings last.
+    order = np.argsort(-np.nan_to_num(ppd, nan=-np.inf), axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    ranks[np.arange(n_scenarios)[:, None], order] = np.arange(len(cols))
+
+    _, base_ppd = compute_tco_columns(cols, base)
+    base_order = np.argsort(-np.nan_to_num(base_ppd, nan=-np.inf), kind='stable')
+    top = [int(i) for i in base_order[:top_n] if not np.isnan(base_ppd[i])]
+
+    def _describe(i: int) -> Dict:
+        item = items[i]
+        return {
+            'itemId': item.get('itemId'),
+            'title': item.get('title'),
+            'cpu_model': item.get('cpu_model'),
+            'price': item.get('price'),
+            'performance_per_dollar': float(base_ppd[i]),
+        }
+
+    stability = []
+    for baseline_rank, i in enumerate(top):
+        listing_ranks = ranks[:, i]
+        stability.append({
+            **_describe(i),
+            'baseline_rank': baseline_rank + 1,
+            'best_rank': int(listing_ranks.min()) + 1,
+            'worst_rank': int(listing_ranks.max()) + 1,
+            'share_ranked_first': float(np.mean(listing_ranks == 0)),
+            'share_in_top_n': float(np.mean(listing_ranks < top_n)),
+        })
+
+    # Break-even electricity price between each pair of top candidates,
+    # at the configured lifespan and upgrade costs.
+    fixed, _ = compute_tco_columns(cols, dict(base, kwh_cost=0.0))
+    energy = (cols.idle_watts / 1000) * 24 * 365 * base['lifespan_years']
+    break_even = []
+    for a_pos, a in enumerate(top):
+        for b in top[a_pos + 1:]:
+            break_even.append({
+                'a': items[a].get('itemId'),
+                'b': items[b].get('itemId'),
+                'kwh_cost': _break_even_kwh(
+                    cols.performance[a], fixed[a], energy[a],
+                    cols.performance[b], fixed[b], energy[b],
+                ),
+            })
+
+    return {
+        'scenarios': n_scenarios,
+        'axes': axes,
+        'baseline_top': [_describe(i) for i in top],
+        'rank_stability': stability,
+        'break_even_kwh': break_even,
+    }
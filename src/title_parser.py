@@ -1,5 +1,5 @@
 import re
-from typing import TypedDict, Optional
+from typing import Iterable, List, TypedDict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +19,9 @@ _STORAGE_RE = re.compile(
     re.I,
 )
 _RAM_RE = re.compile(r"(\d+\s*GB)\s*RAM|RAM\s*(\d+\s*GB)|(\d+GB)\s*(?:DDR[345])", re.I)
+_TOKEN_SPLIT_RE = re.compile(r"[\s,;/]+")
+_GB_TOKEN_RE = re.compile(r"(\d+)GB")
+_STORAGE_KEYWORDS = frozenset({"SSD", "HDD", "NVME", "SSHD", "EMMC", "DRIVE", "STORAGE"})
 
 _GENERIC_CPU_KEYWORDS = {
     'celeron': 'CELERON',
@@ -35,8 +38,11 @@ def parse_title(title_raw: str) -> ParsedTitle:
 
     Returns a dict with uppercase, whitespace-stripped values or 'N/A' when not found.
     """
-    title = title_raw.lower()
+    return _parse_lowered(title_raw.lower())
 
+
+def _parse_lowered(title: str) -> ParsedTitle:
+    """Parse an already lower-cased title (everything downstream is case-folded)."""
     cpu_model: str = ''
     is_generic_i_core = False
     generic_i_core_type: Optional[str] = None
@@ -84,16 +90,15 @@ def parse_title(title_raw: str) -> ParsedTitle:
 
     # Fallback: look for standalone values like "8GB" not directly followed by storage keywords
     if ram == 'N/A':
-        storage_keywords = {"SSD", "HDD", "NVME", "SSHD", "EMMC", "DRIVE", "STORAGE"}
         # Tokenize by whitespace and common separators
-        tokens = re.split(r"[\s,;/]+", title.upper())
+        tokens = _TOKEN_SPLIT_RE.split(title.upper())
         for idx, tok in enumerate(tokens):
-            gb_match = re.fullmatch(r"(\d+)GB", tok)
+            gb_match = _GB_TOKEN_RE.fullmatch(tok)
             if gb_match:
                 # Skip if the token is immediately followed or preceded by a storage keyword
                 next_tok = tokens[idx + 1] if idx + 1 < len(tokens) else ""
                 prev_tok = tokens[idx - 1] if idx - 1 >= 0 else ""
-                if next_tok in storage_keywords or prev_tok in storage_keywords:
+                if next_tok in _STORAGE_KEYWORDS or prev_tok in _STORAGE_KEYWORDS:
                     continue  # Likely describing storage, not RAM
                 ram = f"{gb_match.group(1)}GB"
                 break
@@ -104,4 +109,24 @@ def parse_title(title_raw: str) -> ParsedTitle:
         is_generic_intel_core_type=is_generic_i_core,
         ram=ram,
         storage=storage,
-    ) 
\ No newline at end of file
+    ) 
+
+
+def parse_titles(titles: Iterable[str]) -> List[ParsedTitle]:
+    """Parse many titles at once, in input order.
+
+    Titles that are identical once lower-cased (relists, the same listing
+    returned for several keywords) are parsed once and share a single
+    result object, so the returned list stays small even for large,
+    repetitive batches.  Treat the results as read-only.  Each entry equals
+    ``parse_title`` of the corresponding input.
+    """
+    seen: dict[str, ParsedTitle] = {}
+    results: List[ParsedTitle] = []
+    for title_raw in titles:
+        key = title_raw.lower()
+        parsed = seen.get(key)
+        if parsed is None:
+            parsed = seen[key] = _parse_lowered(key)
+        results.append(parsed)
+    return results
@@ -0,0 +1,117 @@
+"""OAuth token file shared by every process that talks to eBay.
+
+The web workers and the alert worker all read the same token file.
+Without coordination each of them would call the identity endpoint when
+the token nears expiry.  ``TokenStore.locked()`` serialises refreshes with
+an exclusive ``flock`` on ``<token file>.lock``: the process holding the
+lock re-reads the file first and only requests a new token if nobody else
+has just stored one.  Writes are atomic (temp file + rename), so readers
+never see a partially written token and do not need the lock.
+
+The file is Fernet-encrypted when ``EBAY_TOKEN_ENC_KEY`` is set.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover – non-POSIX: in-process locking only
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore:
+    """Read, write and lock the token file at *path*."""
+
+    def __init__(self, path: Path, fernet: Any = None):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._fernet = fernet
+        self._thread_lock = threading.Lock()  # flock does not exclude threads sharing a process
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """Return the stored token data, or None if missing or unreadable."""
+        try:
+            raw_bytes = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            logger.error("Error loading token: %s", exc)
+            return None
+
+        if self._fernet is not None:
+            from cryptography.fernet import InvalidToken  # type: ignore
+
+            try:
+                raw_bytes = self._fernet.decrypt(raw_bytes)
+            except InvalidToken:
+                logger.error("Failed to decrypt token file. Wrong key?")
+                return None
+
+        try:
+            data = json.loads(raw_bytes.decode())
+            datetime.fromisoformat(data['expiry'])
+            data['access_token']
+        except Exception as json_exc:
+            logger.error("Token file is corrupt or not JSON: %s", json_exc)
+            return None
+        return data
+
+    def write(self, token_data: Dict[str, Any]) -> None:
+        """Atomically replace the token file with *token_data* (mode 0600)."""
+        try:
+            # Ensure parent directory exists (e.g. /run/secrets)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            data_bytes = json.dumps(token_data).encode()
+            if self._fernet is not None:
+                data_bytes = self._fernet.encrypt(data_bytes)
+
+            fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:  # mkstemp creates the file 0600
+                    fh.write(data_bytes)
+                os.replace(tmp_name, self.path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+            logger.info("Token saved to %s", self.path)
+        except Exception as e:
+            logger.error("Error saving token: %s", e)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the refresh lock, shared by all threads and processes.
+
+        If the lock file cannot be created the lock degrades to the calling
+        process only.
+        """
+        with self._thread_lock:
+            lock_file = None
+            if fcntl is not None:
+                try:
+                    self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                    lock_file = open(self.lock_path, 'a+b')
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                except OSError as exc:
+                    logger.warning("Could not lock %s: %s", self.lock_path, exc)
+                    if lock_file is not None:
+                        lock_file.close()
+                    lock_file = None
+            try:
+                yield
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    lock_file.close()
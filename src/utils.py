@@ -1,4 +1,7 @@
 import logging
+import re
+from functools import lru_cache
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -15,4 +18,24 @@ def is_precise_substring_match(search_term: str, text: str) -> bool:
         return not text[idx + len(search_term)].isalnum()
     except Exception as exc:  # pragma: no cover
         logger.error("Error in is_precise_substring_match: %s", exc)
-        return False 
\ No newline at end of file
+        return False
+
+
+def parse_capacity_gb(capacity_str: Optional[str]) -> int:
+    """Convert strings like '8GB', '1TB' to integer GB. Returns 0 when unknown."""
+    if not capacity_str or capacity_str.upper() == 'N/A':
+        return 0
+    capacity_str = capacity_str.upper()
+    match = re.search(r"(\d+\.\d+|\d+)", capacity_str)
+    if not match:
+        return 0
+    val = float(match.group(1))
+    if 'TB' in capacity_str:
+        val *= 1024
+    return int(val)
+
+
+@lru_cache(maxsize=4096)
+def capacity_gb(capacity_str: Optional[str]) -> int:
+    """``parse_capacity_gb`` memoised: RAM/storage strings ('8GB', '256GB', ...) repeat heavily."""
+    return parse_capacity_gb(capacity_str)
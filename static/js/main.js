@@ -5,6 +5,8 @@ let currentSort = {
 let currentResults = [];  // Store results in memory
 let filteredResults = []; // Store filtered results
 let totalFoundAPI = 0;    // Store total found by API
+let resultsAgeSeconds = null; // Age of the (possibly cached) result set
+let resultsRefreshing = false; // Server is refreshing the result set in the background
 let originalRawResults = []; // Store raw results before any TCO calculation for recalculation
 
 
@@ -148,11 +150,21 @@ function displayResults(resultsToDisplay = filteredResults) { // Parameter renam
     });
 }
 
+function formatAge(seconds) {
+    if (seconds < 60) return `${Math.round(seconds)}s`;
+    if (seconds < 3600) return `${Math.round(seconds / 60)} min`;
+    return `${(seconds / 3600).toFixed(1)} h`;
+}
+
 function updateSummary() {
     const summaryElement = document.getElementById('results-summary');
     const shownCount = filteredResults.length; 
     if (shownCount > 0 || totalFoundAPI > 0) { 
-         summaryElement.textContent = `Showing ${shownCount} of ${totalFoundAPI} total listings found by API.`;
+         let summary = `Showing ${shownCount} of ${totalFoundAPI} total listings found by API.`;
+         if (resultsAgeSeconds !== null) {
+             summary += ` Results are ${formatAge(resultsAgeSeconds)} old${resultsRefreshing ? ' (refreshing in background)' : ''}.`;
+         }
+         summaryElement.textContent = summary;
     } else {
          summaryElement.textContent = ''; 
     }
@@ -178,7 +190,13 @@ function search() {
         },
         body: JSON.stringify({}) 
     })
-    .then(response => response.json())
+    .then(response => {
+        // Age of the cached result set; sent as a header so the body stays
+        // byte-identical (and pre-compressed) per result-set version.
+        const age = parseInt(response.headers.get('Age'), 10);
+        resultsAgeSeconds = Number.isNaN(age) ? null : age;
+        return response.json();
+    })
     .then(data => {
         if (data.full_search_enabled) {
             loading.textContent = "Full search enabled. This may take a while...";
@@ -233,6 +251,7 @@ function search() {
             });
             
             totalFoundAPI = data.total_found || 0; 
+            resultsRefreshing = Boolean(data.refreshing);
             
             filteredResults = [...currentResults]; 
             
@@ -245,6 +264,7 @@ function search() {
             filteredResults = [];
             originalRawResults = [];
             totalFoundAPI = 0;
+            resultsAgeSeconds = null;
             updateSummary(); 
         }
     })
@@ -255,6 +275,7 @@ function search() {
         filteredResults = [];
         originalRawResults = [];
         totalFoundAPI = 0;
+        resultsAgeSeconds = null;
         updateSummary(); 
     })
     .finally(() => {
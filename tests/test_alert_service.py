@@ -0,0 +1,23 @@
+"""
+Tests for the daily alert run's choice between incremental and full passes.
+"""
+import src.alert_service as alert_service
+
+
+def test_full_pass_pages_through_every_result(monkeypatch, tmp_path):
+    config = {
+        'database': {'url': f"sqlite:///{tmp_path / 'listings.db'}"},
+        'alerts': {'incremental': True, 'full_pass_hours': 24, 'recipients': []},
+    }
+    searches = []
+    monkeypatch.setattr(alert_service, 'load_config', lambda: config)
+    monkeypatch.setattr(alert_service, 'find_listings',
+                        lambda cfg, **kwargs: searches.append(kwargs) or ([], 0))
+
+    alert_service.run_daily_search_and_alert()  # no full pass recorded yet
+    alert_service.run_daily_search_and_alert()
+
+    assert searches == [
+        {'full_search_override': True, 'incremental': False},
+        {'full_search_override': False, 'incremental': True},
+    ]
@@ -0,0 +1,110 @@
+"""
+Tests for Accept-Encoding negotiation and reusable compressed bodies.
+"""
+import gzip
+
+import pytest
+
+import src.compression as compression
+from src.compression import CompressedBodyCache, encoded_response, negotiate
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0, deflate', None),
+    ('identity', None),
+    ('*', 'br'),
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_negotiate_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert negotiate('br, gzip') == 'gzip'
+    assert negotiate('br') is None
+
+
+def test_body_compressed_once_per_identity():
+    cache = CompressedBodyCache()
+    calls = []
+
+    def body():
+        calls.append(1)
+        return b'{"listings": []}' * 200
+
+    first = cache.get(('k', 'v1'), 'gzip', body)
+    second = cache.get(('k', 'v1'), 'gzip', body)
+    cache.get(('k', 'v2'), 'gzip', body)
+
+    assert first is second
+    assert len(calls) == 2
+    assert gzip.decompress(first) == b'{"listings": []}' * 200
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompressedBodyCache(max_entries=2)
+    cache.get('a', 'identity', lambda: b'a')
+    cache.get('b', 'identity', lambda: b'b')
+    cache.get('a', 'identity', lambda: b'x')
+    cache.get('c', 'identity', lambda: b'c')
+
+    assert cache.get('a', 'identity', lambda: b'new') == b'a'
+    assert cache.get('b', 'identity', lambda: b'new') == b'new'
+
+
+def test_encoded_response_skips_small_bodies():
+    response = encoded_response(CompressedBodyCache(), 'k', lambda: b'{}', 'application/json', 'gzip')
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_static_assets_are_compressed():
+    from src.app import create_app
+
+    client = create_app().test_client()
+    plain = client.get('/static/js/main.js')
+    encoded = client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip'})
+
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(encoded.data) == plain.data
+    assert int(encoded.headers['Content-Length']) == len(encoded.data) < len(plain.data)
+    assert encoded.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    plain.close()
+    encoded.close()
+
+    revalidated = client.get('/static/js/main.js',
+                             headers={'Accept-Encoding': 'gzip', 'If-None-Match': encoded.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == encoded.headers['ETag']
+    revalidated.close()
+
+
+def test_new_version_replaces_the_previous_bodies():
+    cache = CompressedBodyCache()
+    body = b'{"listings": []}' * 200
+    for encoding in ('identity', 'gzip'):
+        cache.get(('k', 'v1'), encoding, lambda: body, slot='k')
+    cache.get(('other', 'v1'), 'identity', lambda: b'o', slot='other')
+
+    cache.get(('k', 'v2'), 'identity', lambda: body, slot='k')
+
+    assert cache.size == len(body) + 1  # v1 bodies dropped, other slot kept
+    calls = []
+    cache.get(('k', 'v1'), 'identity', lambda: calls.append(1) or body, slot='k')
+    assert calls == [1]
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = CompressedBodyCache(max_bytes=10)
+    cache.get('a', 'identity', lambda: b'123456')
+    cache.get('b', 'identity', lambda: b'123456')
+    assert cache.size == 6
+    assert cache.get('a', 'identity', lambda: b'new') == b'new'
+
+    cache.get('big', 'identity', lambda: b'x' * 50)  # larger than the bound: kept alone
+    assert cache.size == 50
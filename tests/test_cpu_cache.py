@@ -0,0 +1,54 @@
+"""
+Tests for the persistent CPU resolution cache.
+"""
+from src.cpu_cache import CpuResolutionCache
+from src.enrich_item import enrich_item
+
+
+def test_persists_hits_and_misses(tmp_path):
+    path = tmp_path / 'cpu_cache.db'
+    cache = CpuResolutionCache('v1', path)
+    cache.put('I5-8500T', 9000, 8.0)
+    cache.put('I9-99999X', None, None)
+    cache.flush()
+
+    reopened = CpuResolutionCache('v1', path)
+    assert reopened.get('I5-8500T') == (9000, 8.0)
+    assert reopened.get('I9-99999X') == (None, None)  # known miss
+    assert reopened.get('N100') is None  # never resolved
+
+
+def test_new_reference_version_invalidates(tmp_path):
+    path = tmp_path / 'cpu_cache.db'
+    cache = CpuResolutionCache('v1', path)
+    cache.put('I5-8500T', 9000, 8.0)
+    cache.flush()
+
+    assert len(CpuResolutionCache('v2', path)) == 0
+    assert len(CpuResolutionCache('v1', path)) == 0  # old rows were dropped
+
+
+def test_enrich_item_uses_cached_resolution():
+    cache = CpuResolutionCache('v1')
+    item = {'title': 'Lenovo Tiny i5-8500T 8GB RAM 256GB SSD', 'price': {'value': '99.00'}}
+    missing_pm, missing_idle = set(), set()
+
+    first = enrich_item(item, {'I5-8500T': 9000}, {'I5-8500T': 8.0},
+                        missing_pm, missing_idle, resolution_cache=cache)
+    # Reference tables are empty now; the answer must come from the memo.
+    second = enrich_item(item, {}, {}, missing_pm, missing_idle, resolution_cache=cache)
+
+    assert first['performance'] == second['performance'] == 9000
+    assert first['cpu_idle_power'] == second['cpu_idle_power'] == 8.0
+    assert not missing_pm and not missing_idle
+
+
+def test_enrich_item_records_known_misses():
+    cache = CpuResolutionCache('v1')
+    item = {'title': 'Mystery box i9-99999X', 'price': {'value': '10'}}
+    missing_pm, missing_idle = set(), set()
+
+    enrich_item(item, {}, {}, missing_pm, missing_idle, resolution_cache=cache)
+
+    assert cache.get('I9-99999X') == (None, None)
+    assert missing_pm == {'I9-99999X'} and missing_idle == {'I9-99999X'}
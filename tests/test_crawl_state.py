@@ -0,0 +1,60 @@
+"""
+Tests for incremental-crawl high-water marks.
+"""
+from src.crawl_state import (
+    HighWaterMark,
+    crawl_key,
+    full_pass_due,
+    load_high_water_mark,
+    record_full_pass,
+    save_high_water_mark,
+)
+from src.database import get_engine
+
+
+def _item(item_id, created):
+    return {'itemId': item_id, 'itemCreationDate': created}
+
+
+def test_seen_respects_boundary_ids():
+    mark = HighWaterMark('2024-01-01T10:00:00.000Z', frozenset({'a'}))
+
+    assert mark.seen(_item('old', '2024-01-01T09:59:59.000Z'))
+    assert mark.seen(_item('a', '2024-01-01T10:00:00.000Z'))
+    assert not mark.seen(_item('b', '2024-01-01T10:00:00.000Z'))  # same instant, not yet seen
+    assert not mark.seen(_item('new', '2024-01-01T10:00:01.000Z'))
+    assert not mark.seen({'itemId': 'undated'})
+    assert not HighWaterMark().seen(_item('x', '2000-01-01T00:00:00.000Z'))
+
+
+def test_advance_keeps_ids_at_newest_instant():
+    mark = HighWaterMark('2024-01-01T10:00:00.000Z', frozenset({'a'}))
+
+    same = mark.advance([_item('b', '2024-01-01T10:00:00.000Z'), _item('z', '2024-01-01T09:00:00.000Z')])
+    newer = same.advance([_item('c', '2024-01-01T11:00:00.000Z')])
+
+    assert same == HighWaterMark('2024-01-01T10:00:00.000Z', frozenset({'a', 'b'}))
+    assert newer == HighWaterMark('2024-01-01T11:00:00.000Z', frozenset({'c'}))
+    assert mark.advance([]) == mark
+
+
+def test_marks_persist_per_search(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    key = crawl_key('n100', 171957, 250)
+    mark = HighWaterMark('2024-01-01T10:00:00.000Z', frozenset({'a', 'b'}))
+
+    assert load_high_water_mark(engine, key) == HighWaterMark()
+    save_high_water_mark(engine, key, mark)
+
+    assert load_high_water_mark(engine, key) == mark
+    assert load_high_water_mark(engine, crawl_key('n100', 171957, 300)) == HighWaterMark()
+
+
+def test_full_pass_due_after_interval(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+
+    assert full_pass_due(engine, 24)  # never ran
+    record_full_pass(engine)
+    assert not full_pass_due(engine, 24)
+    assert full_pass_due(engine, 1e-9)
+    assert not full_pass_due(engine, 0)  # disabled
@@ -0,0 +1,106 @@
+"""
+Tests for reference data loading and the substring lookup index.
+"""
+import re
+
+import pytest
+
+from src.data_loader import (
+    SubstringIndex,
+    load_idle_power_data,
+    load_passmark_data,
+)
+from src.utils import is_precise_substring_match
+
+
+def _linear_scan(term, mapping):
+    """The original enrich_item fallback, kept here as the reference."""
+    for key, val in mapping.items():
+        if is_precise_substring_match(term, key):
+            return val
+    return None
+
+
+def _query_terms(mapping):
+    """CPU-like strings as produced by the title parser, plus raw key tokens."""
+    terms = set()
+    for key in mapping:
+        for match in re.finditer(r"(I[3579])-(\d{4,5}[A-Z\d]*)", key):
+            terms.add(match.group(0))
+            terms.add(f"{match.group(1)}-{match.group(2)[:-1]}")  # prefix, often a miss
+        for match in re.finditer(r"\bN\d{3,4}\b", key):
+            terms.add(match.group(0))
+    tokens = sorted({tok for key in mapping for tok in key.split()})
+    terms.update(tokens[::25])
+    terms.update({'I5-8500T', 'I7-6700', 'N100', 'N95', 'I9-99999X', 'E5', 'X', ''})
+    return sorted(terms)
+
+
+@pytest.mark.parametrize('loader', [load_passmark_data, load_idle_power_data])
+def test_index_matches_linear_scan(loader):
+    mapping = loader()
+    assert mapping, "reference data file missing"
+    index = SubstringIndex(mapping)
+
+    for term in _query_terms(mapping):
+        assert index.find(term) == _linear_scan(term, mapping), term
+
+
+def test_index_returns_first_match_in_mapping_order():
+    mapping = {'INTEL CORE I5-8500T @ 2.10GHZ': 1, 'INTEL I5-8500T': 2, 'I5-8500TE': 3}
+    index = SubstringIndex(mapping)
+
+    assert index.find('I5-8500T') == 1
+    assert index.find('I5-8500TE') == 3
+    assert index.find('I5-850') is None
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    import src.data_loader as data_loader
+
+    monkeypatch.setattr(data_loader, 'DATA_DIR', tmp_path)
+    data_loader._load_compiled.cache_clear()
+    yield tmp_path
+    data_loader._load_compiled.cache_clear()
+
+
+def _load(name='passmark.txt'):
+    import src.data_loader as data_loader
+
+    data_loader._load_compiled.cache_clear()
+    return data_loader._load_compiled(name, data_loader._parse_passmark)
+
+
+def test_compiled_cache_reused_and_rebuilt(data_dir, mocker):
+    import os
+    import src.data_loader as data_loader
+
+    source = data_dir / 'passmark.txt'
+    source.write_text('INTEL I5-8500T\t9,000\nN100\t5,400\n', encoding='utf-8')
+
+    mapping, postings = _load()
+    assert mapping == {'INTEL I5-8500T': 9000, 'N100': 5400}
+    assert (data_dir / 'passmark.txt.marshal').exists()
+    assert SubstringIndex(mapping, postings).find('I5-8500T') == 9000
+
+    parse = mocker.spy(data_loader, '_parse_passmark')
+    assert _load()[0] == mapping  # size + mtime match
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert _load()[0] == mapping  # touched only: hash still matches
+    assert parse.call_count == 0
+
+    source.write_text('INTEL I5-8500T\t9,100\nN100\t5,400\n', encoding='utf-8')
+    assert _load()[0]['INTEL I5-8500T'] == 9100
+
+
+def test_corrupt_compiled_file_is_rebuilt(data_dir):
+    (data_dir / 'passmark.txt').write_text('N100\t5,400\n', encoding='utf-8')
+    (data_dir / 'passmark.txt.marshal').write_bytes(b'not marshal')
+
+    assert _load()[0] == {'N100': 5400}
+
+
+def test_missing_source(data_dir):
+    assert _load('nope.txt') is None
@@ -5,6 +5,7 @@ import pytest
 from flask import Flask
 from src.database import db as sqlalchemy_db, init_app, Listing # Updated import
 from datetime import datetime, timezone
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 @pytest.fixture(scope='session')
@@ -139,4 +140,112 @@ def test_error_handling(db, app, sample_listing_data): # sample_listing_data mig
 
 # Keep other imports if used by remaining tests, e.g. datetime, SQLAlchemyError
 from datetime import datetime # Already imported at top
-# from sqlalchemy.exc import SQLAlchemyError # If we add tests that expect this 
\ No newline at end of file
+# from sqlalchemy.exc import SQLAlchemyError # If we add tests that expect this 
+
+def _enriched(item_id, price):
+    return {
+        'itemId': item_id,
+        'title': f'Server {item_id}',
+        'price': price,
+        'item_url': f'http://example.com/item/{item_id}',
+        'cpu_model': 'I5-8500T',
+        'ram': '8GB',
+        'storage': '256GB',
+        'tco': price * 1.5,
+        'performance': 6000,
+        'cpu_idle_power': '7.5',
+        'performance_per_dollar': 6000 / (price * 1.5),
+    }
+
+
+def test_bulk_upsert_inserts_and_updates(tmp_path):
+    from src.database import bulk_upsert_listings, get_engine
+
+    engine = get_engine(f"sqlite:///{tmp_path / 'data' / 'listings.db'}")
+
+    assert bulk_upsert_listings([_enriched('1', 100.0), _enriched('2', 150.0)], engine) == 2
+    assert bulk_upsert_listings([_enriched('2', 120.0), dict(_enriched('3', 90.0), price=None)], engine) == 1
+
+    with engine.connect() as conn:
+        rows = dict(conn.execute(select(Listing.item_id, Listing.price)).all())
+    assert rows == {'1': 100.0, '2': 120.0}
+
+
+def test_bulk_upsert_large_batch(tmp_path):
+    from sqlalchemy import func
+    from src.database import bulk_upsert_listings, get_engine
+
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    batch = [_enriched(str(i), 100.0 + i % 50) for i in range(10_000)]
+
+    assert bulk_upsert_listings(batch, engine) == 10_000
+    assert bulk_upsert_listings(batch, engine) == 10_000
+
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Listing)).scalar() == 10_000
+
+
+def test_bulk_upsert_numeric_columns_and_seen_times(tmp_path):
+    from src.database import bulk_upsert_listings, get_engine
+
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    bulk_upsert_listings([dict(_enriched('1', 100.0), storage='1TB')], engine)
+    with engine.connect() as conn:
+        first = conn.execute(select(Listing.__table__)).mappings().one()
+    bulk_upsert_listings([_enriched('1', 90.0)], engine)
+    with engine.connect() as conn:
+        second = conn.execute(select(Listing.__table__)).mappings().one()
+
+    assert (first['ram_gb'], first['storage_gb'], first['idle_watts']) == (8, 1024, 7.5)
+    assert first['performance'] == 6000.0
+    assert second['perf_per_dollar'] == pytest.approx(6000 / 135.0)
+    assert second['first_seen'] == first['first_seen']
+    assert second['last_seen'] > first['last_seen']
+
+
+def test_read_api_queries(tmp_path):
+    from src.database import bulk_upsert_listings, get_engine, listings_for_cpu, top_listings_by_perf_per_dollar
+
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    bulk_upsert_listings(
+        [_enriched('1', 100.0), _enriched('2', 200.0), dict(_enriched('3', 150.0), cpu_model='N100')],
+        engine,
+    )
+
+    assert [r['item_id'] for r in top_listings_by_perf_per_dollar(engine, limit=2)] == ['1', '3']
+    assert [r['item_id'] for r in top_listings_by_perf_per_dollar(engine, max_price=180)] == ['1', '3']
+    assert [r['item_id'] for r in listings_for_cpu(engine, 'I5-8500T')] == ['1', '2']
+
+
+@pytest.mark.parametrize('where, index', [
+    ('price <= 200 AND perf_per_dollar IS NOT NULL ORDER BY perf_per_dollar DESC LIMIT 10', 'ix_listings_ppd_price'),
+    ("cpu_model = 'N100' ORDER BY perf_per_dollar DESC", 'ix_listings_cpu_ppd'),
+])
+def test_queries_use_index_without_sort(tmp_path, where, index):
+    from sqlalchemy import text
+    from src.database import get_engine
+
+    engine = get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+    with engine.connect() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(text(f'EXPLAIN QUERY PLAN SELECT * FROM listings WHERE {where}')))
+
+    assert f'USING INDEX {index}' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_migration_adds_new_columns(tmp_path):
+    import sqlite3
+    from src.database import get_engine
+
+    path = tmp_path / 'old.db'
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            'CREATE TABLE listings (item_id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, price FLOAT NOT NULL, '
+            'url VARCHAR NOT NULL, cpu_model VARCHAR, ram VARCHAR, storage VARCHAR, tco FLOAT, last_updated DATETIME)'
+        )
+        conn.execute("INSERT INTO listings (item_id, title, price, url) VALUES ('1', 't', 1.0, 'u')")
+
+    engine = get_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        row = conn.execute(select(Listing.__table__)).mappings().one()
+    assert row['item_id'] == '1' and row['perf_per_dollar'] is None
@@ -7,6 +7,7 @@ import sys
 import logging
 import base64
 import json
+import time
 import yaml
 from src.ebay_api import EBayAPI
 import pytest
@@ -45,21 +46,21 @@ def test_ebay_api(monkeypatch, mocker):
     )
     logger.info("✅ EBayAPI initialized successfully!")
 
-    # Mock requests.post for get_oauth_token
+    # Mock the pooled session's post for get_oauth_token
     mock_oauth_response = MagicMock()
     mock_oauth_response.json.return_value = {
         'access_token': 'fake_token',
         'expires_in': 7200
     }
     mock_oauth_response.raise_for_status = MagicMock() # Ensure it doesn't raise
-    mocker.patch('requests.post', return_value=mock_oauth_response)
+    mocker.patch('requests.Session.post', return_value=mock_oauth_response)
     
     logger.info("Getting OAuth token (mocked)...")
     assert ebay_api.get_oauth_token(), "Failed to get OAuth token (mocked)"
     assert ebay_api.token == 'fake_token'
     logger.info("✅ Successfully obtained access token (mocked)!")
     
-    # Mock requests.get for search_items
+    # Mock the pooled session's get for search_items
     mock_search_response = MagicMock()
     dummy_item_summary = {
         'itemId': 'v1|12345|0',
@@ -74,7 +75,7 @@ def test_ebay_api(monkeypatch, mocker):
     }
     mock_search_response.raise_for_status = MagicMock()
     
-    # Mock requests.get for get_item_details
+    # Mock the pooled session's get for get_item_details
     mock_details_response = MagicMock()
     mock_details_response.json.return_value = {
         'itemId': 'v1|12345|0',
@@ -86,8 +87,8 @@ def test_ebay_api(monkeypatch, mocker):
     }
     mock_details_response.raise_for_status = MagicMock()
 
-    # We need to make sure requests.get is patched correctly for different URLs
-    # A more robust way is to use a side_effect function for mocker.patch('requests.get')
+    # We need to make sure Session.get is patched correctly for different URLs
+    # A more robust way is to use a side_effect function for mocker.patch('requests.Session.get')
     def mock_requests_get_side_effect(*args, **kwargs):
         if 'item_summary/search' in args[0]: # URL for search
             return mock_search_response
@@ -95,7 +96,7 @@ def test_ebay_api(monkeypatch, mocker):
             return mock_details_response
         raise ValueError(f"Unexpected GET request to {args[0]}")
 
-    mocker.patch('requests.get', side_effect=mock_requests_get_side_effect)
+    mocker.patch('requests.Session.get', side_effect=mock_requests_get_side_effect)
 
     logger.info("Testing search functionality (mocked)...")
     results, total_found = ebay_api.search_items(keywords="laptop")
@@ -115,6 +116,171 @@ def test_ebay_api(monkeypatch, mocker):
         logger.info("✅ Item lookup completed successfully (mocked)!")
         # ... (log more details if needed)
 
+
+def test_search_items_parallel_pages(monkeypatch, mocker, tmp_path):
+    """Full search prefetches remaining pages concurrently and keeps offset order."""
+    import src.ebay_api as ebay_api_module
+
+    monkeypatch.setattr(ebay_api_module, 'MAX_PAGES_TO_FETCH', 4)
+    api = EBayAPI(app_id='id', cert_id='secret', sandbox=False,
+                  token_file=str(tmp_path / 'token.json'), page_concurrency=3)
+    api.token = 'fake_token'
+
+    total = 1000  # five pages of 200, capped at four
+    requested_offsets = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        offset = params['offset']
+        requested_offsets.append(offset)
+        resp = MagicMock()
+        resp.raise_for_status = MagicMock()
+        resp.json.return_value = {
+            'total': total,
+            'itemSummaries': [{'itemId': f'{offset}-{i}'} for i in range(params['limit'])],
+            'next': f'https://api.ebay.com/buy/browse/v1/item_summary/search?offset={offset + 200}',
+        }
+        return resp
+
+    mocker.patch('requests.Session.get', side_effect=fake_get)
+
+    results, total_found = api.search_items('laptop', full_search=True)
+
+    assert total_found == total
+    assert sorted(requested_offsets) == [0, 200, 400, 600]
+    assert len(results) == 800
+    assert [r['itemId'] for r in results[::200]] == ['0-0', '200-0', '400-0', '600-0']
+
+
+def test_closing_page_stream_cancels_pending_pages(mocker, tmp_path):
+    """Pages not yet requested are cancelled when the caller stops reading."""
+    api = EBayAPI(app_id='id', cert_id='secret', sandbox=False,
+                  token_file=str(tmp_path / 'token.json'), page_concurrency=2)
+    api.token = 'fake_token'
+    requested_offsets = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        requested_offsets.append(params['offset'])
+        time.sleep(0.05)
+        resp = MagicMock()
+        resp.json.return_value = {'total': 2000,
+                                  'itemSummaries': [{'itemId': str(params['offset'])}]}
+        return resp
+
+    mocker.patch('requests.Session.get', side_effect=fake_get)
+
+    pages = api.iter_search_pages('laptop', full_search=True)
+    next(pages)  # first page
+    next(pages)  # first prefetched page
+    pages.close()
+
+    # Ten pages in total: the first, the two the workers fetched first and
+    # at most the two they had moved on to when the stream was closed.
+    assert len(requested_offsets) <= 5
+
+
+def test_session_pool_and_timeouts(tmp_path):
+    """Client owns one pooled keep-alive session sized for page concurrency."""
+    api = EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'),
+                  page_concurrency=16, pool_size=4, connect_timeout=2, read_timeout=7)
+
+    adapter = api.session.get_adapter('https://api.ebay.com')
+    assert adapter._pool_maxsize == 16
+    assert api.timeout == (2, 7)
+    assert 'gzip' in api.session.headers['Accept-Encoding']
+
+
+def test_incremental_search_stops_at_high_water_mark(mocker, tmp_path):
+    """Newest-first pages are fetched only until already-seen listings appear."""
+    from src.crawl_state import HighWaterMark
+
+    api = EBayAPI(app_id='id', cert_id='secret', sandbox=False,
+                  token_file=str(tmp_path / 'token.json'), page_concurrency=4)
+    api.token = 'fake_token'
+
+    # 1000 listings, one minute apart, newest first.
+    def created(n):
+        return f'2024-01-01T{n // 60:02d}:{n % 60:02d}:00.000Z'
+
+    requests_made = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        requests_made.append(dict(params))
+        offset = params['offset']
+        resp = MagicMock()
+        resp.raise_for_status = MagicMock()
+        resp.json.return_value = {
+            'total': 1000,
+            'itemSummaries': [{'itemId': str(n), 'itemCreationDate': created(n)}
+                              for n in range(999 - offset, 999 - offset - 200, -1)],
+            'next': f'https://api.ebay.com/buy/browse/v1/item_summary/search?offset={offset + 200}',
+        }
+        return resp
+
+    mocker.patch('requests.Session.get', side_effect=fake_get)
+
+    mark = HighWaterMark(created(700), frozenset({'700'}))
+    results, _ = api.search_items('laptop', newer_than=mark)
+
+    assert [r['itemId'] for r in results] == [str(n) for n in range(999, 700, -1)]
+    assert [p['offset'] for p in requests_made] == [0, 200]
+    assert all(p['sort'] == 'newlyListed' for p in requests_made)
+    assert mark.advance(results) == HighWaterMark(created(999), frozenset({'999'}))
+
+
+@pytest.mark.parametrize('remaining, quota_after', [
+    (1000, 2),   # another worker spends the budget: the third request is refused
+    (1, None),   # one call left after the first page: stop before a quota error
+])
+def test_incremental_search_cut_short_does_not_reach_the_mark(mocker, tmp_path, remaining, quota_after):
+    """A crawl stopped before the mark reports it, so the caller keeps the old mark."""
+    from src.crawl_state import HighWaterMark
+    from src.rate_limiter import QuotaExceededError
+
+    class Limiter:
+        calls = 0
+
+        def acquire(self, cost=1):
+            self.calls += 1
+            if quota_after is not None and self.calls > quota_after:
+                raise QuotaExceededError('spent')
+
+        def daily_remaining(self):
+            return remaining
+
+    api = EBayAPI(app_id='id', cert_id='secret', sandbox=False,
+                  token_file=str(tmp_path / 'token.json'), rate_limiter=Limiter())
+    api.token = 'fake_token'
+
+    def created(n):
+        return f'2024-01-01T{n // 60:02d}:{n % 60:02d}:00.000Z'
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        offset = params['offset']
+        resp = MagicMock()
+        resp.json.return_value = {
+            'total': 1000,
+            'itemSummaries': [{'itemId': str(n), 'itemCreationDate': created(n)}
+                              for n in range(999 - offset, 999 - offset - 200, -1)],
+            'next': f'https://api.ebay.com/buy/browse/v1/item_summary/search?offset={offset + 200}',
+        }
+        return resp
+
+    get = mocker.patch('requests.Session.get', side_effect=fake_get)
+
+    status = {}
+    results, total = api.search_items('laptop', newer_than=HighWaterMark(created(100), frozenset({'100'})),
+                                      crawl_status=status)
+
+    assert total == 1000 and len(results) == 400
+    assert status == {'reached_mark': False}
+    assert get.call_count == 2
+
+    status = {}
+    api.rate_limiter = None
+    api.search_items('laptop', newer_than=HighWaterMark(created(100), frozenset({'100'})), crawl_status=status)
+    assert status == {'reached_mark': True}
+
+
 if __name__ == "__main__":
     logger.info("Starting eBay API test with mocks")
     pytest.main([__file__]) # Run this specific test file
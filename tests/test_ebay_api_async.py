@@ -0,0 +1,217 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import src.ebay_api_async as ebay_api_async
+from src.ebay_api_async import AsyncEBayAPI
+from src.rate_limiter import ApiRateLimiter
+from src.search_cache import SearchPageCache
+
+
+def created(n):
+    return f'2024-01-{1 + n // 1440:02d}T{n // 60 % 24:02d}:{n % 60:02d}:00.000Z'
+
+
+class FakeEbay:
+    """Local aiohttp server standing in for the identity and Browse APIs."""
+
+    def __init__(self, total=1000, fail_first=0):
+        self.total = total
+        self.fail_first = fail_first
+        self.token_requests = 0
+        self.search_offsets = []
+        self.item_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/identity/v1/oauth2/token', self.token)
+        app.router.add_get('/buy/browse/v1/item_summary/search', self.search)
+        app.router.add_get('/buy/browse/v1/item/{item_id}', self.item)
+        return app
+
+    async def token(self, request):
+        self.token_requests += 1
+        form = await request.post()
+        assert form['grant_type'] == 'client_credentials'
+        return web.json_response({'access_token': 'async_token', 'expires_in': 7200})
+
+    async def search(self, request):
+        assert request.headers['Authorization'] == 'Bearer async_token'
+        offset = int(request.query['offset'])
+        self.search_offsets.append(offset)
+        if self.fail_first:
+            self.fail_first -= 1
+            return web.Response(status=500, text='try again')
+        limit = int(request.query['limit'])
+        count = max(min(limit, self.total - offset), 0)
+        body = {
+            'total': self.total,
+            # Newest first: a larger n is older.
+            'itemSummaries': [{'itemId': f'{offset}-{i}', 'itemCreationDate': created(self.total - offset - i)}
+                              for i in range(count)],
+        }
+        if offset + limit < self.total:
+            body['next'] = f'/buy/browse/v1/item_summary/search?offset={offset + limit}'
+        return web.json_response(body)
+
+    async def item(self, request):
+        self.item_requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return web.json_response({'itemId': request.match_info['item_id']})
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    from tenacity import stop_after_attempt, wait_none
+
+    monkeypatch.setattr(ebay_api_async, '_retry_policy',
+                        lambda: {'stop': stop_after_attempt(3), 'wait': wait_none()})
+
+
+def run_against(fake, tmp_path, scenario, **kwargs):
+    async def _run():
+        server = TestServer(fake.app())
+        await server.start_server()
+        try:
+            async with AsyncEBayAPI('id', 'secret', sandbox=False,
+                                    token_file=str(tmp_path / 'token.json'), **kwargs) as api:
+                api.base_url = str(server.make_url('/buy/browse/v1'))
+                api.token_url = str(server.make_url('/identity/v1/oauth2/token'))
+                return await scenario(api)
+        finally:
+            await server.close()
+
+    return asyncio.run(_run())
+
+
+def test_token_is_requested_once_and_shared_through_the_file(tmp_path):
+    fake = FakeEbay()
+
+    async def scenario(api):
+        results = await asyncio.gather(*(api.get_oauth_token() for _ in range(5)))
+        return results, api.token
+
+    results, token = run_against(fake, tmp_path, scenario)
+
+    assert results == [True] * 5 and token == 'async_token'
+    assert fake.token_requests == 1
+    assert json.loads((tmp_path / 'token.json').read_text())['access_token'] == 'async_token'
+
+
+def test_full_search_fetches_pages_concurrently_in_offset_order(tmp_path):
+    fake = FakeEbay(total=900)
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        return await api.search_items('laptop', full_search=True)
+
+    items, total = run_against(fake, tmp_path, scenario)
+
+    assert total == 900
+    assert sorted(fake.search_offsets) == [0, 200, 400, 600, 800]
+    assert len(items) == 900
+    assert [item['itemId'] for item in items[::200]] == ['0-0', '200-0', '400-0', '600-0', '800-0']
+
+
+def test_server_errors_are_retried(tmp_path):
+    fake = FakeEbay(total=10, fail_first=2)
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        return await api.search_items('laptop')
+
+    items, total = run_against(fake, tmp_path, scenario)
+
+    assert (len(items), total) == (10, 10)
+    assert fake.search_offsets == [0, 0, 0]
+
+
+def test_item_details_respect_the_concurrency_limit(tmp_path):
+    fake = FakeEbay()
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        return await asyncio.gather(*(api.get_item_details(str(n)) for n in range(40)))
+
+    details = run_against(fake, tmp_path, scenario, concurrency=4)
+
+    assert [d['itemId'] for d in details] == [str(n) for n in range(40)]
+    assert fake.max_in_flight == 4
+
+
+def test_page_cache_and_call_budget_are_shared(tmp_path):
+    fake = FakeEbay(total=10)
+    limiter = ApiRateLimiter(tmp_path / 'limit.db', per_second=100, per_day=1000)
+    cache = SearchPageCache(tmp_path / 'pages.db', ttl_seconds=60)
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        first = await api.search_items('laptop')
+        second = await api.search_items('laptop')
+        return first, second
+
+    first, second = run_against(fake, tmp_path, scenario, page_cache=cache, rate_limiter=limiter)
+
+    assert first == second
+    assert fake.search_offsets == [0]
+    assert limiter.remaining()['calls_today'] == 1
+
+
+def test_budget_running_out_mid_search_keeps_fetched_pages(tmp_path):
+    from src.rate_limiter import QuotaExceededError
+
+    class ThreeCallsLeft:
+        calls = 0
+
+        def try_acquire(self, cost=1):
+            self.calls += 1
+            if self.calls > 3:
+                raise QuotaExceededError('spent')
+            return 0.0
+
+        def daily_remaining(self):
+            return 1000  # another worker spends the rest after this is read
+
+    fake = FakeEbay(total=900)
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        return await api.search_items('laptop', full_search=True)
+
+    items, total = run_against(fake, tmp_path, scenario, rate_limiter=ThreeCallsLeft())
+
+    assert total == 900
+    assert 200 <= len(items) <= 600
+    assert [item['itemId'] for item in items[::200]] == [f'{o}-0' for o in range(0, len(items), 200)]
+
+
+def test_incremental_search_reports_whether_it_reached_the_mark(tmp_path):
+    from src.crawl_state import HighWaterMark
+
+    class OneCallLeft:
+        def try_acquire(self, cost=1):
+            return 0.0
+
+        def daily_remaining(self):
+            return 1
+
+    fake = FakeEbay(total=1000)
+    mark = HighWaterMark(created(100), frozenset({'800-100'}))
+
+    async def scenario(api):
+        await api.get_oauth_token()
+        status = {}
+        items, _ = await api.search_items('laptop', newer_than=mark, crawl_status=status)
+        return len(items), status
+
+    # Five pages lead down to the mark but only two fit in the budget.
+    assert run_against(fake, tmp_path, scenario, rate_limiter=OneCallLeft()) == (400, {'reached_mark': False})
+    assert run_against(fake, tmp_path, scenario) == (900, {'reached_mark': True})
@@ -0,0 +1,53 @@
+"""
+Tests for the compact listing record.
+"""
+import json
+
+import pytest
+
+from src.listing import FIELDS, ListingRecord, json_default
+
+
+def _record(**overrides):
+    fields = {
+        'title': 'Lenovo Tiny i5-8500T 8GB RAM 256GB SSD',
+        'price': 99.0,
+        'cpu_type': 'I5',
+        'cpu_model': 'I5-8500T',
+        'ram': '8GB',
+        'storage': '256GB',
+        'performance': 9000,
+        'free_shipping': True,
+        'item_url': 'http://example.com/1',
+        'itemId': 'v1|1|0',
+    }
+    fields.update(overrides)
+    return ListingRecord(**fields)
+
+
+def test_mapping_access():
+    rec = _record()
+    assert rec['price'] == 99.0
+    assert rec.get('tco') is None
+    assert rec.get('not_a_field', 'x') == 'x'
+    rec['tco'] = 150.0
+    assert rec.tco == 150.0
+    with pytest.raises(KeyError):
+        rec['not_a_field'] = 1
+
+
+def test_serialises_to_current_json_shape():
+    rec = _record()
+    data = json.loads(json.dumps({'listings': [rec]}, default=json_default))['listings'][0]
+    assert list(data) == list(FIELDS)
+    assert ListingRecord.from_dict(data) == rec
+
+
+def test_repeated_strings_are_interned():
+    a = _record(cpu_model=''.join(['I5-', '8500T']))
+    b = _record(cpu_model=''.join(['I5-8', '500T']))
+    assert a.cpu_model is b.cpu_model
+
+
+def test_no_instance_dict():
+    assert not hasattr(_record(), '__dict__')
@@ -0,0 +1,67 @@
+"""
+Tests for price-history tracking and alert change detection.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.database import get_engine
+from src.price_history import detect_changes, price_history
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _day(n):
+    return T0 + timedelta(days=n)
+
+
+def _listing(item_id, price):
+    return {'itemId': item_id, 'price': price}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return get_engine(f"sqlite:///{tmp_path / 'listings.db'}")
+
+
+def _ids(items):
+    return sorted(it['itemId'] for it in items)
+
+
+def test_classifies_runs(engine):
+    first = detect_changes([_listing('a', 100.0), _listing('b', 200.0)], engine, _day(0))
+    assert _ids(first.new) == ['a', 'b']
+
+    second = detect_changes([_listing('a', 90.0), _listing('b', 210.0), _listing('c', 50.0)], engine, _day(1))
+    assert _ids(second.new) == ['c']
+    assert [(it['itemId'], prev) for it, prev in second.price_dropped] == [('a', 100.0)]
+    assert _ids(second.unchanged) == ['b']  # price rise: recorded, not alerted
+    assert second.gone == []
+    assert _ids(second.alertable) == ['a', 'c']
+
+    third = detect_changes([_listing('a', 90.0)], engine, _day(2))
+    assert _ids(third.unchanged) == ['a']
+    assert sorted(third.gone) == ['b', 'c']
+    assert third.alertable == []
+
+
+def test_history_only_records_changes(engine):
+    detect_changes([_listing('a', 100.0)], engine, _day(0))
+    detect_changes([_listing('a', 100.0)], engine, _day(1))
+    detect_changes([_listing('a', 80.0)], engine, _day(2))
+    detect_changes([], engine, _day(3))
+
+    prices = [price for _, price in price_history(engine, 'a')]
+    assert prices == [100.0, 80.0, None]
+
+
+def test_reappearing_listing_compared_with_last_price(engine):
+    detect_changes([_listing('a', 100.0), _listing('b', 100.0)], engine, _day(0))
+    detect_changes([], engine, _day(1))
+
+    back = detect_changes([_listing('a', 100.0), _listing('b', 70.0)], engine, _day(2))
+
+    assert _ids(back.unchanged) == ['a']
+    assert [it['itemId'] for it, _ in back.price_dropped] == ['b']
+    assert [price for _, price in price_history(engine, 'a')] == [100.0, None, 100.0]
+    assert sorted(detect_changes([], engine, _day(3)).gone) == ['a', 'b']
@@ -0,0 +1,133 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import src.rate_limiter as rate_limiter
+from src.ebay_api import EBayAPI, estimate_page_calls
+from src.rate_limiter import ApiRateLimiter, QuotaExceededError
+
+
+def test_daily_budget_is_shared_between_instances(tmp_path):
+    """Two limiters on one file behave like two processes sharing the budget."""
+    path = tmp_path / 'limit.db'
+    a = ApiRateLimiter(path, per_second=1000, per_day=3)
+    b = ApiRateLimiter(path, per_second=1000, per_day=3)
+
+    a.acquire()
+    b.acquire()
+    a.acquire()
+    with pytest.raises(QuotaExceededError):
+        b.acquire()
+
+    report = a.remaining()
+    assert report['calls_today'] == 3
+    assert report['daily_remaining'] == 0
+    assert report['daily_limit'] == 3
+
+
+def test_per_second_rate_is_enforced(tmp_path):
+    limiter = ApiRateLimiter(tmp_path / 'limit.db', per_second=20, burst=1)
+    start = time.perf_counter()
+    for _ in range(5):
+        limiter.acquire()
+    # The first call uses the full bucket, the other four wait 1/20 s each.
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_budget_resets_on_a_new_utc_day(tmp_path, monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(rate_limiter.time, 'time', lambda: now[0])
+    limiter = ApiRateLimiter(tmp_path / 'limit.db', per_second=1000, per_day=1)
+    limiter.acquire()
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire()
+
+    now[0] += 86_400
+    limiter.acquire()
+    assert limiter.remaining()['calls_today'] == 1
+
+
+def test_from_config(tmp_path):
+    assert ApiRateLimiter.from_config({'ebay': {}}) is None
+    assert ApiRateLimiter.from_config({'ebay': {'rate_limit': {'enabled': False}}}) is None
+    limiter = ApiRateLimiter.from_config(
+        {'ebay': {'rate_limit': {'path': str(tmp_path / 'l.db'), 'per_second': 2, 'per_day': 100}}}
+    )
+    assert (limiter.per_second, limiter.per_day, limiter.burst) == (2.0, 100, 2.0)
+
+
+def test_estimate_page_calls():
+    assert estimate_page_calls(0) == 1
+    assert estimate_page_calls(401) == 3
+    assert estimate_page_calls(10**6) == 50
+    assert estimate_page_calls(10**6, full_search=False) == 1
+
+
+def test_full_search_is_capped_to_the_remaining_budget(tmp_path, mocker):
+    limiter = ApiRateLimiter(tmp_path / 'limit.db', per_second=1000, per_day=3)
+    api = EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'),
+                  rate_limiter=limiter)
+    api.token = 'fake_token'
+    requested = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        requested.append(params['offset'])
+        resp = MagicMock()
+        resp.json.return_value = {
+            'total': 2000,  # ten pages, but only three calls are left today
+            'itemSummaries': [{'itemId': f"{params['offset']}-{i}"} for i in range(200)],
+            'next': f"https://api.ebay.com/buy/browse/v1/item_summary/search?offset={params['offset'] + 200}",
+        }
+        return resp
+
+    mocker.patch('requests.Session.get', side_effect=fake_get)
+    results, total = api.search_items('laptop', full_search=True)
+
+    assert total == 2000
+    assert requested == [0, 200, 400]
+    assert len(results) == 600
+    assert limiter.remaining()['daily_remaining'] == 0
+
+
+def test_budget_spent_elsewhere_mid_search_keeps_fetched_pages(tmp_path, mocker):
+    """Another worker spending the last call ends the search, not its results."""
+    path = tmp_path / 'limit.db'
+    limiter = ApiRateLimiter(path, per_second=1000, per_day=3)
+    other_worker = ApiRateLimiter(path, per_second=1000, per_day=3)
+    api = EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'),
+                  rate_limiter=limiter)
+    api.token = 'fake_token'
+    requested = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        requested.append(params['offset'])
+        if params['offset'] == 200:
+            other_worker.acquire()
+        resp = MagicMock()
+        resp.json.return_value = {
+            'total': 2000,
+            'itemSummaries': [{'itemId': f"{params['offset']}-{i}"} for i in range(200)],
+            'next': f"https://api.ebay.com/buy/browse/v1/item_summary/search?offset={params['offset'] + 200}",
+        }
+        return resp
+
+    mocker.patch('requests.Session.get', side_effect=fake_get)
+    results, total = api.search_items('laptop', full_search=True)
+
+    assert requested == [0, 200]
+    assert (len(results), total) == (400, 2000)
+
+
+def test_quota_errors_are_not_retried(tmp_path, mocker):
+    limiter = ApiRateLimiter(tmp_path / 'limit.db', per_second=1000, per_day=1)
+    limiter.acquire()
+    api = EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'),
+                  rate_limiter=limiter)
+    get = mocker.patch('requests.Session.get')
+
+    start = time.perf_counter()
+    with pytest.raises(QuotaExceededError):
+        api.get_item_details('123')
+    assert time.perf_counter() - start < 1
+    get.assert_not_called()
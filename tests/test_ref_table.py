@@ -0,0 +1,101 @@
+"""
+Tests for the memory-mapped shared reference tables.
+"""
+import pytest
+
+from src.data_loader import SubstringIndex, load_idle_power_data, load_passmark_data
+from src.ref_table import MappedTable, write_table
+
+
+@pytest.fixture
+def sample():
+    return {'INTEL CORE I5-8500T @ 2.10GHZ': 9000, 'INTEL N100': 5400, 'AMD RYZEN 5 PRO 2400GE': 7000,
+            'I5-8500TE': 8800, 'ÜBER CPU': 1}
+
+
+def _table(tmp_path, mapping, source=(10, 20)):
+    path = tmp_path / 'ref.table'
+    write_table(path, mapping, SubstringIndex.build_postings(mapping), source)
+    return MappedTable.open(path, source)
+
+
+def test_mapping_roundtrip(tmp_path, sample):
+    table = _table(tmp_path, sample)
+
+    assert list(table) == list(sample)
+    assert dict(table.items()) == sample
+    assert table['INTEL N100'] == 5400 and isinstance(table['INTEL N100'], int)
+    assert table.get('MISSING') is None
+    assert 'ÜBER CPU' in table
+
+
+def test_float_values(tmp_path):
+    table = _table(tmp_path, {'N100': 6.0, 'I5-8500T': 7.5})
+    assert table['I5-8500T'] == 7.5
+
+
+def test_find_matches_substring_index(tmp_path, sample):
+    table = _table(tmp_path, sample)
+    index = SubstringIndex(sample)
+
+    for term in ['I5-8500T', 'I5-8500TE', 'N100', 'RYZEN 5', 'I5-850', 'ÜBER', 'X', '']:
+        assert table.find(term) == index.find(term), term
+
+
+def test_stale_table_rejected(tmp_path, sample):
+    _table(tmp_path, sample, source=(10, 20))
+
+    assert MappedTable.open(tmp_path / 'ref.table', (10, 21)) is None
+    assert MappedTable.open(tmp_path / 'missing.table', (10, 20)) is None
+
+
+@pytest.mark.parametrize('loader', [load_passmark_data, load_idle_power_data])
+def test_reference_data_roundtrip(tmp_path, loader):
+    mapping = loader()
+    table = _table(tmp_path, mapping)
+
+    assert dict(table.items()) == mapping
+    for term in list(mapping)[::50]:
+        assert table.find(term.split()[-1]) == SubstringIndex(mapping).find(term.split()[-1])
+
+
+def test_truncated_table_rejected(tmp_path, sample):
+    _table(tmp_path, sample)
+    path = tmp_path / 'ref.table'
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-5])
+    assert MappedTable.open(path, (10, 20)) is None
+
+    path.write_bytes(data[:len(data) // 2])
+    assert MappedTable.open(path, (10, 20)) is None
+
+    path.write_bytes(data)
+    assert MappedTable.open(path, (10, 20)) is not None
+
+
+def test_corrupt_table_is_rebuilt(tmp_path, monkeypatch, sample):
+    import src.data_loader as data_loader
+
+    source = tmp_path / 'ref.txt'
+    source.write_text('unused')
+    monkeypatch.setattr(data_loader, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(data_loader, '_load_compiled',
+                        lambda filepath, parse: (sample, SubstringIndex.build_postings(sample)))
+    table_path = tmp_path / 'ref.txt.table'
+    stat = source.stat()
+    write_table(table_path, sample, SubstringIndex.build_postings(sample), (stat.st_size, stat.st_mtime_ns))
+    table_path.write_bytes(table_path.read_bytes()[:-16])
+
+    table = data_loader._load_table.__wrapped__('ref.txt', None)
+
+    assert dict(table.items()) == sample
+
+
+def test_substring_lookup_uses_the_table_index(tmp_path, sample):
+    from src.enrich_item import _substring_lookup
+
+    table = _table(tmp_path, sample)
+    table.__class__ = type('NoIter', (MappedTable,), {'__iter__': lambda self: pytest.fail('iterated')})
+
+    assert _substring_lookup('N100', table, None) == 5400
@@ -0,0 +1,95 @@
+"""
+Tests for the stale-while-revalidate result cache.
+"""
+import threading
+import time
+
+import pytest
+
+from src.result_cache import ResultCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.done.set()
+        return [{'itemId': str(self.calls)}], self.calls
+
+
+@pytest.fixture
+def loader():
+    return CountingLoader()
+
+
+def _age(cache, key, seconds):
+    cache._entries[key].fetched_at = time.time() - seconds
+
+
+def test_first_request_blocks_then_serves_cached(loader):
+    cache = ResultCache(soft_ttl=60, hard_ttl=600)
+
+    first, refreshing = cache.get('k', loader)
+    second, _ = cache.get('k', loader)
+
+    assert not refreshing
+    assert first is second
+    assert loader.calls == 1
+
+
+def test_soft_stale_returns_immediately_and_refreshes_in_background(loader):
+    cache = ResultCache(soft_ttl=60, hard_ttl=600)
+    cache.get('k', loader)
+    _age(cache, 'k', 120)
+    loader.done.clear()
+
+    stale, refreshing = cache.get('k', loader)
+
+    assert refreshing
+    assert stale.listings == [{'itemId': '1'}]
+    assert loader.done.wait(2)
+    for _ in range(100):
+        if cache.peek('k').listings == [{'itemId': '2'}]:
+            break
+        time.sleep(0.01)
+    assert cache.peek('k').listings == [{'itemId': '2'}]
+
+
+def test_hard_stale_blocks_for_fresh_result(loader):
+    cache = ResultCache(soft_ttl=60, hard_ttl=600)
+    cache.get('k', loader)
+    _age(cache, 'k', 601)
+
+    fresh, refreshing = cache.get('k', loader)
+
+    assert not refreshing
+    assert fresh.listings == [{'itemId': '2'}]
+    assert fresh.age < 1
+
+
+def test_snapshot_shared_between_instances(tmp_path, loader):
+    """A result fetched by one worker is served by another."""
+    worker_a = ResultCache(snapshot_dir=tmp_path)
+    worker_b = ResultCache(snapshot_dir=tmp_path)
+
+    worker_a.get('k', loader)
+    result, _ = worker_b.get('k', loader)
+
+    assert loader.calls == 1
+    assert result.listings == [{'itemId': '1'}]
+    assert result.total_found == 1
+
+
+def test_own_snapshot_is_not_reread(tmp_path, loader, mocker):
+    cache = ResultCache(snapshot_dir=tmp_path)
+    cache.get('k', loader)
+
+    read = mocker.spy(cache, '_read_snapshot')
+    load = mocker.patch('json.load')
+    cache.get('k', loader)
+
+    assert read.call_count == 1
+    load.assert_not_called()
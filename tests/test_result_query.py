@@ -0,0 +1,74 @@
+"""
+Tests for server-side sort/filter/pagination over a cached result set.
+"""
+import pytest
+
+from src.listing import ListingRecord
+from src.result_cache import ResultSet
+from src.result_query import ResultIndex, ResultQuery, StaleCursorError, index_for
+
+
+def _listing(item_id, price, ppd, cpu_type='I5', ram='8GB', storage='256GB', free_shipping=False):
+    return ListingRecord(itemId=item_id, price=price, performance_per_dollar=ppd,
+                         tco=price * 2 if ppd is not None else None, performance=ppd and ppd * price,
+                         cpu_type=cpu_type, ram=ram, storage=storage, free_shipping=free_shipping)
+
+
+@pytest.fixture
+def result():
+    listings = [
+        _listing('a', 100, 30.0),
+        _listing('b', 150, 50.0, cpu_type='I7', ram='16GB', free_shipping=True),
+        _listing('c', 80, None),
+        _listing('d', 120, 40.0, storage='1TB', free_shipping=True),
+        _listing('e', 200, 10.0, cpu_type='N-SERIES', ram='32GB'),
+    ]
+    return ResultSet(key='k', listings=listings, total_found=5, fetched_at=1700000000.0)
+
+
+def _ids(rows):
+    return [r['itemId'] for r in rows]
+
+
+def test_default_sort_best_value_first_missing_last(result):
+    rows, cursor = ResultIndex(result).page(ResultQuery.from_args({}))
+    assert _ids(rows) == ['b', 'd', 'a', 'e', 'c']
+    assert cursor is None
+
+
+def test_cursor_pagination_walks_whole_set(result):
+    index = ResultIndex(result)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = index.page(ResultQuery.from_args({'sort': 'price', 'limit': '2', 'cursor': cursor or ''}))
+        seen.extend(_ids(rows))
+        if cursor is None:
+            break
+    assert seen == ['c', 'a', 'd', 'b', 'e']
+
+
+def test_filters(result):
+    index = ResultIndex(result)
+    args = {'free_shipping': 'true', 'min_storage_gb': '512'}
+    assert _ids(index.page(ResultQuery.from_args(args))[0]) == ['d']
+    assert _ids(index.page(ResultQuery.from_args({'cpu_type': 'i7,n-series'}))[0]) == ['b', 'e']
+    assert _ids(index.page(ResultQuery.from_args({'min_ram_gb': '16', 'max_price': '180'}))[0]) == ['b']
+
+
+def test_stale_cursor_rejected(result):
+    index = ResultIndex(result)
+    _, cursor = index.page(ResultQuery.from_args({'limit': '1'}))
+
+    refreshed = ResultSet(key='k', listings=result.listings, total_found=5, fetched_at=1700000100.0)
+    with pytest.raises(StaleCursorError):
+        index_for(refreshed).page(ResultQuery.from_args({'cursor': cursor}))
+
+
+def test_index_built_once_per_version(result):
+    assert index_for(result) is index_for(result)
+
+
+@pytest.mark.parametrize('args', [{'sort': 'title'}, {'order': 'up'}, {'limit': '0'}, {'free_shipping': 'maybe'}])
+def test_invalid_args(args):
+    with pytest.raises(ValueError):
+        ResultQuery.from_args(args)
@@ -0,0 +1,77 @@
+"""
+Tests for the persistent search page cache.
+"""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.ebay_api import EBayAPI
+from src.search_cache import SearchPageCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / 'cache' / 'search_cache.db'
+
+
+def test_roundtrip_survives_new_instance(cache_path):
+    """Pages are persisted on disk, not in process memory."""
+    key = SearchPageCache.make_key('n100', 171957, 'price:[..250]', 0, 'EBAY_US')
+    SearchPageCache(cache_path).set(key, {'total': 1, 'itemSummaries': [{'itemId': '1'}]})
+
+    assert SearchPageCache(cache_path).get(key) == {'total': 1, 'itemSummaries': [{'itemId': '1'}]}
+
+
+def test_entries_expire_after_ttl(cache_path, monkeypatch):
+    cache = SearchPageCache(cache_path, ttl_seconds=60)
+    cache.set('k', {'total': 0})
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.get('k') is None
+
+
+def test_lru_eviction(cache_path):
+    cache = SearchPageCache(cache_path, max_entries=2)
+    cache.set('a', {'page': 'a'})
+    time.sleep(0.01)
+    cache.set('b', {'page': 'b'})
+    time.sleep(0.01)
+    assert cache.get('a') is not None  # 'a' becomes most recently used
+    time.sleep(0.01)
+    cache.set('c', {'page': 'c'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'page': 'a'}
+    assert cache.get('c') == {'page': 'c'}
+
+
+def test_key_distinguishes_offset_and_price():
+    base = SearchPageCache.make_key('n100', 1, 'price:[..250]', 0, 'EBAY_US')
+    assert base != SearchPageCache.make_key('n100', 1, 'price:[..250]', 200, 'EBAY_US')
+    assert base != SearchPageCache.make_key('n100', 1, 'price:[..300]', 0, 'EBAY_US')
+    assert base != SearchPageCache.make_key('n100', 1, 'price:[..250]', 0, 'EBAY_GB')
+
+
+def test_search_items_served_from_cache(cache_path, tmp_path, mocker):
+    """A repeated search does not go back to eBay."""
+    api = EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'),
+                  page_cache=SearchPageCache(cache_path))
+    api.token = 'fake_token'
+
+    resp = MagicMock()
+    resp.raise_for_status = MagicMock()
+    resp.json.return_value = {'total': 1, 'itemSummaries': [{'itemId': 'v1|1|0'}]}
+    get = mocker.patch('requests.Session.get', return_value=resp)
+
+    first = api.search_items('n100', category_id=171957, max_price=250)
+    second = api.search_items('n100', category_id=171957, max_price=250)
+
+    assert first == second == ([{'itemId': 'v1|1|0'}], 1)
+    assert get.call_count == 1
+
+
+def test_from_config_disabled():
+    assert SearchPageCache.from_config({}) is None
+    assert SearchPageCache.from_config({'cache': {'search_pages': {'enabled': False}}}) is None
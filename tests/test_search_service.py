@@ -0,0 +1,341 @@
+"""
+Tests for the search service (keyword fan-out, de-duplication, enrichment).
+"""
+import threading
+import time
+
+import pytest
+
+import src.search_service as search_service
+
+
+def _summary(item_id, title):
+    return {
+        'itemId': item_id,
+        'title': title,
+        'price': {'value': '100.00', 'currency': 'USD'},
+        'itemWebUrl': f'http://example.com/{item_id}',
+    }
+
+
+class FakeEBayAPI:
+    """Stand-in for EBayAPI; later keywords answer faster than earlier ones."""
+
+    results = {
+        'tiny': [_summary('1', 'Lenovo Tiny i5-8500T 8GB RAM 256GB SSD'),
+                 _summary('2', 'Lenovo Tiny i7-8700T 16GB RAM 512GB SSD')],
+        'micro': [_summary('2', 'Lenovo Tiny i7-8700T 16GB RAM 512GB SSD'),
+                  _summary('3', 'OptiPlex Micro i5-6500T 8GB RAM 128GB SSD')],
+        'n100': [_summary('4', 'Mini PC N100 16GB DDR4 512GB NVMe')],
+    }
+    delays = {'tiny': 0.15, 'micro': 0.05, 'n100': 0.0}
+
+    def __init__(self, *args, **kwargs):
+        self.rate_limiter = kwargs.get('rate_limiter')
+        self.closed = False
+        self.refreshing = False
+
+    def get_oauth_token(self):
+        return True
+
+    def start_token_refresher(self):
+        self.refreshing = True
+
+    def close(self):
+        self.closed = True
+
+    def search_items(self, keywords, category_id=None, max_price=None, full_search=False):
+        time.sleep(self.delays[keywords])
+        return list(self.results[keywords]), len(self.results[keywords])
+
+    def iter_search_pages(self, keywords, category_id=None, max_price=None, full_search=False):
+        time.sleep(self.delays[keywords])
+        items = self.results[keywords]
+        # One item per page, so each page becomes its own streamed batch.
+        for item in items:
+            yield [item], len(items)
+
+
+@pytest.fixture(autouse=True)
+def fresh_api_clients(monkeypatch):
+    """Each test gets its own process-wide client registry."""
+    monkeypatch.setattr(search_service, '_api_clients', {})
+    monkeypatch.setattr(search_service, '_refresh_tokens', False)
+
+
+@pytest.fixture
+def config():
+    return {
+        'ebay': {'app_id': 'id', 'cert_id': 'secret', 'sandbox': True},
+        'search': {
+            'keywords': 'tiny, micro, n100',
+            'category_id': 171957,
+            'max_price': 250,
+            'max_concurrency': 3,
+        },
+    }
+
+
+def test_find_listings_order_independent_of_timing(monkeypatch, config):
+    """Results keep keyword order and drop duplicates regardless of completion order."""
+    monkeypatch.setattr(search_service, 'EBayAPI', FakeEBayAPI)
+
+    listings, total = search_service.find_listings(config)
+
+    assert [l['itemId'] for l in listings] == ['1', '2', '3', '4']
+    assert total == 5
+    assert listings[0]['cpu_model'] == 'I5-8500T'
+    assert listings[3]['cpu_model'] == 'N100'
+
+
+def test_find_listings_runs_keywords_concurrently(monkeypatch, config):
+    """Wall-clock time is bounded by the slowest keyword, not the sum."""
+    monkeypatch.setattr(search_service, 'EBayAPI', FakeEBayAPI)
+
+    start = time.perf_counter()
+    search_service.find_listings(config)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < sum(FakeEBayAPI.delays.values())
+
+
+def test_find_listings_auth_failure(monkeypatch, config):
+    class NoAuth(FakeEBayAPI):
+        def get_oauth_token(self):
+            return False
+
+    monkeypatch.setattr(search_service, 'EBayAPI', NoAuth)
+    with pytest.raises(RuntimeError):
+        search_service.find_listings(config)
+
+
+def test_api_client_is_reused_across_searches(monkeypatch, config):
+    created = []
+
+    class Counting(FakeEBayAPI):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(search_service, 'EBayAPI', Counting)
+    search_service.find_listings(config)
+    list(search_service.iter_listing_batches(config))
+    assert len(created) == 1
+    assert not created[0].refreshing  # searching alone (alert worker) never starts it
+
+    # In the web app, changed client settings replace (and close) the
+    # previous client and the new one gets its own token refresher.
+    search_service.start_token_refresh(config)
+    assert created[0].refreshing
+    search_service.find_listings(dict(config, ebay=dict(config['ebay'], sandbox=False)))
+    assert len(created) == 2
+    assert created[0].closed and not created[1].closed
+    assert created[1].refreshing
+    assert len(search_service._api_clients) == 1
+
+
+
+def test_api_client_pool_covers_keyword_and_page_fan_out(monkeypatch, config):
+    created = []
+
+    class Recording(FakeEBayAPI):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(kwargs)
+
+    monkeypatch.setattr(search_service, 'EBayAPI', Recording)
+    search_service._api_client(config)
+    assert created[-1]['page_concurrency'] == search_service.DEFAULT_PAGE_CONCURRENCY
+    assert created[-1]['pool_size'] == 3 * search_service.DEFAULT_PAGE_CONCURRENCY
+
+    roomy = dict(config, ebay=dict(config['ebay'], http={'pool_size': 50}))
+    search_service._api_client(roomy)
+    assert created[-1]['pool_size'] == 50
+
+def test_estimate_search_cost(monkeypatch, config):
+    class WithTotals(FakeEBayAPI):
+        totals = {'tiny': 450, 'micro': 0, 'n100': 20_000}
+
+        def search_total(self, keywords, category_id=None, max_price=None):
+            return self.totals[keywords]
+
+    monkeypatch.setattr(search_service, 'EBayAPI', WithTotals)
+
+    estimate = search_service.estimate_search_cost(config, full_search_override=True)
+    assert estimate['keywords'] == {
+        'tiny': {'total': 450, 'calls': 3},
+        'micro': {'total': 0, 'calls': 1},
+        'n100': {'total': 20_000, 'calls': 50},
+    }
+    assert estimate['calls'] == 54
+    assert search_service.estimate_search_cost(config)['calls'] == 3  # one page per keyword
+    assert search_service.api_budget(config) is None  # no ebay.rate_limit configured
+
+
+def test_concurrent_identical_searches_share_one_execution(monkeypatch, config):
+    searched = []
+
+    class Counting(FakeEBayAPI):
+        def search_items(self, keywords, *args, **kwargs):
+            searched.append(keywords)
+            return super().search_items(keywords, *args, **kwargs)
+
+    monkeypatch.setattr(search_service, 'EBayAPI', Counting)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(search_service.find_listings(config)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(searched) == ['micro', 'n100', 'tiny']
+    assert len(results) == 3 and all(r is results[0] for r in results)
+
+    # A different effective search is not coalesced with it.
+    search_service.find_listings(config, full_search_override=True)
+    assert len(searched) == 6
+
+
+def test_iter_listing_batches_streams_pages(monkeypatch, config):
+    """Pages arrive as scored batches; totals and de-duplication match find_listings."""
+    monkeypatch.setattr(search_service, 'EBayAPI', FakeEBayAPI)
+
+    batches = list(search_service.iter_listing_batches(config))
+
+    streamed = [l for batch, _ in batches for l in batch]
+    # One batch per page; '2' is in two keywords and streamed only once.
+    assert sorted([l['itemId'] for l in batch] for batch, _ in batches) == [[], ['1'], ['2'], ['3'], ['4']]
+    assert batches[-1][1] == 5
+    assert all(l['tco'] is not None for l in streamed)
+
+
+class FailingMicro(FakeEBayAPI):
+    def iter_search_pages(self, keywords, *args, **kwargs):
+        if keywords == 'micro':
+            raise RuntimeError('HTTP 503')
+        return super().iter_search_pages(keywords, *args, **kwargs)
+
+
+def test_iter_listing_batches_reports_failed_keywords(monkeypatch, config):
+    monkeypatch.setattr(search_service, 'EBayAPI', FailingMicro)
+    failures = {}
+
+    batches = list(search_service.iter_listing_batches(config, failures=failures))
+
+    assert failures == {'micro': 'HTTP 503'}
+    assert sorted(l['itemId'] for batch, _ in batches for l in batch) == ['1', '2', '4']
+
+
+def test_partial_stream_does_not_replace_cached_results(monkeypatch, config):
+    import json
+    import src.routes.search as search_routes
+    from src.app import create_app
+
+    monkeypatch.setattr(search_service, 'EBayAPI', FailingMicro)
+    monkeypatch.setattr(search_routes, 'load_config', lambda: config)
+    monkeypatch.setattr(search_routes, '_result_cache', None)
+    client = create_app().test_client()
+
+    response = client.get('/search/stream')
+    summary = json.loads(response.data.decode().splitlines()[-1])
+    response.close()
+
+    assert summary['status'] == 'partial'
+    assert summary['failed_keywords'] == {'micro': 'HTTP 503'}
+    assert search_routes._get_result_cache(config).peek(search_routes._result_cache_key(config)) is None
+
+
+def test_iter_listing_batches_auth_failure(monkeypatch, config):
+    class NoAuth(FakeEBayAPI):
+        def get_oauth_token(self):
+            return False
+
+    monkeypatch.setattr(search_service, 'EBayAPI', NoAuth)
+    with pytest.raises(RuntimeError):
+        next(search_service.iter_listing_batches(config))
+
+
+def test_find_listings_persists_results(monkeypatch, config, tmp_path):
+    from sqlalchemy import select
+    from src.database import Listing, get_engine
+
+    url = f"sqlite:///{tmp_path / 'listings.db'}"
+    config['database'] = {'url': url}
+    monkeypatch.setattr(search_service, 'EBayAPI', FakeEBayAPI)
+
+    listings, _ = search_service.find_listings(config)
+
+    with get_engine(url).connect() as conn:
+        stored = dict(conn.execute(select(Listing.item_id, Listing.tco)).all())
+    assert stored == {l['itemId']: l['tco'] for l in listings}
+    assert all(tco is not None for tco in stored.values())
+
+
+def test_find_listings_incremental_uses_high_water_mark(monkeypatch, config, tmp_path):
+    class NewestFirst(FakeEBayAPI):
+        def search_items(self, keywords, category_id=None, max_price=None, full_search=False, newer_than=None,
+                         crawl_status=None):
+            items = [dict(item, itemCreationDate=f'2024-01-01T00:00:0{item["itemId"]}.000Z')
+                     for item in self.results[keywords]]
+            crawl_status['reached_mark'] = True
+            return [item for item in items if not newer_than.seen(item)], len(items)
+
+    config['database'] = {'url': f"sqlite:///{tmp_path / 'listings.db'}"}
+    monkeypatch.setattr(search_service, 'EBayAPI', NewestFirst)
+
+    first, _ = search_service.find_listings(config, incremental=True)
+    second, _ = search_service.find_listings(config, incremental=True)
+
+    assert [l['itemId'] for l in first] == ['1', '2', '3', '4']
+    assert second == []
+
+
+def test_incremental_search_cut_short_keeps_the_mark(monkeypatch, config, tmp_path):
+    from src.crawl_state import HighWaterMark, crawl_key, load_high_water_mark, save_high_water_mark
+    from src.database import get_engine
+
+    class CutShort(FakeEBayAPI):
+        reached = False
+
+        def search_items(self, keywords, category_id=None, max_price=None, full_search=False, newer_than=None,
+                         crawl_status=None):
+            items = [dict(item, itemCreationDate=f'2024-01-01T00:00:0{item["itemId"]}.000Z')
+                     for item in self.results[keywords]]
+            crawl_status['reached_mark'] = self.reached
+            return [item for item in items if not newer_than.seen(item)], len(items)
+
+    url = f"sqlite:///{tmp_path / 'listings.db'}"
+    config['database'] = {'url': url}
+    config['search']['keywords'] = 'tiny'
+    monkeypatch.setattr(search_service, 'EBayAPI', CutShort)
+    key = crawl_key('tiny', 171957, 250)
+    old = HighWaterMark('2024-01-01T00:00:00.000Z', frozenset({'0'}))
+    save_high_water_mark(get_engine(url), key, old)
+
+    # Stopped before the old mark (budget, page limit): the gap must be fetched next time.
+    listings, _ = search_service.find_listings(config, incremental=True)
+    assert [l['itemId'] for l in listings] == ['1', '2']
+    assert load_high_water_mark(get_engine(url), key) == old
+
+    CutShort.reached = True
+    search_service.find_listings(config, incremental=True)
+    assert load_high_water_mark(get_engine(url), key) == HighWaterMark('2024-01-01T00:00:02.000Z', frozenset({'2'}))
+
+
+def test_budget_estimate_requires_post(monkeypatch, config):
+    import src.routes.search as search_routes
+    from src.app import create_app
+
+    estimates = []
+    monkeypatch.setattr(search_routes, 'load_config', lambda: config)
+    monkeypatch.setattr(search_routes, 'estimate_search_cost',
+                        lambda cfg, full_search_override=None: estimates.append(full_search_override) or {})
+    client = create_app().test_client()
+
+    assert client.get('/search/budget?estimate=true').json == {'status': 'success', 'budget': None}
+    assert client.get('/search/budget/estimate').status_code == 405
+    assert client.post('/search/budget/estimate', json={'full_search': True}).status_code == 200
+    assert estimates == [True]
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def _run_concurrently(calls):
+    """Start each ``(flight, key, fn)`` 20 ms apart and collect ``run`` results."""
+    results = [None] * len(calls)
+
+    def _worker(i, flight, key, fn):
+        results[i] = flight.run(key, fn)
+
+    threads = []
+    for i, call in enumerate(calls):
+        thread = threading.Thread(target=_worker, args=(i, *call))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow_counter(calls, delay=0.2):
+    def _fn():
+        calls.append(1)
+        time.sleep(delay)
+        return {'n': len(calls)}
+    return _fn
+
+
+def test_concurrent_callers_share_one_execution():
+    flight, calls = SingleFlight(), []
+    fn = _slow_counter(calls)
+
+    results = _run_concurrently([(flight, 'k', fn)] * 4)
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight, calls = SingleFlight(), []
+    fn = _slow_counter(calls, delay=0.05)
+
+    _run_concurrently([(flight, 'a', fn), (flight, 'b', fn)])
+    assert len(calls) == 2
+
+    flight.run('a', fn)  # the earlier flight has finished: not a cache
+    assert len(calls) == 3
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def _fail():
+        time.sleep(0.1)
+        raise RuntimeError('upstream down')
+
+    errors = []
+
+    def _call():
+        try:
+            flight.run('k', _fail)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=_call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == ['upstream down'] * 3
+    assert flight.run('k', lambda: 'ok') == ('ok', False)
+
+
+def test_other_processes_reuse_the_published_result(tmp_path):
+    """Separate instances on one directory coordinate like separate workers."""
+    codec = dict(encode=lambda r: json.dumps(r).encode(), decode=json.loads)
+    worker_a = SingleFlight(tmp_path, **codec)
+    worker_b = SingleFlight(tmp_path, **codec)
+    calls = []
+    fn = _slow_counter(calls)
+
+    results = _run_concurrently([(worker_a, 'k', fn), (worker_b, 'k', fn)])
+
+    assert len(calls) == 1
+    assert results == [({'n': 1}, False), ({'n': 1}, True)]
+
+    # A request made after the flight finished does not reuse its result.
+    assert worker_b.run('k', fn) == ({'n': 2}, False)
+
+
+def test_directory_requires_a_codec(tmp_path):
+    with pytest.raises(ValueError):
+        SingleFlight(tmp_path)
+
+
+def test_uncontended_calls_publish_nothing(tmp_path):
+    encoded = []
+    flight = SingleFlight(tmp_path, encode=lambda r: encoded.append(r) or b'{}', decode=json.loads)
+
+    assert flight.run('k', lambda: {'n': 1}) == ({'n': 1}, False)
+    assert encoded == []
+    assert not list(tmp_path.glob('*.result'))
@@ -0,0 +1,83 @@
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.startup import StartupTimer, budget_from_config
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_report_lists_phases_and_total(caplog):
+    timer = StartupTimer('test', started=0.0)
+    timer.phases = [('imports', 40.0), ('create_app', 10.0)]
+    timer._mark = 0.05
+
+    with caplog.at_level(logging.INFO, logger='src.startup'):
+        report = timer.report(budget_ms=100)
+
+    assert report == {'name': 'test', 'total_ms': 50.0, 'budget_ms': 100,
+                      'phases': {'imports': 40.0, 'create_app': 10.0}}
+    assert caplog.records[-1].levelno == logging.INFO
+    assert 'imports 40 ms, create_app 10 ms' in caplog.text
+
+
+def test_report_warns_over_budget(caplog):
+    timer = StartupTimer('test', started=0.0)
+    timer._mark = 2.0
+
+    with caplog.at_level(logging.INFO, logger='src.startup'):
+        timer.report(budget_ms=1500)
+
+    assert caplog.records[-1].levelno == logging.WARNING
+    assert 'over the 1500 ms budget' in caplog.text
+
+
+def test_lap_records_time_since_previous_lap():
+    timer = StartupTimer('test')
+    timer.lap('a')
+    timer.lap('b')
+    assert [label for label, _ in timer.phases] == ['a', 'b']
+    assert timer.total_ms == pytest.approx(sum(ms for _, ms in timer.phases))
+
+
+@pytest.mark.parametrize('config, expected', [
+    ({}, 1500.0),
+    ({'app': {'startup_budget_ms': 800}}, 800.0),
+    ({'app': {'startup_budget_ms': 0}}, None),
+    ({'app': {'startup_budget_ms': 'soon'}}, 1500.0),
+])
+def test_budget_from_config(config, expected):
+    assert budget_from_config(config) == expected
+
+
+def test_importing_entry_points_defers_heavy_modules():
+    code = (
+        "import json, sys; import src.app, src.alert_worker, src.data_loader as d; "
+        "print(json.dumps({'modules': [m for m in ('numpy', 'tenacity', 'cryptography', 'apscheduler', 'pytz', 'sqlalchemy') "
+        "if m in sys.modules], 'tables_loaded': d._load_table.cache_info().currsize}))"
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True,
+                         text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result == {'modules': [], 'tables_loaded': 0}
+
+
+def test_reference_mappings_load_on_first_access():
+    import src.data_loader as data_loader
+
+    assert data_loader.PASSMARK_SCORES is data_loader.passmark_scores()
+    assert data_loader.IDLE_POWER_DATA is data_loader.idle_power_data()
+    with pytest.raises(AttributeError):
+        data_loader.NOT_A_TABLE  # noqa: B018
+
+
+def test_missing_config_is_reported_once_at_start_up(tmp_path):
+    env = {**__import__('os').environ, 'PYTHONPATH': str(REPO_ROOT)}
+    out = subprocess.run([sys.executable, '-c', 'import src.app'], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True)
+    logs = out.stdout + out.stderr
+    assert logs.count('Failed to load configuration') == 1
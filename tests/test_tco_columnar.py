@@ -0,0 +1,105 @@
+"""
+Parity tests for the columnar TCO engine against the scalar reference.
+"""
+import itertools
+import random
+
+import pytest
+
+from src.tco import calculate_tco_and_perf, calculate_tco_and_perf_batch, sensitivity_sweep
+
+RAM = ['4GB', '8GB', '16GB', '32GB', 'N/A', None, '', '1.5TB']
+STORAGE = ['64GB', '128GB', '256GB', '512GB', '1TB', '2TB', 'N/A', None]
+CPUS = ['I5-8500T', 'I7-6700', 'N100', 'None', 'N/A', 'CELERON', None]
+
+
+def _random_item(rng):
+    return {
+        'price': rng.choice([None, '', 0.0, 49.99, 120.0, round(rng.uniform(1, 400), 2), '75.5']),
+        'cpu_idle_power': rng.choice([None, '', 0.0, 3.25, 8, 12.5, '6.5', round(rng.uniform(1, 40), 2)]),
+        'performance': rng.choice([None, 0, 1500, 9000, rng.randint(100, 30000)]),
+        'free_shipping': rng.choice([True, False, None]),
+        'cpu_model': rng.choice(CPUS),
+        'ram': rng.choice(RAM),
+        'storage': rng.choice(STORAGE),
+    }
+
+
+@pytest.mark.parametrize('assumptions', [
+    {},
+    {'kwh_cost': 0.14, 'lifespan_years': 5, 'shipping_cost_t_cpu': 10,
+     'shipping_cost_non_t_cpu': 35, 'required_ram_gb': 16, 'ram_upgrade_flat_cost': 30,
+     'required_storage_gb': 120, 'storage_upgrade_flat_cost': 15},
+    {'kwh_cost': '0.31', 'lifespan_years': '0', 'required_ram_gb': 8, 'required_storage_gb': 1024},
+])
+def test_batch_matches_scalar_exactly(assumptions):
+    rng = random.Random(1234)
+    items = [_random_item(rng) for _ in range(2000)]
+
+    expected = [calculate_tco_and_perf(item, assumptions) for item in items]
+    assert calculate_tco_and_perf_batch(items, assumptions) == expected
+
+
+def test_batch_empty():
+    assert calculate_tco_and_perf_batch([], {}) == []
+
+
+def _listing(item_id, price, idle, perf):
+    return {'itemId': item_id, 'price': price, 'cpu_idle_power': idle, 'performance': perf,
+            'free_shipping': True, 'cpu_model': 'I5-8500T', 'ram': '16GB', 'storage': '256GB'}
+
+
+def test_sensitivity_sweep_break_even():
+    # Cheap but power-hungry vs. pricier but efficient.
+    items = [_listing('hungry', 80.0, 30.0, 8000), _listing('frugal', 140.0, 6.0, 9000)]
+    assumptions = {'kwh_cost': 0.02, 'lifespan_years': 5}
+
+    sweep = sensitivity_sweep(items, assumptions, {'kwh_cost': {'min': 0.0, 'max': 0.3, 'steps': 13}}, top_n=2)
+
+    assert sweep['scenarios'] == 13
+    assert [l['itemId'] for l in sweep['baseline_top']] == ['hungry', 'frugal']
+    (pair,) = sweep['break_even_kwh']
+    k = pair['kwh_cost']
+    assert 0.02 < k < 0.3
+
+    at_k = calculate_tco_and_perf_batch(items, dict(assumptions, kwh_cost=k))
+    assert at_k[0][1] == pytest.approx(at_k[1][1])
+
+    hungry = sweep['rank_stability'][0]
+    assert hungry['best_rank'] == 1 and hungry['worst_rank'] == 2
+    assert 0 < hungry['share_ranked_first'] < 1
+
+
+def test_sensitivity_sweep_grid_matches_scalar():
+    """Every grid cell ranks listings as the scalar engine does under that scenario."""
+    rng = random.Random(7)
+    items = [dict(_random_item(rng), itemId=str(n)) for n in range(200)]
+    ranges = {'kwh_cost': [0.1, 0.3], 'lifespan_years': [3, 7], 'ram_upgrade_flat_cost': [0, 60]}
+
+    sweep = sensitivity_sweep(items, {}, ranges, top_n=3)
+
+    assert sweep['scenarios'] == 8
+    best = max((p, i) for i, (_, p) in enumerate(calculate_tco_and_perf_batch(items, {})) if p is not None)
+    assert sweep['baseline_top'][0]['performance_per_dollar'] == best[0]
+
+    # Rank of each listing in each scenario, from the scalar engine
+    # (stable order, unscored listings last).
+    scenario_ranks = []
+    for values in itertools.product(*ranges.values()):
+        scored = calculate_tco_and_perf_batch(items, dict(zip(ranges, values)))
+        order = sorted(range(len(items)),
+                       key=lambda i: -scored[i][1] if scored[i][1] is not None else float('inf'))
+        scenario_ranks.append({item: rank for rank, item in enumerate(order)})
+
+    assert len(sweep['rank_stability']) == 3
+    for listing in sweep['rank_stability']:
+        ranks = [r[int(listing['itemId'])] for r in scenario_ranks]
+        assert listing['best_rank'] == min(ranks) + 1
+        assert listing['worst_rank'] == max(ranks) + 1
+        assert listing['share_ranked_first'] == pytest.approx(ranks.count(0) / len(ranks))
+        assert listing['share_in_top_n'] == pytest.approx(sum(r < 3 for r in ranks) / len(ranks))
+
+
+def test_sensitivity_sweep_rejects_unknown_keys():
+    with pytest.raises(ValueError):
+        sensitivity_sweep([], {}, {'price': [1, 2]})
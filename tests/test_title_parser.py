@@ -1,5 +1,5 @@
 import pytest
-from src.title_parser import parse_title
+from src.title_parser import parse_title, parse_titles
 
 @pytest.mark.parametrize(
     "title,expected",
@@ -59,4 +59,22 @@ from src.title_parser import parse_title
 def test_parse_title(title, expected):
     parsed = parse_title(title)
     for key, value in expected.items():
-        assert parsed[key] == value 
\ No newline at end of file
+        assert parsed[key] == value 
+
+def test_parse_titles_matches_parse_title():
+    titles = [
+        "Lenovo Tiny PC i7-8700T 16GB RAM 256GB SSD",
+        "LENOVO TINY PC I7-8700T 16GB RAM 256GB SSD",  # duplicate up to case
+        "Dell OptiPlex Micro i5 8GB 1TB HDD",
+        "HP Mini N100 8GB DDR4 128GB NVMe",
+        "Mini PC 16GB / 512GB SSD",
+        "Mini PC SSD 512GB, 8GB",
+        "",
+        "Dell OptiPlex Micro i5 8GB 1TB HDD",
+    ]
+
+    results = parse_titles(titles)
+
+    assert results == [parse_title(t) for t in titles]
+    assert results[0] is results[1]  # duplicates collapse to one object
+    assert results[2] is results[7]
@@ -0,0 +1,80 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.ebay_api as ebay_api
+from src.ebay_api import EBayAPI
+from src.token_store import TokenStore
+
+
+def test_round_trip_and_corrupt_file(tmp_path):
+    store = TokenStore(tmp_path / 'token.json')
+    assert store.read() is None
+
+    data = {'access_token': 'abc', 'expiry': datetime.now().isoformat()}
+    store.write(data)
+    assert store.read() == data
+    assert (tmp_path / 'token.json').stat().st_mode & 0o777 == 0o600
+
+    (tmp_path / 'token.json').write_text('{not json')
+    assert store.read() is None
+
+
+def _api(tmp_path):
+    return EBayAPI(app_id='id', cert_id='secret', token_file=str(tmp_path / 'token.json'))
+
+
+def test_only_one_client_requests_a_token(tmp_path, monkeypatch):
+    """Clients sharing a token file (as separate workers do) refresh once."""
+    calls = []
+
+    def fake_request(self):
+        calls.append(self)
+        time.sleep(0.1)  # long enough for the other client to queue on the lock
+        return {'access_token': f'token-{len(calls)}', 'expires_in': 7200}
+
+    monkeypatch.setattr(EBayAPI, '_request_token', fake_request)
+    clients = [_api(tmp_path) for _ in range(3)]
+    threads = [threading.Thread(target=c.get_oauth_token) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert {c.token for c in clients} == {'token-1'}
+    assert all(c.headers['Authorization'] == 'Bearer token-1' for c in clients)
+
+
+def test_valid_in_memory_token_needs_no_io(tmp_path, monkeypatch):
+    api = _api(tmp_path)
+    api._set_token('cached', datetime.now() + timedelta(hours=1))
+    monkeypatch.setattr(api._token_store, 'read', pytest.fail)
+    monkeypatch.setattr(EBayAPI, '_request_token', pytest.fail)
+    assert api.get_oauth_token()
+
+
+def test_refresher_renews_before_expiry(tmp_path, monkeypatch):
+    monkeypatch.setattr(ebay_api, 'TOKEN_REFRESH_MARGIN', 600)
+    monkeypatch.setattr(ebay_api, 'TOKEN_RETRY_SECONDS', 0.05)
+    issued = []
+
+    def fake_request(self):
+        issued.append(time.monotonic())
+        # Expires inside the refresh margin, so the refresher renews it
+        # after the minimum interval.
+        return {'access_token': f'token-{len(issued)}', 'expires_in': 300}
+
+    monkeypatch.setattr(EBayAPI, '_request_token', fake_request)
+    monkeypatch.setattr(ebay_api.random, 'uniform', lambda a, b: 0.0)
+    api = _api(tmp_path)
+    api.start_token_refresher()
+    deadline = time.monotonic() + 5
+    while len(issued) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    api.close()
+
+    assert len(issued) >= 2
+    assert api.token.startswith('token-')